@@ -0,0 +1,392 @@
+"""
+Moteur analytique en memoire pour /stats (STATS_ENGINE=memory)
+
+Les donnees de /stats ne changent qu'entre deux passages de l'ETL et tiennent
+en memoire : la table consommation est lue une fois et gardee en tableaux
+NumPy compacts. Regions et medicaments y sont codes par leur position,
+et les remboursements sont stockes en centimes int64. Les sommes sont donc
+exactes, comme les SUM SQL sur NUMERIC(15, 2).
+
+- totaux (annee x region) et (medicament x annee) calcules au chargement :
+  /stats/regions, /region, /batch, /overview et /timeseries deviennent des
+  lectures de tableaux
+- top-N des medicaments d'une region : somme par medicament sur la tranche
+  de l'annee (lignes triees par annee) avec np.bincount, puis selection
+  partielle (np.partition) des n plus grands
+
+Rechargement : quand la version des donnees change (data_version.on_change),
+un nouvel instantane est construit en arriere-plan puis remplace l'ancien en
+une affectation. Tant que l'instantane ne correspond pas a la version
+courante, get_snapshot() renvoie None et les routes passent par SQL : aucune
+reponse (ni entree du cache) n'est calculee sur des donnees perimees.
+"""
+
+import logging
+import threading
+import time
+from collections import namedtuple
+from decimal import Decimal
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import select, func, cast, BigInteger
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import models, data_version
+from app.database import get_engine
+
+logger = logging.getLogger(__name__)
+
+# Lignes lues par lot au chargement
+FETCH_SIZE = 100_000
+# Delai avant de retenter un chargement echoue (secondes)
+RETRY_DELAY = 30
+
+# Meme attributs que les Row SQL des routes
+RegionRow = namedtuple("RegionRow", "code_region nom_region total_boites total_remb")
+RegionEnrichieRow = namedtuple("RegionEnrichieRow", [
+    "code_region", "nom_region", "total_boites", "total_remb", "rang", "nb_regions",
+    "moyenne_nationale", "total_national", "part_pct", "ecart", "ecart_pct"
+])
+BatchRow = namedtuple("BatchRow", "code_region nom_region annee total_boites total_remb")
+AnneeRow = namedtuple("AnneeRow", "annee total_boites total_remb")
+OverviewRow = namedtuple("OverviewRow", "total_boites total_remb nb_regions")
+MedicamentTopRow = namedtuple("MedicamentTopRow", "code_cip nom_medicament total_boites total_remb")
+
+
+def _euros(cents):
+    """Centimes -> Decimal a deux decimales (comme NUMERIC(15, 2))"""
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def _group_sum(keys, values, size):
+    """Somme exacte (int64) de values par cle dans [0, size)"""
+    if values.size and int(np.abs(values).sum()) < 2 ** 53:
+        # float64 represente exactement tous les entiers < 2**53 : bincount est exact
+        return np.rint(np.bincount(keys, weights=values, minlength=size)).astype(np.int64)
+    totals = np.zeros(size, dtype=np.int64)
+    np.add.at(totals, keys, values)
+    return totals
+
+
+def _positions(ids, size):
+    """Table id -> position (-1 : id absent)"""
+    lookup = np.full(size, -1, dtype=np.int64)
+    lookup[ids] = np.arange(len(ids))
+    return lookup
+
+
+class StatsSnapshot:
+    """Instantane de consommation (une version des donnees), en lecture seule"""
+
+    def __init__(self, version, regions, medicaments, consommation):
+        self.version = version
+
+        # Regions et medicaments : position dans ces tableaux = code entier
+        region_ids = np.array([r.id for r in regions], dtype=np.int64)
+        self.region_codes = np.array([r.code_region for r in regions], dtype=np.int64)
+        self.region_noms = [r.nom_region for r in regions]
+        self.region_by_code = {int(code): i for i, code in enumerate(self.region_codes)}
+        med_ids = np.array([m.id for m in medicaments], dtype=np.int64)
+        self.med_cip = np.array([m.code_cip for m in medicaments], dtype=object)
+        self.med_nom = np.array([m.nom_medicament for m in medicaments], dtype=object)
+        self.med_by_cip = {cip: i for i, cip in enumerate(self.med_cip)}
+        self.nb_medicaments = len(medicaments)
+
+        # consommation : (region_id, medicament_id, annee, total_boites, centimes), 0 = NULL
+        region_id, med_id, annee, boites, cents = consommation.T
+        region_pos = _positions(region_ids, max(int(region_id.max(initial=0)), int(region_ids.max(initial=0))) + 1)
+        med_pos = _positions(med_ids, max(int(med_id.max(initial=0)), int(med_ids.max(initial=0))) + 1)
+        region_idx = region_pos[region_id]
+        med_idx = med_pos[med_id]
+
+        self.annees = np.unique(annee)
+        nb_annees, nb_regions, nb_meds = len(self.annees), len(region_ids), len(med_ids)
+        annee_idx = np.searchsorted(self.annees, annee)
+
+        # Totaux par annee (toutes les lignes, region ou medicament NULL compris)
+        self.annee_boites = _group_sum(annee_idx, boites, nb_annees)
+        self.annee_cents = _group_sum(annee_idx, cents, nb_annees)
+
+        # Totaux (annee, region) ; present : au moins une ligne
+        has_region = region_idx >= 0
+        keys = annee_idx[has_region] * nb_regions + region_idx[has_region]
+        size = nb_annees * nb_regions
+        self.region_boites = _group_sum(keys, boites[has_region], size).reshape(nb_annees, nb_regions)
+        self.region_cents = _group_sum(keys, cents[has_region], size).reshape(nb_annees, nb_regions)
+        self.region_present = (np.bincount(keys, minlength=size) > 0).reshape(nb_annees, nb_regions)
+        # COUNT(DISTINCT region_id) : region_id non NULL, meme hors table regions
+        width = int(region_id.max(initial=0)) + 1
+        distinct = np.unique(annee_idx[region_id > 0] * width + region_id[region_id > 0])
+        self.annee_nb_regions = np.bincount(distinct // width, minlength=nb_annees)
+
+        # Totaux (medicament, annee)
+        has_med = med_idx >= 0
+        keys = med_idx[has_med] * nb_annees + annee_idx[has_med]
+        size = nb_meds * nb_annees
+        self.med_boites = _group_sum(keys, boites[has_med], size).reshape(nb_meds, nb_annees)
+        self.med_cents = _group_sum(keys, cents[has_med], size).reshape(nb_meds, nb_annees)
+        self.med_present = (np.bincount(keys, minlength=size) > 0).reshape(nb_meds, nb_annees)
+
+        # Lignes triees par annee (tranches contigues) pour le top-N par region
+        order = np.argsort(annee_idx, kind="stable")
+        self.rows_region = region_idx[order].astype(np.int32)
+        self.rows_med = med_idx[order].astype(np.int32)
+        self.rows_boites = boites[order]
+        self.rows_cents = cents[order]
+        self.annee_bounds = np.searchsorted(annee_idx[order], np.arange(nb_annees + 1))
+
+    def _annee(self, annee):
+        """Position de l'annee, None si aucune ligne"""
+        i = int(np.searchsorted(self.annees, annee))
+        return i if i < len(self.annees) and self.annees[i] == annee else None
+
+    def memory_mb(self):
+        arrays = [value for value in vars(self).values() if isinstance(value, np.ndarray)]
+        return round(sum(a.nbytes for a in arrays) / 1024 / 1024, 1)
+
+    # ------------------------------------------------------------
+    # Requetes de /stats
+    # ------------------------------------------------------------
+
+    def regions_stats(self, annee):
+        """Regions ayant des donnees cette annee, par remboursement decroissant"""
+        a = self._annee(annee)
+        if a is None:
+            return []
+        present = np.flatnonzero(self.region_present[a])
+        order = present[np.argsort(-self.region_cents[a, present], kind="stable")]
+        return [
+            RegionRow(int(self.region_codes[r]), self.region_noms[r],
+                      int(self.region_boites[a, r]), _euros(self.region_cents[a, r]))
+            for r in order
+        ]
+
+    def region_stats(self, code_region, annee):
+        """Totaux d'une region (0 sans donnees cette annee), None si region inconnue"""
+        r = self.region_by_code.get(code_region)
+        if r is None:
+            return None
+        a = self._annee(annee)
+        if a is None:
+            return RegionRow(code_region, self.region_noms[r], 0, Decimal(0))
+        return RegionRow(code_region, self.region_noms[r],
+                         int(self.region_boites[a, r]), _euros(self.region_cents[a, r]))
+
+    def region_stats_enrichies(self, code_region, annee):
+        """
+        Rang, moyenne et total nationaux, part et ecart (cf. region_stats_enrichies_query),
+        None si la region n'a pas de donnees cette annee
+        """
+        r = self.region_by_code.get(code_region)
+        a = self._annee(annee)
+        if r is None or a is None or not self.region_present[a, r]:
+            return None
+        cents = self.region_cents[a][self.region_present[a]]
+        remb = _euros(self.region_cents[a, r])
+        total_national = _euros(cents.sum())
+        nb_regions = len(cents)
+        moyenne = total_national / nb_regions
+        return RegionEnrichieRow(
+            code_region=code_region,
+            nom_region=self.region_noms[r],
+            total_boites=int(self.region_boites[a, r]),
+            total_remb=remb,
+            # rank() : 1 + nombre de regions strictement devant
+            rang=1 + int((cents > self.region_cents[a, r]).sum()),
+            nb_regions=nb_regions,
+            moyenne_nationale=moyenne,
+            total_national=total_national,
+            part_pct=remb * 100 / total_national if total_national else None,
+            ecart=remb - moyenne,
+            ecart_pct=(remb - moyenne) * 100 / moyenne if moyenne else None,
+        )
+
+    def stats_batch(self, codes_region, annees):
+        """Couples (region, annee) ayant des donnees, tries par code region puis annee"""
+        if codes_region:
+            regions = sorted({self.region_by_code[c] for c in codes_region if c in self.region_by_code},
+                             key=lambda r: self.region_codes[r])
+        else:
+            regions = sorted(range(len(self.region_codes)), key=lambda r: self.region_codes[r])
+        positions = sorted(a for a in {self._annee(x) for x in annees} if a is not None)
+        return [
+            BatchRow(int(self.region_codes[r]), self.region_noms[r], int(self.annees[a]),
+                     int(self.region_boites[a, r]), _euros(self.region_cents[a, r]))
+            for r in regions
+            for a in positions
+            if self.region_present[a, r]
+        ]
+
+    def timeseries(self, code_region=None, code_cip=None, annee_debut=None, annee_fin=None):
+        """Totaux par annee (cf. timeseries.timeseries_query)"""
+        if code_region is not None:
+            r = self.region_by_code.get(code_region)
+            if r is None:
+                return []
+            present, boites, cents = self.region_present[:, r], self.region_boites[:, r], self.region_cents[:, r]
+        elif code_cip is not None:
+            m = self.med_by_cip.get(code_cip)
+            if m is None:
+                return []
+            present, boites, cents = self.med_present[m], self.med_boites[m], self.med_cents[m]
+        else:
+            present = np.ones(len(self.annees), dtype=bool)
+            boites, cents = self.annee_boites, self.annee_cents
+
+        if annee_debut is not None:
+            present = present & (self.annees >= annee_debut)
+        if annee_fin is not None:
+            present = present & (self.annees <= annee_fin)
+        return [
+            AnneeRow(int(self.annees[a]), int(boites[a]), _euros(cents[a]))
+            for a in np.flatnonzero(present)
+        ]
+
+    def overview(self, annee):
+        a = self._annee(annee)
+        if a is None:
+            return OverviewRow(None, None, 0)
+        return OverviewRow(int(self.annee_boites[a]), _euros(self.annee_cents[a]), int(self.annee_nb_regions[a]))
+
+    def top_medicaments(self, annee, code_region=None, n=10, by="remb"):
+        """n medicaments les plus consommes (boites ou remboursement), ordre decroissant"""
+        a = self._annee(annee)
+        if a is None:
+            return []
+        if code_region is None:
+            present = self.med_present[:, a]
+            boites, cents = self.med_boites[:, a], self.med_cents[:, a]
+        else:
+            r = self.region_by_code.get(code_region)
+            if r is None:
+                return []
+            start, end = self.annee_bounds[a], self.annee_bounds[a + 1]
+            rows = slice(start, end)
+            mask = (self.rows_region[rows] == r) & (self.rows_med[rows] >= 0)
+            meds = self.rows_med[rows][mask]
+            size = len(self.med_cip)
+            boites = _group_sum(meds, self.rows_boites[rows][mask], size)
+            cents = _group_sum(meds, self.rows_cents[rows][mask], size)
+            present = np.bincount(meds, minlength=size) > 0
+
+        candidates = np.flatnonzero(present)
+        values = (cents if by == "remb" else boites)[candidates]
+        if n < len(candidates):
+            # n-ieme plus grande valeur sans trier tout le tableau (selection partielle),
+            # puis egalites au seuil departagees par id comme le classement SQL
+            seuil = np.partition(values, len(values) - n)[len(values) - n]
+            above = np.flatnonzero(values > seuil)
+            ties = np.flatnonzero(values == seuil)[:n - len(above)]
+            keep = np.concatenate([above, ties])
+            candidates, values = candidates[keep], values[keep]
+        # Valeur decroissante puis id croissant (positions dans l'ordre des id)
+        order = candidates[np.lexsort((candidates, -values))]
+        return [
+            MedicamentTopRow(self.med_cip[m], self.med_nom[m], int(boites[m]), _euros(cents[m]))
+            for m in order
+        ]
+
+
+def load_snapshot(engine=None):
+    """Lit regions, medicaments et consommation et construit un instantane"""
+    engine = engine or get_engine()
+    version = data_version.current_version()
+    with engine.connect() as conn:
+        regions = conn.execute(
+            select(models.Region.id, models.Region.code_region, models.Region.nom_region).order_by(models.Region.id)
+        ).all()
+        medicaments = conn.execute(
+            select(models.Medicament.id, models.Medicament.code_cip, models.Medicament.nom_medicament)
+            .order_by(models.Medicament.id)
+        ).all()
+
+        c = models.Consommation
+        result = conn.execution_options(stream_results=True, yield_per=FETCH_SIZE).execute(select(
+            func.coalesce(c.region_id, 0),
+            func.coalesce(c.medicament_id, 0),
+            c.annee,
+            c.total_boites,
+            cast(func.round(c.total_remb * 100), BigInteger),
+        ))
+        chunks = [
+            np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=len(rows) * 5).reshape(-1, 5)
+            for rows in result.partitions()
+        ]
+    consommation = np.concatenate(chunks) if chunks else np.empty((0, 5), dtype=np.int64)
+    return StatsSnapshot(version, regions, medicaments, consommation)
+
+
+class AnalyticsEngine:
+    """Instantane courant et rechargement en arriere-plan"""
+
+    def __init__(self):
+        self.snapshot = None
+        self.loaded_in = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loading = False
+        self._failed_at = None
+
+    def get(self):
+        """Instantane a jour, ou None (chargement en cours : passer par SQL)"""
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.version == data_version.current_version():
+            return snapshot
+        self.reload_async()
+        return None
+
+    def reload(self):
+        """Construit un nouvel instantane puis le publie (bloquant, un seul chargement a la fois)"""
+        with self._load_lock:
+            current = self.snapshot
+            if current is not None and current.version == data_version.current_version():
+                return current
+            start = time.perf_counter()
+            try:
+                snapshot = load_snapshot()
+            except SQLAlchemyError as e:
+                self._failed_at = time.monotonic()
+                logger.warning("Moteur analytique non charge: %s", e.__class__.__name__)
+                return None
+            self._failed_at = None
+            self.loaded_in = round(time.perf_counter() - start, 3)
+            # Remplacement en une affectation : les lecteurs gardent l'ancien jusque-la
+            self.snapshot = snapshot
+            return snapshot
+
+    def reload_async(self):
+        with self._lock:
+            if self._loading:
+                return
+            if self._failed_at is not None and time.monotonic() - self._failed_at < RETRY_DELAY:
+                return
+            self._loading = True
+        threading.Thread(target=self._reload_in_background, name="analytics-reload", daemon=True).start()
+
+    def _reload_in_background(self):
+        try:
+            self.reload()
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def status(self):
+        snapshot = self.snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "lignes": int(snapshot.annee_bounds[-1]) if snapshot else 0,
+            "memoire_mb": snapshot.memory_mb() if snapshot else 0,
+            "chargement_s": self.loaded_in,
+            "en_chargement": self._loading,
+        }
+
+
+engine = AnalyticsEngine()
+
+# Nouvelles donnees publiees par l'ETL : recharger en arriere-plan
+data_version.on_change(lambda version: engine.reload_async())
+
+
+def get_snapshot():
+    return engine.get()
@@ -0,0 +1,149 @@
+"""
+Cache des reponses de l'API (LRU + TTL), invalide par la version des donnees
+
+Les donnees ne changent qu'apres un chargement de l'ETL : chaque reponse
+mise en cache est associee a la version des donnees (app.data_version) et
+porte un ETag derive de cette version et de la cle de cache (route,
+parametres, format). Un client qui renvoie cet ETag dans If-None-Match pour
+la meme requete recoit 304 sans que la base soit interrogee.
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+
+from app import config, data_version, formats
+
+# Routes mises en cache : /stats/*, /regions, /regions/*, /medicaments/{id}
+CACHED_PATHS = [
+    re.compile(r"^/stats(/.*)?$"),
+    re.compile(r"^/regions(/.*)?$"),
+    re.compile(r"^/medicaments/\d+$"),
+]
+
+
+class ResponseCache:
+    """Cache LRU avec expiration, cle = route + parametres de requete"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["version"] != version or entry["expires_at"] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def set(self, key, version, body, status_code, media_type):
+        with self._lock:
+            self._entries[key] = {
+                "version": version,
+                "expires_at": time.monotonic() + self.ttl,
+                "body": body,
+                "status_code": status_code,
+                "media_type": media_type,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            entries, hits, misses, not_modified = len(self._entries), self.hits, self.misses, self.not_modified
+        total = hits + misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": hits,
+            "misses": misses,
+            "not_modified": not_modified,
+            "hit_rate": round(hits / total, 4) if total else None,
+            "data_version": data_version.current_version(),
+        }
+
+
+response_cache = ResponseCache(config.CACHE_MAX_ENTRIES, config.CACHE_TTL)
+
+# Nouvelle version des donnees : les entrees existantes ne serviront plus
+data_version.on_change(lambda version: response_cache.clear())
+
+
+def _cache_key(request: Request):
+    # Le format peut aussi etre choisi par l'en-tete Accept (app.formats)
+    return request.url.path + "?" + "&".join(sorted(
+        f"{k}={v}" for k, v in request.query_params.multi_items()
+    )) + "#" + formats.requested_format(request, request.query_params.get("format"))
+
+
+def _etag(key, version):
+    """ETag faible propre a la requete (cle de cache) et a la version des donnees"""
+    return f'W/"v{version}-{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+
+
+def _is_cached_path(path):
+    return any(pattern.match(path.rstrip("/") or "/") for pattern in CACHED_PATHS)
+
+
+async def cache_middleware(request: Request, call_next):
+    """Middleware HTTP : 304 sur If-None-Match, sinon reponse servie depuis le cache"""
+    if not config.CACHE_ENABLED or request.method != "GET" or not _is_cached_path(request.url.path):
+        return await call_next(request)
+
+    version = await run_in_threadpool(data_version.current_version)
+    key = _cache_key(request)
+    etag = _etag(key, version)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    # Cet ETag n'a pu etre envoye que sur une reponse 200 a la meme requete
+    if request.headers.get("if-none-match") == etag:
+        response_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+
+    entry = response_cache.get(key, version)
+    if entry:
+        return Response(
+            content=entry["body"],
+            status_code=entry["status_code"],
+            media_type=entry["media_type"],
+            headers={**headers, "X-Cache": "HIT"},
+        )
+
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    media_type = response.headers.get("content-type")
+    response_cache.set(key, version, body, response.status_code, media_type)
+
+    return Response(
+        content=body,
+        status_code=response.status_code,
+        media_type=media_type,
+        headers={**headers, "X-Cache": "MISS"},
+    )
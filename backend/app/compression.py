@@ -0,0 +1,124 @@
+"""
+Compression des reponses (Brotli si le client l'accepte, sinon GZip)
+
+Middleware ASGI : seules les reponses d'au moins COMPRESSION_MIN_SIZE octets
+sont compressees ; les reponses en flux (export) le sont au fil de l'eau.
+Brotli est optionnel (paquet brotli) : sans lui, seul GZip est propose.
+"""
+
+import zlib
+
+from app import config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Formats deja compresses : inutile de les recompresser
+SKIP_MEDIA_TYPES = ("application/vnd.apache.parquet", "image/", "application/zip")
+
+
+def _choose_encoding(accept_encoding):
+    encodings = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+    if brotli is not None and "br" in encodings:
+        return "br"
+    if "gzip" in encodings:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=config.BROTLI_QUALITY)
+            self._process = compressor.process
+            self._flush = compressor.flush
+            self._finish = compressor.finish
+        else:
+            # wbits=31 : en-tete et pied GZip
+            compressor = zlib.compressobj(config.GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._process = compressor.compress
+            self._flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = compressor.flush
+
+    def compress(self, data, final):
+        """Bloc compresse ; final=True termine le flux"""
+        return self._process(data) + (self._finish() if final else self._flush())
+
+
+class CompressionMiddleware:
+    """Compresse le corps des reponses selon Accept-Encoding"""
+
+    def __init__(self, app, minimum_size=None):
+        self.app = app
+        self.minimum_size = config.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        encoding = _choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        compressor = None
+        passthrough = False
+        # Debut du corps retenu tant qu'il est sous le seuil (corps envoye en plusieurs blocs)
+        pending = b""
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough, pending
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                return await send(message)
+
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                body = pending + message.get("body", b"")
+                if more_body and len(body) < self.minimum_size:
+                    pending = body
+                    return
+                pending = b""
+
+                response_headers = {k.lower(): v for k, v in start_message["headers"]}
+                media_type = response_headers.get(b"content-type", b"").decode("latin-1")
+                if (b"content-encoding" in response_headers
+                        or media_type.startswith(SKIP_MEDIA_TYPES)
+                        or len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(start_message)
+                    return await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+                compressor = _Compressor(encoding)
+                new_headers = [
+                    (k, v) for k, v in start_message["headers"]
+                    if k.lower() not in (b"content-length", b"content-encoding")
+                ]
+                new_headers.append((b"content-encoding", encoding.encode()))
+                new_headers.append((b"vary", b"Accept-Encoding"))
+
+                if not more_body:
+                    body = compressor.compress(body, final=True)
+                    new_headers.append((b"content-length", str(len(body)).encode()))
+                    await send({**start_message, "headers": new_headers})
+                    return await send({"type": "http.response.body", "body": body})
+
+                await send({**start_message, "headers": new_headers})
+            else:
+                body = message.get("body", b"")
+
+            await send({
+                "type": "http.response.body",
+                "body": compressor.compress(body, final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,69 @@
+"""
+Parametres de l'API, lus dans les variables d'environnement (.env)
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Charger les variables d'environnement
+load_dotenv()
+
+# Acces base de donnees des routes : "sync" (Session) ou "async" (AsyncSession)
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+
+# Threads servant les routes synchrones (limiteur anyio, 40 par defaut)
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+# Pool de connexions : pool_size + max_overflow >= THREADPOOL_SIZE, sinon des
+# requetes attendent une connexion pendant que les threads sont tous occupes
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", str(max(THREADPOOL_SIZE - DB_POOL_SIZE, 0))))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Recycler les connexions avant que l'hebergeur ne les coupe (secondes)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# Verifier chaque connexion avant usage (connexions mortes apres inactivite)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Duree maximale d'une requete SQL (ms, PostgreSQL uniquement, 0 = illimite)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+
+# Cache des reponses (/stats, /regions, /medicaments/{id})
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "3600"))
+
+# Intervalle minimal (secondes) entre deux lectures de la version des donnees
+DATA_VERSION_CHECK_INTERVAL = float(os.getenv("DATA_VERSION_CHECK_INTERVAL", "5"))
+
+# Routes de liste (/regions, /medicaments) : colonnes selectionnees avec select()
+# et reponse orjson sans validation Pydantic ligne par ligne
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "false").lower() == "true"
+
+# Compression des reponses a partir de COMPRESSION_MIN_SIZE octets
+# (Brotli si le paquet brotli est installe et accepte par le client, sinon GZip)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Requetes SQL lentes (ms, 0 = desactive) : journal tournant + /admin/slow-queries
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Part des requetes lentes dont le plan est capture (EXPLAIN ANALYZE / QUERY PLAN)
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0.1"))
+SLOW_QUERY_KEEP = int(os.getenv("SLOW_QUERY_KEEP", "200"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "logs/slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "3"))
+
+# Jeton des routes /admin (en-tete X-Admin-Token) ; vide = routes desactivees (404)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Demarrage a froid : prechauffage en arriere-plan apres le demarrage
+# (connexions du pool, puis requetes internes sur WARMUP_PATHS pour remplir le cache)
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "2"))
+WARMUP_PATHS = [p.strip() for p in os.getenv(
+    "WARMUP_PATHS", "/stats/overview,/stats/regions,/regions/,/stats/timeseries"
+).split(",") if p.strip()]
+
+# Routes /stats : "sql" (requetes, rollups) ou "memory" (consommation chargee
+# en tableaux NumPy, rechargee a chaque nouvelle version des donnees)
+STATS_ENGINE = os.getenv("STATS_ENGINE", "sql").lower()
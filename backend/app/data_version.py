@@ -0,0 +1,91 @@
+"""
+Version des donnees chargees par l'ETL
+
+load_to_db.py incremente data_version.version apres chaque chargement reussi.
+L'API relit cette valeur au plus toutes les DATA_VERSION_CHECK_INTERVAL secondes
+et previent les abonnes (cache, index de recherche...) quand elle change.
+
+Les abonnes sont appeles dans un thread d'arriere-plan, pas dans la requete
+qui a vu la nouvelle version : une reconstruction longue (index de
+recherche) ne la retarde pas, et l'ancien etat reste servi jusqu'a ce que
+l'abonne publie le nouveau.
+
+Base injoignable : la derniere version lue est conservee (pas de notification).
+"""
+
+import logging
+import threading
+import time
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import config, models
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# Un changement de version notifie a la fois, abonnes dans l'ordre d'inscription
+_notify_lock = threading.Lock()
+_state = {"version": None, "checked_at": 0.0}
+_listeners = []
+
+
+def on_change(callback):
+    """Enregistre callback(version), appele quand la version des donnees change"""
+    _listeners.append(callback)
+    return callback
+
+
+def _read_version():
+    """Version publiee (0 si l'ETL n'en a jamais publie), None si la lecture echoue"""
+    db = SessionLocal()
+    try:
+        version = db.query(models.DataVersion.version).filter(models.DataVersion.id == 1).scalar()
+    except SQLAlchemyError:
+        try:
+            # Table absente : l'ETL n'a encore jamais publie de version
+            if inspect(db.get_bind()).has_table(models.DataVersion.__tablename__):
+                return None
+        except SQLAlchemyError:
+            return None
+        version = None
+    finally:
+        db.close()
+    return version or 0
+
+
+def _known_version():
+    return _state["version"] if _state["version"] is not None else 0
+
+
+def current_version():
+    """Version courante des donnees (relue en base au plus toutes les N secondes)"""
+    now = time.monotonic()
+    if now - _state["checked_at"] < config.DATA_VERSION_CHECK_INTERVAL:
+        return _known_version()
+
+    with _lock:
+        if now - _state["checked_at"] < config.DATA_VERSION_CHECK_INTERVAL:
+            return _known_version()
+        version = _read_version()
+        _state["checked_at"] = time.monotonic()
+        if version is None:
+            # Panne passagere : ni retour a 0, ni notification
+            return _known_version()
+        previous = _state["version"]
+        _state["version"] = version
+
+    if previous is not None and version != previous:
+        threading.Thread(target=_notify, args=(version,), name="data-version-listeners", daemon=True).start()
+    return version
+
+
+def _notify(version):
+    with _notify_lock:
+        for callback in _listeners:
+            try:
+                callback(version)
+            except Exception:  # un abonne en echec ne prive pas les suivants
+                logger.exception("Abonne data_version %s en echec", getattr(callback, "__name__", callback))
@@ -1,29 +1,65 @@
 """
 Configuration de la connexion a la base de donnees PostgreSQL
+
+Les moteurs sont crees a la premiere utilisation (get_engine /
+get_async_engine), pas a l'import : l'API demarre sans attendre le driver ni
+la base, et un DATABASE_URL absent n'echoue qu'a la premiere requete SQL.
+Les sondes (pool, /metrics, requetes lentes) sont posees a la creation.
 """
 
+import os
+import threading
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
 from dotenv import load_dotenv
+from app.pool import engine_options, instrument
+from app.metrics import instrument_queries
+from app.slow_queries import record_slow_queries
 
 # Charger les variables d'environnement
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL non trouvee dans le fichier .env")
+# Base pour les modeles
+Base = declarative_base()
+
+_lock = threading.Lock()
+_engines = {"sync": None, "async": None}
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
+_async_session_factory = None
 
-# Creer le moteur SQLAlchemy
-engine = create_engine(DATABASE_URL)
 
-# Creer une session locale
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def get_engine():
+    """Moteur SQLAlchemy synchrone (cree au premier appel, pool configure dans app.config)"""
+    engine = _engines["sync"]
+    if engine is not None:
+        return engine
+    with _lock:
+        if _engines["sync"] is None:
+            if not DATABASE_URL:
+                raise ValueError("DATABASE_URL non trouvee dans le fichier .env")
+            engine = instrument(create_engine(DATABASE_URL, **engine_options(DATABASE_URL)))
+            # Nombre et duree des requetes SQL par route (/metrics)
+            instrument_queries(engine)
+            # Requetes lentes (journal + EXPLAIN echantillonne)
+            record_slow_queries(engine, explain_engine=engine)
+            _session_factory.configure(bind=engine)
+            _engines["sync"] = engine
+    return _engines["sync"]
 
-# Base pour les modeles
-Base = declarative_base()
+
+def created_engines():
+    """Moteurs deja crees, par nom ("sync", "async") : l'etat du pool n'en cree pas"""
+    return {name: engine for name, engine in _engines.items() if engine is not None}
+
+
+# Creer une session locale
+def SessionLocal():
+    """Nouvelle session, liee au moteur synchrone (cree au besoin)"""
+    get_engine()
+    return _session_factory()
 
 # Dependency pour obtenir une session DB
 def get_db():
@@ -31,4 +67,48 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# ============================================================
+# MODE ASYNC (DB_MODE=async) : asyncpg / aiosqlite
+# ============================================================
+
+def to_async_url(url):
+    """URL synchrone -> URL du driver asyncio equivalent"""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    scheme, rest = url.split("://", 1)
+    driver = {"postgresql": "postgresql+asyncpg", "postgresql+psycopg2": "postgresql+asyncpg",
+              "sqlite": "sqlite+aiosqlite"}.get(scheme, scheme)
+    return f"{driver}://{rest}"
+
+def get_async_engine():
+    """Moteur asyncio (DB_MODE=async), cree au premier appel"""
+    global _async_session_factory
+    engine = _engines["async"]
+    if engine is not None:
+        return engine
+    # Importe seulement en mode async
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    sync_engine = get_engine()
+    with _lock:
+        if _engines["async"] is None:
+            async_url = to_async_url(DATABASE_URL)
+            engine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+            instrument(engine.sync_engine)
+            instrument_queries(engine.sync_engine)
+            # Plans captures via le moteur synchrone, sauf si les styles de parametres different
+            record_slow_queries(
+                engine.sync_engine,
+                explain_engine=sync_engine if engine.dialect.paramstyle == sync_engine.dialect.paramstyle else None
+            )
+            _async_session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+            _engines["async"] = engine
+    return _engines["async"]
+
+# Dependency pour obtenir une session DB asynchrone
+async def get_async_db():
+    get_async_engine()
+    async with _async_session_factory() as db:
+        yield db
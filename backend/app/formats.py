@@ -0,0 +1,79 @@
+"""
+Formats de reponse des routes de liste
+
+- json (defaut) : tableau d'objets, une cle par champ et par ligne
+- columns : {"columns": [...], "data": [[...], ...]}, les cles ne sont
+  envoyees qu'une fois (pd.DataFrame(data, columns=columns) cote client)
+- arrow : flux Apache Arrow IPC (pyarrow.ipc.open_stream cote client)
+
+Le format est choisi par ?format=columns|arrow ou par l'en-tete Accept.
+"""
+
+from decimal import Decimal
+import io
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+from app.serialization import FastJSONResponse
+
+COLUMNS_MEDIA_TYPE = "application/vnd.medimap.columns+json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+FORMATS = ("json", "columns", "arrow")
+FORMAT_PATTERN = "^(json|columns|arrow)$"
+FORMAT_DESCRIPTION = "json (défaut), columns ou arrow (ou en-tête Accept)"
+
+
+def requested_format(request: Request, format=None):
+    """Format demande : parametre ?format=, sinon en-tete Accept, sinon json"""
+    if format:
+        return format
+    accept = request.headers.get("accept", "")
+    if COLUMNS_MEDIA_TYPE in accept:
+        return "columns"
+    if ARROW_MEDIA_TYPE in accept:
+        return "arrow"
+    return "json"
+
+
+def _value(item, field):
+    value = item[field] if isinstance(item, dict) else getattr(item, field)
+    # Nombres plutot que chaines (rendu Pydantic) : colonnes directement numeriques
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def columns_response(items, fields):
+    """Lignes (objets ORM, Row ou dict) -> {"columns": [...], "data": [[...]]}"""
+    return FastJSONResponse(
+        {"columns": list(fields), "data": [[_value(item, field) for field in fields] for item in items]},
+        media_type=COLUMNS_MEDIA_TYPE,
+    )
+
+
+def arrow_response(items, fields):
+    """Lignes -> flux Arrow IPC (une table, un batch)"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise HTTPException(status_code=501, detail="Format Arrow indisponible (pyarrow non installé)")
+
+    table = pa.table({field: [_value(item, field) for item in items] for field in fields})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return Response(content=sink.getvalue(), media_type=ARROW_MEDIA_TYPE)
+
+
+def format_response(request: Request, format, items, fields, headers=None):
+    """
+    Reponse au format demande, ou None pour le format json (la route
+    renvoie alors ses lignes comme d'habitude, via response_model)
+    """
+    fmt = requested_format(request, format)
+    if fmt == "json":
+        return None
+    response = columns_response(items, fields) if fmt == "columns" else arrow_response(items, fields)
+    if headers:
+        response.headers.update(headers)
+    return response
@@ -3,9 +3,37 @@ API FastAPI pour MediMap
 Analyse territoriale de la consommation de medicaments en France
 """
 
+# Importe en premier : mesure du demarrage a froid (cf. app/startup.py)
+from app import startup
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+import anyio.to_thread
+import asyncio
+import logging
+import time
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import regions, medicaments, stats
+from sqlalchemy.exc import SQLAlchemyError
+
+# FastAPI, Starlette, Pydantic et SQLAlchemy importés : l'essentiel du temps d'import
+startup.timings.mark("import_framework")
+
+from app.routers import export, admin
+from app.database import SessionLocal, get_engine, created_engines
+from app.pool import pool_status
+from app import config, search, cache, data_version
+from app.compression import CompressionMiddleware
+from app.metrics import MetricsMiddleware, metrics
+
+# Routes synchrones (Session) ou asynchrones (AsyncSession) selon DB_MODE
+if config.DB_MODE == "async":
+    from app.routers import regions_async as regions, medicaments_async as medicaments, stats_async as stats
+else:
+    from app.routers import regions, medicaments, stats
+
+logger = logging.getLogger(__name__)
 
 # Créer l'application FastAPI
 app = FastAPI(
@@ -16,6 +44,9 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Cache des réponses (invalidé quand l'ETL publie une nouvelle version des données)
+app.middleware("http")(cache.cache_middleware)
+
 # Configuration CORS (pour autoriser les requêtes depuis le frontend)
 app.add_middleware(
     CORSMiddleware,
@@ -23,12 +54,53 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Compression Brotli / GZip des réponses volumineuses (middleware le plus externe :
+# le cache conserve les réponses non compressées)
+app.add_middleware(CompressionMiddleware)
+
+# Latence, statuts et requêtes SQL par route (exposés sur /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Premier octet servi après le lancement du processus (démarrage à froid)
+app.add_middleware(startup.FirstByteMiddleware)
+
+# Taille du pool de threads des routes synchrones (cf. DB_POOL_SIZE + DB_MAX_OVERFLOW)
+@app.on_event("startup")
+def configure_threadpool():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = config.THREADPOOL_SIZE
+
+# Index de recherche des médicaments, construit en arrière-plan après le démarrage
+# (en attendant, ou en cas d'échec, /medicaments/search retombe sur ILIKE)
+def build_search_index():
+    db = SessionLocal()
+    try:
+        search.build_index(db)
+    except SQLAlchemyError as e:
+        logger.warning("Index de recherche non construit: %s", e)
+    finally:
+        db.close()
+
+# Préchauffage en tâche de fond : l'API accepte les requêtes sans l'attendre
+@app.on_event("startup")
+async def start_warm_up():
+    startup.timings.mark("startup")
+    app.state.warm_up = asyncio.create_task(startup.warm_up(app, build_search_index))
+
+# Nouvelles données chargées : reconstruire l'index (thread des abonnés de
+# data_version ; l'ancien index reste servi jusqu'au remplacement)
+@data_version.on_change
+def rebuild_search_index(version):
+    build_search_index()
+
 # Inclure les routers
 app.include_router(regions.router)
 app.include_router(medicaments.router)
 app.include_router(stats.router)
+app.include_router(export.router)
+app.include_router(admin.router)
 
 # Route racine
 @app.get("/")
@@ -43,7 +115,8 @@ def root():
         "endpoints": {
             "regions": "/regions",
             "medicaments": "/medicaments",
-            "stats": "/stats"
+            "stats": "/stats",
+            "export": "/export/consommation"
         }
     }
 
@@ -53,4 +126,94 @@ def health_check():
     """
     Vérification de l'état de l'API
     """
-    return {"status": "ok", "service": "MediMap API"}
\ No newline at end of file
+    return {"status": "ok", "service": "MediMap API"}
+
+# Statistiques du cache
+@app.get("/health/cache")
+def cache_stats():
+    """
+    Compteurs du cache de réponses (hits, misses, 304)
+    """
+    return cache.response_cache.stats()
+
+# État de la base et du pool de connexions
+@app.get("/health/db")
+async def health_db():
+    """
+    Ping de la base et état du pool : connexions empruntées / disponibles,
+    temps d'attente d'une connexion, taux d'erreurs de connexion
+    """
+    def ping():
+        start = time.perf_counter()
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return round((time.perf_counter() - start) * 1000, 3)
+
+    try:
+        status = {"status": "ok", "ping_ms": await run_in_threadpool(ping)}
+    except SQLAlchemyError as e:
+        status = {"status": "error", "error": str(e.__class__.__name__)}
+
+    engines = created_engines()
+    if "sync" in engines:
+        status["pool"] = pool_status(engines["sync"])
+    if "async" in engines:
+        status["async_pool"] = pool_status(engines["async"].sync_engine)
+    status["threadpool_size"] = config.THREADPOOL_SIZE
+    return status
+
+# Moteur /stats en mémoire
+@app.get("/health/stats-engine")
+def stats_engine_status():
+    """
+    Moteur des routes /stats (sql ou memory) ; en mémoire : version des
+    données chargée, lignes, mémoire occupée et durée du dernier chargement
+    """
+    status = {"engine": config.STATS_ENGINE}
+    if config.STATS_ENGINE == "memory":
+        from app import analytics
+        status.update(analytics.engine.status())
+    return status
+
+# Démarrage à froid
+@app.get("/health/startup")
+def startup_timings():
+    """
+    Délais depuis le lancement du processus : fin des imports (framework puis
+    application), fin du démarrage, premier octet servi, durée de chaque étape
+    du préchauffage et modules chargés à la demande déjà importés
+    """
+    return startup.timings.snapshot()
+
+# Métriques Prometheus
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def prometheus_metrics():
+    """
+    Latences et statuts par route, requêtes SQL par requête HTTP,
+    état du pool de connexions et du cache (format texte Prometheus)
+    """
+    # Moteurs pas encore crees (aucune requete SQL) : pas de serie
+    pools = [
+        (name, pool_status(engine.sync_engine if name == "async" else engine))
+        for name, engine in created_engines().items()
+    ]
+
+    def pool_samples(key):
+        return [(f'pool="{name}"', status[key]) for name, status in pools if key in status]
+
+    cache_stats = cache.response_cache.stats()
+    extra = [
+        ("medimap_db_pool_checked_out", "gauge", "Connexions empruntees", pool_samples("checked_out")),
+        ("medimap_db_pool_idle", "gauge", "Connexions disponibles", pool_samples("idle")),
+        ("medimap_db_pool_checkouts_total", "counter", "Connexions obtenues du pool", pool_samples("checkouts")),
+        ("medimap_db_pool_errors_total", "counter", "Erreurs de connexion", pool_samples("errors")),
+        ("medimap_cache_hits_total", "counter", "Reponses servies par le cache", [("", cache_stats["hits"])]),
+        ("medimap_cache_misses_total", "counter", "Reponses absentes du cache", [("", cache_stats["misses"])]),
+        ("medimap_cache_entries", "gauge", "Entrees du cache", [("", cache_stats["entries"])]),
+        ("medimap_startup_seconds", "gauge", "Delai depuis le lancement du processus",
+         [(f'phase="{phase}"', seconds) for phase, seconds in startup.timings.phases.items()]),
+    ]
+    return PlainTextResponse(metrics.render(extra), media_type="text/plain; version=0.0.4")
+
+# Fin des imports et de la construction de l'application
+startup.timings.mark("import")
@@ -0,0 +1,232 @@
+"""
+Metriques de l'API au format Prometheus (GET /metrics)
+
+- par route : histogramme des latences, nombre de reponses par statut,
+  requetes en cours
+- par route : nombre de requetes SQL et temps passe en base par requete HTTP
+  (hooks before/after_cursor_execute), ce qui fait apparaitre les routes
+  qui enchainent plusieurs requetes (N+1)
+- etat du pool de connexions et du cache de reponses
+
+Les compteurs sont tenus en memoire dans le processus : aucun collecteur
+externe n'est necessaire, /metrics peut etre lu directement ou scrape.
+"""
+
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from starlette.routing import Match
+
+# Bornes des histogrammes (secondes / nombre de requetes SQL)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    """Requetes SQL executees pendant la requete HTTP en cours"""
+
+    __slots__ = ("scope", "queries", "query_time")
+
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.queries = 0
+        self.query_time = 0.0
+
+
+# Requete HTTP en cours (propage aux threads des routes synchrones)
+_current = ContextVar("medimap_request_stats", default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum:.6f}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class Metrics:
+    """Registre des metriques HTTP et SQL (partage entre threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.latency = {}        # (methode, route) -> Histogram
+        self.responses = {}      # (methode, route, statut) -> nombre
+        self.query_count = {}    # (methode, route) -> Histogram
+        self.query_time = {}     # (methode, route) -> secondes
+        self.queries_total = 0
+        self.queries_outside_request = 0
+
+    def request_started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, method, route, status, duration, stats):
+        key = (method, route)
+        with self._lock:
+            self.in_flight -= 1
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(duration)
+            self.responses[key + (status,)] = self.responses.get(key + (status,), 0) + 1
+            self.query_count.setdefault(key, Histogram(QUERY_COUNT_BUCKETS)).observe(stats.queries)
+            self.query_time[key] = self.query_time.get(key, 0.0) + stats.query_time
+
+    def query_executed(self, duration):
+        stats = _current.get()
+        with self._lock:
+            self.queries_total += 1
+            if stats is None:
+                self.queries_outside_request += 1
+        if stats is not None:
+            stats.queries += 1
+            stats.query_time += duration
+
+    def render(self, extra=()):
+        """Exposition texte Prometheus (version 0.0.4)"""
+        def labels(method, route):
+            return f'method="{method}",route="{route}"'
+
+        lines = [
+            "# HELP medimap_http_requests_in_flight Requetes HTTP en cours",
+            "# TYPE medimap_http_requests_in_flight gauge",
+        ]
+        with self._lock:
+            lines.append(f"medimap_http_requests_in_flight {self.in_flight}")
+
+            lines += [
+                "# HELP medimap_http_request_duration_seconds Latence des requetes HTTP par route",
+                "# TYPE medimap_http_request_duration_seconds histogram",
+            ]
+            for (method, route), histogram in sorted(self.latency.items()):
+                lines += histogram.lines("medimap_http_request_duration_seconds", labels(method, route))
+
+            lines += [
+                "# HELP medimap_http_responses_total Reponses HTTP par route et statut",
+                "# TYPE medimap_http_responses_total counter",
+            ]
+            for (method, route, status), count in sorted(self.responses.items()):
+                lines.append(f'medimap_http_responses_total{{{labels(method, route)},status="{status}"}} {count}')
+
+            lines += [
+                "# HELP medimap_db_queries_per_request Requetes SQL par requete HTTP",
+                "# TYPE medimap_db_queries_per_request histogram",
+            ]
+            for (method, route), histogram in sorted(self.query_count.items()):
+                lines += histogram.lines("medimap_db_queries_per_request", labels(method, route))
+
+            lines += [
+                "# HELP medimap_db_query_seconds_total Temps passe en base par route",
+                "# TYPE medimap_db_query_seconds_total counter",
+            ]
+            for (method, route), seconds in sorted(self.query_time.items()):
+                lines.append(f"medimap_db_query_seconds_total{{{labels(method, route)}}} {seconds:.6f}")
+
+            lines += [
+                "# HELP medimap_db_queries_total Requetes SQL executees",
+                "# TYPE medimap_db_queries_total counter",
+                f"medimap_db_queries_total {self.queries_total}",
+                "# HELP medimap_db_queries_outside_request_total Requetes SQL hors requete HTTP (demarrage, index)",
+                "# TYPE medimap_db_queries_outside_request_total counter",
+                f"medimap_db_queries_outside_request_total {self.queries_outside_request}",
+            ]
+
+        for name, kind, help_, samples in extra:
+            lines += [f"# HELP {name} {help_}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{{{label}}} {value}" if label else f"{name} {value}" for label, value in samples]
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def instrument_queries(engine):
+    """Compte les requetes SQL et leur duree (moteur synchrone ou async_engine.sync_engine)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        metrics.query_executed(time.perf_counter() - conn.info["query_start"].pop())
+
+    return engine
+
+
+def _match_route(scope):
+    """Route de l'application correspondant a la requete (None : aucune, 404)"""
+    router = getattr(scope.get("app"), "router", None)
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route
+    return None
+
+
+def _route_template(scope):
+    """Chemin declare de la route (/stats/region/{code_region}), pas l'URL"""
+    route = scope.get("route")
+    if route is None:
+        # Reponse servie avant le routage (cache : HIT ou 304)
+        route = _match_route(scope)
+    return getattr(route, "path", None) or "unmatched"
+
+
+def current_route():
+    """Route de la requete HTTP en cours (None hors requete)"""
+    stats = _current.get()
+    if stats is None or stats.scope is None:
+        return None
+    return f'{stats.scope["method"]} {_route_template(stats.scope)}'
+
+
+class MetricsMiddleware:
+    """Middleware ASGI : latence, statut et requetes SQL de chaque requete HTTP"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        status = 500
+        start = time.perf_counter()
+        metrics.request_started()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.request_finished(
+                scope["method"], _route_template(scope), status, time.perf_counter() - start, stats
+            )
+            _current.reset(token)
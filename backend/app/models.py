@@ -2,7 +2,7 @@
 Modeles SQLAlchemy pour les tables de la base de donnees
 """
 
-from sqlalchemy import Column, Integer, String, BigInteger, Numeric, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Integer, String, BigInteger, Numeric, ForeignKey, TIMESTAMP, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -20,6 +20,10 @@ class Region(Base):
 
 class Medicament(Base):
     __tablename__ = "medicaments"
+    __table_args__ = (
+        # Pagination par curseur dans l'ordre alphabetique
+        Index("ix_medicaments_nom_id", "nom_medicament", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     code_cip = Column(String(20), unique=True, nullable=False)
@@ -50,4 +54,65 @@ class Consommation(Base):
     
     # Relations
     region = relationship("Region", back_populates="consommations")
-    medicament = relationship("Medicament", back_populates="consommations")
\ No newline at end of file
+    medicament = relationship("Medicament", back_populates="consommations")
+
+# ============================================================
+# ROLLUPS (reconstruits par etl/rollups.py)
+# ============================================================
+
+class StatsAnnee(Base):
+    __tablename__ = "stats_annee"
+    
+    annee = Column(Integer, primary_key=True)
+    total_boites = Column(BigInteger, nullable=False)
+    total_remb = Column(Numeric(15, 2), nullable=False)
+    nb_regions = Column(Integer, nullable=False)
+    nb_lignes = Column(Integer, nullable=False)
+    data_version = Column(Integer, nullable=True)  # version publiee avec ces rollups
+    refreshed_at = Column(TIMESTAMP, server_default=func.now())
+
+class StatsRegionAnnee(Base):
+    __tablename__ = "stats_region_annee"
+    
+    annee = Column(Integer, primary_key=True)
+    region_id = Column(Integer, ForeignKey("regions.id"), primary_key=True)
+    total_boites = Column(BigInteger, nullable=False)
+    total_remb = Column(Numeric(15, 2), nullable=False)
+    
+    # Relations
+    region = relationship("Region")
+
+class StatsMedicamentAnnee(Base):
+    __tablename__ = "stats_medicament_annee"
+    
+    annee = Column(Integer, primary_key=True)
+    medicament_id = Column(Integer, ForeignKey("medicaments.id"), primary_key=True)
+    total_boites = Column(BigInteger, nullable=False)
+    total_remb = Column(Numeric(15, 2), nullable=False)
+    
+    # Relations
+    medicament = relationship("Medicament")
+
+class StatsTopMedicament(Base):
+    """Classement des medicaments par (annee, region) ; region_id = 0 : France entiere"""
+    __tablename__ = "stats_top_medicaments"
+    
+    annee = Column(Integer, primary_key=True)
+    region_id = Column(Integer, primary_key=True)
+    critere = Column(String(6), primary_key=True)  # "boites" ou "remb"
+    rang = Column(Integer, primary_key=True)
+    medicament_id = Column(Integer, ForeignKey("medicaments.id"), nullable=False)
+    total_boites = Column(BigInteger, nullable=False)
+    total_remb = Column(Numeric(15, 2), nullable=False)
+    
+    # Relations
+    medicament = relationship("Medicament")
+
+
+class DataVersion(Base):
+    """Version des donnees, incrementee par l'ETL apres chaque chargement"""
+    __tablename__ = "data_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    updated_at = Column(TIMESTAMP, server_default=func.now())
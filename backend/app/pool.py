@@ -0,0 +1,135 @@
+"""
+Pool de connexions instrumente
+
+Options du pool lues dans app.config et compteurs exposes par /health/db :
+connexions empruntees / disponibles, temps d'attente d'une connexion,
+taux d'erreurs de connexion.
+"""
+
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from app import config
+
+
+class PoolMetrics:
+    """Compteurs d'acces au pool (partages entre threads)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.errors = 0
+        self.disconnects = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_checkout(self, wait, error=False):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            if error:
+                self.errors += 1
+
+    def record_disconnect(self):
+        with self._lock:
+            self.disconnects += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "errors": self.errors,
+                "disconnects": self.disconnects,
+                "error_rate": round(self.errors / self.checkouts, 4) if self.checkouts else 0.0,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+
+class _TimedCheckout:
+    """Mesure le temps passe a obtenir une connexion (attente + connexion)"""
+
+    metrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.metrics.record_checkout(time.perf_counter() - start, error=True)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    metrics = PoolMetrics()
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    metrics = PoolMetrics()
+
+
+def engine_options(url, is_async=False):
+    """Arguments de create_engine / create_async_engine selon la configuration"""
+    if url.startswith("sqlite") and (":memory:" in url or url.rstrip("/").endswith(":")):
+        # SQLite en memoire : pool par defaut (une seule connexion)
+        return {}
+
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+    }
+
+    if url.startswith("postgres") and config.DB_STATEMENT_TIMEOUT_MS:
+        if is_async:
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(config.DB_STATEMENT_TIMEOUT_MS)}
+            }
+        else:
+            options["connect_args"] = {
+                "options": f"-c statement_timeout={config.DB_STATEMENT_TIMEOUT_MS}"
+            }
+
+    return options
+
+
+def instrument(engine):
+    """Compte les deconnexions detectees (connexions mortes cote serveur)"""
+    pool = engine.pool
+    metrics = getattr(pool, "metrics", None)
+    if metrics is None:
+        return engine
+
+    @event.listens_for(engine, "handle_error")
+    def _count_disconnects(context):
+        if context.is_disconnect:
+            metrics.record_disconnect()
+
+    return engine
+
+
+def pool_status(engine):
+    """Etat du pool : taille, connexions empruntees / disponibles, compteurs"""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(metrics.snapshot())
+    return status
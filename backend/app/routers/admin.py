@@ -0,0 +1,33 @@
+"""
+Routes API d'administration (diagnostic)
+"""
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from typing import Optional
+import hmac
+from app import config
+from app.slow_queries import recorder
+
+def check_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """
+    L'en-tête X-Admin-Token doit fournir ADMIN_TOKEN.
+    ADMIN_TOKEN non défini : routes désactivées (SQL et paramètres bruts exposés sinon)
+    """
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Routes d'administration désactivées (ADMIN_TOKEN non défini)")
+    if not hmac.compare_digest(x_admin_token or "", config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Jeton d'administration invalide")
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Administration"],
+    dependencies=[Depends(check_admin_token)]
+)
+
+@router.get("/slow-queries")
+def get_slow_queries(limit: int = Query(50, ge=1, le=1000, description="Nombre d'entrées (plus récentes d'abord)")):
+    """
+    Requêtes SQL lentes récentes : SQL, paramètres, durée, route appelante,
+    plan d'exécution (échantillon) et tables parcourues sans index
+    """
+    return recorder.snapshot(limit)
@@ -0,0 +1,185 @@
+"""
+Routes API pour l'export en masse de la consommation
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from typing import Optional
+import csv
+import io
+import json
+from app import models
+from app.database import SessionLocal
+
+router = APIRouter(
+    prefix="/export",
+    tags=["Export"]
+)
+
+# Nombre de lignes lues par aller-retour sur le curseur serveur
+CHUNK_SIZE = 5000
+
+COLUMNS = [
+    "annee", "code_region", "nom_region", "code_cip",
+    "nom_medicament", "total_boites", "total_remb"
+]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def _export_query(annee, code_region, code_cip):
+    """Consommation jointe aux régions et médicaments, avec filtres"""
+    query = select(
+        models.Consommation.annee,
+        models.Region.code_region,
+        models.Region.nom_region,
+        models.Medicament.code_cip,
+        models.Medicament.nom_medicament,
+        models.Consommation.total_boites,
+        models.Consommation.total_remb
+    ).outerjoin(
+        models.Region, models.Region.id == models.Consommation.region_id
+    ).outerjoin(
+        models.Medicament, models.Medicament.id == models.Consommation.medicament_id
+    ).order_by(models.Consommation.id)
+
+    if annee is not None:
+        query = query.where(models.Consommation.annee == annee)
+    if code_region is not None:
+        query = query.where(models.Region.code_region == code_region)
+    if code_cip is not None:
+        query = query.where(models.Medicament.code_cip == code_cip)
+    return query
+
+def _iter_chunks(query):
+    """
+    Lit le résultat par paquets de CHUNK_SIZE lignes via un curseur serveur
+    (yield_per active stream_results) : la mémoire reste bornée.
+    La session est propre au flux car la réponse survit à la dépendance get_db.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(query, execution_options={"yield_per": CHUNK_SIZE})
+        for chunk in result.partitions():
+            yield chunk
+    finally:
+        db.close()
+
+def _stream_ndjson(query):
+    for chunk in _iter_chunks(query):
+        lines = []
+        for row in chunk:
+            record = dict(zip(COLUMNS, row))
+            record["total_remb"] = float(record["total_remb"])
+            lines.append(json.dumps(record, ensure_ascii=False))
+        yield ("\n".join(lines) + "\n").encode()
+
+def _stream_csv(query):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for chunk in _iter_chunks(query):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    # En-tête seul si aucune ligne
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+class _StreamSink:
+    """
+    Fichier en écriture seule pour ParquetWriter : conserve la position
+    absolue (utilisée par le pied de page Parquet) mais libère les octets
+    dès qu'ils sont envoyés au client.
+    """
+    closed = False
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _stream_parquet(query, pa, pq):
+    schema = pa.schema([
+        ("annee", pa.int32()),
+        ("code_region", pa.int32()),
+        ("nom_region", pa.string()),
+        ("code_cip", pa.string()),
+        ("nom_medicament", pa.string()),
+        ("total_boites", pa.int64()),
+        ("total_remb", pa.decimal128(15, 2)),
+    ])
+    sink = _StreamSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        # Un row group par paquet
+        for chunk in _iter_chunks(query):
+            columns = list(zip(*chunk))
+            writer.write_batch(pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+@router.get("/consommation")
+def export_consommation(
+    format: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$", description="ndjson, csv ou parquet"),
+    annee: Optional[int] = Query(None, description="Année"),
+    code_region: Optional[int] = Query(None, description="Code région"),
+    code_cip: Optional[str] = Query(None, description="Code CIP"),
+):
+    """
+    Export en flux de la consommation jointe aux régions et médicaments
+    (mémoire constante quel que soit le nombre de lignes)
+    """
+    query = _export_query(annee, code_region, code_cip)
+
+    if format == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Export Parquet indisponible (pyarrow non installé)")
+        content = _stream_parquet(query, pa, pq)
+    elif format == "csv":
+        content = _stream_csv(query)
+    else:
+        content = _stream_ndjson(query)
+
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="consommation.{format}"'}
+    )
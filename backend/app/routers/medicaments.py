@@ -2,51 +2,152 @@
 Routes API pour les medicaments
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from typing import List
-from app import models, schemas
+from sqlalchemy import select, tuple_
+from typing import List, Optional
+import base64
+import json
+from app import models, schemas, search, data_version, config, formats
 from app.database import get_db
+from app.serialization import FastJSONResponse, schema_columns, rows_response
 
 router = APIRouter(
     prefix="/medicaments",
     tags=["Médicaments"]
 )
 
+# Champs renvoyés par les routes de liste (ordre du schéma)
+MEDICAMENT_FIELDS = list(schemas.Medicament.model_fields)
+
+def _encode_cursor(order: str, medicament) -> str:
+    """Curseur opaque : position du dernier médicament renvoyé"""
+    position = {"o": order, "id": medicament.id}
+    if order == "nom":
+        position["nom"] = medicament.nom_medicament
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+def _decode_cursor(cursor: str, order: str) -> dict:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if position["o"] != order:
+            raise ValueError("ordre différent")
+        int(position["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Curseur invalide")
+    return position
+
+def _medicaments_select():
+    """Colonnes du schéma (FAST_SERIALIZATION) ou objets Medicament"""
+    if config.FAST_SERIALIZATION:
+        return select(*schema_columns(schemas.Medicament, models.Medicament))
+    return select(models.Medicament)
+
+def medicaments_rows(result):
+    return result.all() if config.FAST_SERIALIZATION else result.scalars().all()
+
+def medicaments_page_query(skip: int, limit: int, cursor: Optional[str], order: str):
+    """Page triée par id ou par nom, après le curseur (ou après `skip` lignes)"""
+    if order == "nom":
+        sort_key = (models.Medicament.nom_medicament, models.Medicament.id)
+    else:
+        sort_key = (models.Medicament.id,)
+    
+    query = _medicaments_select().order_by(*sort_key)
+    
+    if cursor:
+        position = _decode_cursor(cursor, order)
+        if order == "nom":
+            query = query.where(tuple_(*sort_key) > tuple_(position["nom"], position["id"]))
+        else:
+            query = query.where(models.Medicament.id > position["id"])
+    elif skip:
+        query = query.offset(skip)
+    
+    return query.limit(limit)
+
+def format_medicaments_page(request: Request, response: Response, format: Optional[str],
+                            medicaments, order: str, limit: int):
+    # Page pleine : il peut rester des médicaments après le dernier
+    if medicaments and len(medicaments) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(order, medicaments[-1])
+    return format_medicaments(request, format, medicaments, headers=dict(response.headers))
+
+def format_medicaments(request: Request, format: Optional[str], medicaments, headers=None):
+    columnar = formats.format_response(request, format, medicaments, MEDICAMENT_FIELDS, headers=headers)
+    if columnar:
+        return columnar
+    
+    if config.FAST_SERIALIZATION:
+        return rows_response(medicaments, headers=headers)
+    return medicaments
+
+def search_index(request: Request, q: str, limit: int, format: Optional[str]):
+    """Résultats de l'index de recherche ; None s'il n'est pas encore construit"""
+    index = search.get_index()
+    if index is None:
+        return None
+    resultats = index.search(q, limit)
+    columnar = formats.format_response(request, format, resultats, MEDICAMENT_FIELDS)
+    if columnar:
+        return columnar
+    return FastJSONResponse(resultats) if config.FAST_SERIALIZATION else resultats
+
+def search_ilike_query(q: str, limit: int):
+    """Recherche directe en base (index pas encore construit)"""
+    return _medicaments_select().where(models.Medicament.nom_medicament.ilike(f"%{q}%")).limit(limit)
+
+def medicament_or_404(medicament):
+    if not medicament:
+        raise HTTPException(status_code=404, detail="Médicament non trouvé")
+    return medicament
+
 @router.get("/", response_model=List[schemas.Medicament])
 def get_all_medicaments(
+    request: Request,
+    response: Response,
     skip: int = 0, 
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Curseur renvoyé dans l'en-tête X-Next-Cursor"),
+    order: str = Query("id", pattern="^(id|nom)$", description="Tri : id ou nom"),
+    format: Optional[str] = Query(None, pattern=formats.FORMAT_PATTERN, description=formats.FORMAT_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """
     Récupère tous les médicaments (paginés)
+    
+    Pagination par curseur (coût constant par page) : passer la valeur de
+    l'en-tête X-Next-Cursor de la page précédente dans `cursor`.
+    `skip` reste accepté pour compatibilité.
     """
-    medicaments = db.query(models.Medicament).offset(skip).limit(limit).all()
-    return medicaments
+    medicaments = medicaments_rows(db.execute(medicaments_page_query(skip, limit, cursor, order)))
+    return format_medicaments_page(request, response, format, medicaments, order, limit)
 
 @router.get("/search", response_model=List[schemas.Medicament])
 def search_medicaments(
+    request: Request,
     q: str = Query(..., min_length=3, description="Terme de recherche (min 3 caractères)"),
     limit: int = 20,
+    format: Optional[str] = Query(None, pattern=formats.FORMAT_PATTERN, description=formats.FORMAT_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """
-    Recherche de médicaments par nom
+    Recherche de médicaments par nom, classée par pertinence
+    (préfixe d'abord, puis similarité)
     """
-    medicaments = db.query(models.Medicament)\
-        .filter(models.Medicament.nom_medicament.ilike(f"%{q}%"))\
-        .limit(limit)\
-        .all()
-    return medicaments
+    # Déclenche la reconstruction de l'index si l'ETL a publié de nouvelles données
+    data_version.current_version()
+    
+    resultats = search_index(request, q, limit, format)
+    if resultats is not None:
+        return resultats
+    
+    medicaments = medicaments_rows(db.execute(search_ilike_query(q, limit)))
+    return format_medicaments(request, format, medicaments)
 
 @router.get("/{medicament_id}", response_model=schemas.Medicament)
 def get_medicament(medicament_id: int, db: Session = Depends(get_db)):
     """
     Récupère un médicament par son ID
     """
-    medicament = db.query(models.Medicament).filter(models.Medicament.id == medicament_id).first()
-    if not medicament:
-        raise HTTPException(status_code=404, detail="Médicament non trouvé")
-    return medicament
\ No newline at end of file
+    return medicament_or_404(db.get(models.Medicament, medicament_id))
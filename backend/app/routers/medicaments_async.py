@@ -0,0 +1,69 @@
+"""
+Routes API pour les medicaments (version asynchrone, DB_MODE=async)
+"""
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app import models, schemas, data_version, formats
+from app.database import get_async_db
+from app.routers.medicaments import (
+    medicaments_rows, medicaments_page_query, format_medicaments_page, format_medicaments,
+    search_index, search_ilike_query, medicament_or_404
+)
+
+router = APIRouter(
+    prefix="/medicaments",
+    tags=["Médicaments"]
+)
+
+@router.get("/", response_model=List[schemas.Medicament])
+async def get_all_medicaments(
+    request: Request,
+    response: Response,
+    skip: int = 0, 
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Curseur renvoyé dans l'en-tête X-Next-Cursor"),
+    order: str = Query("id", pattern="^(id|nom)$", description="Tri : id ou nom"),
+    format: Optional[str] = Query(None, pattern=formats.FORMAT_PATTERN, description=formats.FORMAT_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Récupère tous les médicaments (paginés)
+    
+    Pagination par curseur (coût constant par page) : passer la valeur de
+    l'en-tête X-Next-Cursor de la page précédente dans `cursor`.
+    `skip` reste accepté pour compatibilité.
+    """
+    medicaments = medicaments_rows(await db.execute(medicaments_page_query(skip, limit, cursor, order)))
+    return format_medicaments_page(request, response, format, medicaments, order, limit)
+
+@router.get("/search", response_model=List[schemas.Medicament])
+async def search_medicaments(
+    request: Request,
+    q: str = Query(..., min_length=3, description="Terme de recherche (min 3 caractères)"),
+    limit: int = 20,
+    format: Optional[str] = Query(None, pattern=formats.FORMAT_PATTERN, description=formats.FORMAT_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Recherche de médicaments par nom, classée par pertinence
+    (préfixe d'abord, puis similarité)
+    """
+    # Déclenche la reconstruction de l'index si l'ETL a publié de nouvelles données
+    await run_in_threadpool(data_version.current_version)
+    
+    resultats = search_index(request, q, limit, format)
+    if resultats is not None:
+        return resultats
+    
+    medicaments = medicaments_rows(await db.execute(search_ilike_query(q, limit)))
+    return format_medicaments(request, format, medicaments)
+
+@router.get("/{medicament_id}", response_model=schemas.Medicament)
+async def get_medicament(medicament_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Récupère un médicament par son ID
+    """
+    return medicament_or_404(await db.get(models.Medicament, medicament_id))
@@ -3,40 +3,54 @@ Routes API pour les regions
 """
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List
-from app import models, schemas
+from app import models, schemas, config
 from app.database import get_db
+from app.serialization import schema_columns, rows_response
 
 router = APIRouter(
     prefix="/regions",
     tags=["Régions"]
 )
 
+def regions_query():
+    """Toutes les régions : colonnes du schéma (FAST_SERIALIZATION) ou objets Region"""
+    if config.FAST_SERIALIZATION:
+        return select(*schema_columns(schemas.Region, models.Region))
+    return select(models.Region)
+
+def format_regions(result):
+    if config.FAST_SERIALIZATION:
+        return rows_response(result)
+    return result.scalars().all()
+
+def region_by_code_query(code_region: int):
+    return select(models.Region).where(models.Region.code_region == code_region)
+
+def region_or_404(region):
+    if not region:
+        raise HTTPException(status_code=404, detail="Région non trouvée")
+    return region
+
 @router.get("/", response_model=List[schemas.Region])
 def get_all_regions(db: Session = Depends(get_db)):
     """
     Récupère toutes les régions
     """
-    regions = db.query(models.Region).all()
-    return regions
+    return format_regions(db.execute(regions_query()))
 
 @router.get("/{region_id}", response_model=schemas.Region)
 def get_region(region_id: int, db: Session = Depends(get_db)):
     """
     Récupère une région par son ID
     """
-    region = db.query(models.Region).filter(models.Region.id == region_id).first()
-    if not region:
-        raise HTTPException(status_code=404, detail="Région non trouvée")
-    return region
+    return region_or_404(db.get(models.Region, region_id))
 
 @router.get("/code/{code_region}", response_model=schemas.Region)
 def get_region_by_code(code_region: int, db: Session = Depends(get_db)):
     """
     Récupère une région par son code (ex: 11 pour Île-de-France)
     """
-    region = db.query(models.Region).filter(models.Region.code_region == code_region).first()
-    if not region:
-        raise HTTPException(status_code=404, detail="Région non trouvée")
-    return region
\ No newline at end of file
+    return region_or_404(db.scalar(region_by_code_query(code_region)))
@@ -0,0 +1,36 @@
+"""
+Routes API pour les regions (version asynchrone, DB_MODE=async)
+"""
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from app import models, schemas
+from app.database import get_async_db
+from app.routers.regions import regions_query, format_regions, region_by_code_query, region_or_404
+
+router = APIRouter(
+    prefix="/regions",
+    tags=["Régions"]
+)
+
+@router.get("/", response_model=List[schemas.Region])
+async def get_all_regions(db: AsyncSession = Depends(get_async_db)):
+    """
+    Récupère toutes les régions
+    """
+    return format_regions(await db.execute(regions_query()))
+
+@router.get("/{region_id}", response_model=schemas.Region)
+async def get_region(region_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Récupère une région par son ID
+    """
+    return region_or_404(await db.get(models.Region, region_id))
+
+@router.get("/code/{code_region}", response_model=schemas.Region)
+async def get_region_by_code(code_region: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Récupère une région par son code (ex: 11 pour Île-de-France)
+    """
+    return region_or_404(await db.scalar(region_by_code_query(code_region)))
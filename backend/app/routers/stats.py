@@ -2,41 +2,123 @@
 Routes API pour les statistiques
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from typing import List
-from app import models, schemas
+from sqlalchemy import func, desc, select
+from sqlalchemy.exc import SQLAlchemyError
+from typing import List, Optional
+from app import config, data_version, models, schemas, formats
 from app.database import get_db
-from decimal import Decimal
 
 router = APIRouter(
     prefix="/stats",
     tags=["Statistiques"]
 )
 
+def _snapshot():
+    """
+    Instantané du moteur en mémoire (STATS_ENGINE=memory) s'il est à jour.
+    None sinon : la route interroge la base (rollups ou agrégation directe).
+    """
+    if config.STATS_ENGINE != "memory":
+        return None
+    # NumPy et le moteur importés à la première utilisation (démarrage à froid)
+    from app import analytics
+    return analytics.get_snapshot()
+
+def _rollup_a_jour(rollup):
+    """
+    True si le rollup a été publié avec la version courante des données.
+    L'ETL y enregistre la version qu'il publie ensuite : toute modification
+    passée par l'ETL (ajout, mise à jour, suppression) change cette version.
+    """
+    return rollup.data_version is not None and rollup.data_version == data_version.current_version()
+
+def rollup_query(annee: Optional[int] = None):
+    """Ligne stats_annee de l'année (une ligne quelconque si annee est None)"""
+    query = select(models.StatsAnnee)
+    if annee is not None:
+        query = query.where(models.StatsAnnee.annee == annee)
+    return query.limit(1)
+
+def _get_rollup(db: Session, annee: int):
+    """
+    Retourne la ligne stats_annee si le rollup de l'année existe et est à jour.
+    Renvoie None sinon : les routes retombent alors sur l'agrégation directe.
+    """
+    try:
+        rollup = db.scalar(rollup_query(annee))
+    except SQLAlchemyError:
+        # Tables de rollup absentes (ETL jamais relancé)
+        db.rollback()
+        return None
+    
+    if not rollup or not _rollup_a_jour(rollup):
+        return None
+    
+    return rollup
+
+def _rollups_a_jour(db: Session):
+    """True si les rollups (toutes années) correspondent à la version courante des données"""
+    try:
+        rollup = db.scalar(rollup_query())
+    except SQLAlchemyError:
+        db.rollback()
+        return False
+    # Un seul marqueur pour toutes les années (reconstruites dans une même transaction)
+    return rollup is not None and _rollup_a_jour(rollup)
+
 @router.get("/regions", response_model=List[schemas.RegionStats])
 def get_regions_stats(
+    request: Request,
     annee: int = Query(2023, description="Année"),
+    format: Optional[str] = Query(None, pattern=formats.FORMAT_PATTERN, description=formats.FORMAT_DESCRIPTION),
     db: Session = Depends(get_db)
 ):
     """
     Statistiques par région pour une année donnée
     """
-    stats = db.query(
+    snapshot = _snapshot()
+    if snapshot:
+        stats = snapshot.regions_stats(annee)
+    else:
+        stats = db.execute(regions_stats_query(annee, _get_rollup(db, annee) is not None)).all()
+    return format_regions_stats(request, format, stats)
+
+def regions_stats_query(annee: int, use_rollup: bool):
+    """Totaux par région, du rollup de l'année ou agrégés sur la table consommation"""
+    if use_rollup:
+        return select(
+            models.Region.code_region,
+            models.Region.nom_region,
+            models.StatsRegionAnnee.total_boites,
+            models.StatsRegionAnnee.total_remb
+        ).join(
+            models.StatsRegionAnnee, models.Region.id == models.StatsRegionAnnee.region_id
+        ).where(
+            models.StatsRegionAnnee.annee == annee
+        ).order_by(
+            desc(models.StatsRegionAnnee.total_remb)
+        )
+    return select(
         models.Region.code_region,
         models.Region.nom_region,
         func.sum(models.Consommation.total_boites).label('total_boites'),
         func.sum(models.Consommation.total_remb).label('total_remb')
     ).join(
         models.Consommation, models.Region.id == models.Consommation.region_id
-    ).filter(
+    ).where(
         models.Consommation.annee == annee
     ).group_by(
         models.Region.code_region, models.Region.nom_region
     ).order_by(
         desc('total_remb')
-    ).all()
+    )
+
+def format_regions_stats(request: Request, format: Optional[str], stats):
+    columnar = formats.format_response(request, format, stats, schemas.RegionStats.model_fields)
+    if columnar:
+        return columnar
     
     return [
         {
@@ -48,29 +130,271 @@ def get_regions_stats(
         for s in stats
     ]
 
+def _region_totals(annee: int, use_rollup: bool):
+    """Sous-requête (region_id, total_boites, total_remb) pour l'année"""
+    if use_rollup:
+        return select(
+            models.StatsRegionAnnee.region_id,
+            models.StatsRegionAnnee.total_boites,
+            models.StatsRegionAnnee.total_remb
+        ).where(
+            models.StatsRegionAnnee.annee == annee
+        ).subquery()
+    return select(
+        models.Consommation.region_id,
+        func.sum(models.Consommation.total_boites).label('total_boites'),
+        func.sum(models.Consommation.total_remb).label('total_remb')
+    ).where(
+        models.Consommation.annee == annee,
+        models.Consommation.region_id.isnot(None)
+    ).group_by(
+        models.Consommation.region_id
+    ).subquery()
+
+def region_stats_enrichies_query(code_region: int, annee: int, use_rollup: bool):
+    """
+    Une seule requête : totaux de la région, rang, moyenne et total nationaux,
+    part et écart à la moyenne (fonctions de fenêtre sur toutes les régions)
+    """
+    totals = _region_totals(annee, use_rollup)
+    ranked = select(
+        models.Region.code_region,
+        models.Region.nom_region,
+        totals.c.total_boites,
+        totals.c.total_remb,
+        func.rank().over(order_by=desc(totals.c.total_remb)).label('rang'),
+        func.count().over().label('nb_regions'),
+        func.avg(totals.c.total_remb).over().label('moyenne_nationale'),
+        func.sum(totals.c.total_remb).over().label('total_national')
+    ).join(
+        totals, totals.c.region_id == models.Region.id
+    ).subquery()
+    return select(
+        ranked,
+        # NULL (et non une division par zéro) si le total national est nul
+        (ranked.c.total_remb * 100 / func.nullif(ranked.c.total_national, 0)).label('part_pct'),
+        (ranked.c.total_remb - ranked.c.moyenne_nationale).label('ecart'),
+        ((ranked.c.total_remb - ranked.c.moyenne_nationale) * 100
+         / func.nullif(ranked.c.moyenne_nationale, 0)).label('ecart_pct')
+    ).where(
+        ranked.c.code_region == code_region
+    )
+
+def _arrondi(value):
+    """Montant ou pourcentage arrondi au centime ; None si non défini (total nul)"""
+    return None if value is None else round(float(value), 2)
+
+def format_region_stats_enrichies(row, annee: int):
+    """part_pct et ecart_pct valent None quand le total national est nul"""
+    return {
+        "code_region": row.code_region,
+        "nom_region": row.nom_region,
+        "annee": annee,
+        "total_boites": int(row.total_boites or 0),
+        "total_remb": float(row.total_remb or 0),
+        "rang": int(row.rang),
+        "nb_regions": int(row.nb_regions),
+        "moyenne_nationale": _arrondi(row.moyenne_nationale or 0),
+        "total_national": _arrondi(row.total_national or 0),
+        "part_pct": _arrondi(row.part_pct),
+        "ecart": _arrondi(row.ecart or 0),
+        "ecart_pct": _arrondi(row.ecart_pct)
+    }
+
 @router.get("/region/{code_region}")
-def get_region_stats(code_region: int, annee: int = 2023, db: Session = Depends(get_db)):
+def get_region_stats(
+    code_region: int,
+    annee: int = 2023,
+    enrichi: bool = Query(False, description="Ajouter rang, moyenne et total nationaux, part et écart"),
+    db: Session = Depends(get_db)
+):
     """
     Statistiques détaillées d'une région
     """
-    region = db.query(models.Region).filter(models.Region.code_region == code_region).first()
+    snapshot = _snapshot()
+    if snapshot:
+        return _get_region_stats_memory(snapshot, code_region, annee, enrichi)
+    
+    if enrichi:
+        row = db.execute(
+            region_stats_enrichies_query(code_region, annee, _get_rollup(db, annee) is not None)
+        ).first()
+        if row:
+            return format_region_stats_enrichies(row, annee)
+        # Région inconnue ou sans données cette année : réponse simple
+    
+    region = db.scalar(region_query(code_region))
     if not region:
         return {"error": "Région non trouvée"}
     
-    stats = db.query(
+    stats = db.execute(region_totals_query(region.id, annee, _get_rollup(db, annee) is not None)).first()
+    return format_region_stats(region, stats, annee)
+
+def region_query(code_region: int):
+    return select(models.Region).where(models.Region.code_region == code_region)
+
+def region_totals_query(region_id: int, annee: int, use_rollup: bool):
+    """Totaux de la région pour l'année, du rollup ou agrégés sur la table consommation"""
+    if use_rollup:
+        return select(
+            models.StatsRegionAnnee.total_boites,
+            models.StatsRegionAnnee.total_remb
+        ).where(
+            models.StatsRegionAnnee.region_id == region_id,
+            models.StatsRegionAnnee.annee == annee
+        )
+    return select(
         func.sum(models.Consommation.total_boites).label('total_boites'),
         func.sum(models.Consommation.total_remb).label('total_remb')
-    ).filter(
-        models.Consommation.region_id == region.id,
+    ).where(
+        models.Consommation.region_id == region_id,
         models.Consommation.annee == annee
-    ).first()
+    )
+
+def format_region_stats(region, stats, annee: int):
+    # Pas de ligne de rollup : aucune consommation cette année
+    total_boites = stats.total_boites if stats else 0
+    total_remb = stats.total_remb if stats else 0
     
     return {
         "code_region": region.code_region,
         "nom_region": region.nom_region,
         "annee": annee,
-        "total_boites": int(stats.total_boites or 0),
-        "total_remb": float(stats.total_remb or 0)
+        "total_boites": int(total_boites or 0),
+        "total_remb": float(total_remb or 0)
+    }
+
+def _get_region_stats_memory(snapshot, code_region: int, annee: int, enrichi: bool):
+    """Même réponse que get_region_stats, calculée par le moteur en mémoire"""
+    if enrichi:
+        row = snapshot.region_stats_enrichies(code_region, annee)
+        if row:
+            return format_region_stats_enrichies(row, annee)
+    
+    stats = snapshot.region_stats(code_region, annee)
+    if not stats:
+        return {"error": "Région non trouvée"}
+    return {
+        "code_region": stats.code_region,
+        "nom_region": stats.nom_region,
+        "annee": annee,
+        "total_boites": int(stats.total_boites),
+        "total_remb": float(stats.total_remb)
+    }
+
+# Métriques disponibles pour /stats/batch
+BATCH_METRICS = ["total_boites", "total_remb"]
+
+def stats_batch_query(codes_region: List[int], annees: List[int], use_rollup: bool):
+    """Une requête groupée par (région, année) pour toutes les combinaisons demandées"""
+    if use_rollup:
+        source = models.StatsRegionAnnee
+        total_boites = source.total_boites
+        total_remb = source.total_remb
+    else:
+        source = models.Consommation
+        total_boites = func.sum(source.total_boites)
+        total_remb = func.sum(source.total_remb)
+    
+    query = select(
+        models.Region.code_region,
+        models.Region.nom_region,
+        source.annee,
+        total_boites.label('total_boites'),
+        total_remb.label('total_remb')
+    ).join(
+        source, source.region_id == models.Region.id
+    ).where(
+        source.annee.in_(annees)
+    ).order_by(
+        models.Region.code_region, source.annee
+    )
+    if codes_region:
+        query = query.where(models.Region.code_region.in_(codes_region))
+    if not use_rollup:
+        query = query.group_by(models.Region.code_region, models.Region.nom_region, source.annee)
+    return query
+
+def format_columns(rows, metrics: List[str]):
+    """Résultat en colonnes : {colonne: [valeurs]} (DataFrame direct côté client)"""
+    columns = {"code_region": [], "nom_region": [], "annee": []}
+    columns.update({metric: [] for metric in metrics})
+    for row in rows:
+        columns["code_region"].append(row.code_region)
+        columns["nom_region"].append(row.nom_region)
+        columns["annee"].append(row.annee)
+        if "total_boites" in columns:
+            columns["total_boites"].append(int(row.total_boites or 0))
+        if "total_remb" in columns:
+            columns["total_remb"].append(float(row.total_remb or 0))
+    return columns
+
+def check_metrics(metrics: List[str]):
+    inconnues = [m for m in metrics if m not in BATCH_METRICS]
+    if inconnues:
+        raise HTTPException(status_code=400, detail=f"Métriques inconnues: {', '.join(inconnues)}")
+
+@router.get("/batch")
+def get_stats_batch(
+    code_region: List[int] = Query([], description="Codes région (toutes si vide)"),
+    annee: List[int] = Query([2023], description="Années"),
+    metrics: List[str] = Query(BATCH_METRICS, description="total_boites, total_remb"),
+    db: Session = Depends(get_db)
+):
+    """
+    Statistiques de plusieurs régions et années en une seule requête,
+    au format colonnes : {"code_region": [...], "annee": [...], "total_remb": [...]}
+    """
+    check_metrics(metrics)
+    snapshot = _snapshot()
+    if snapshot:
+        return format_columns(snapshot.stats_batch(code_region, annee), metrics)
+    use_rollup = all(_get_rollup(db, a) is not None for a in set(annee))
+    rows = db.execute(stats_batch_query(code_region, annee, use_rollup)).all()
+    return format_columns(rows, metrics)
+
+@router.get("/timeseries")
+def get_timeseries(
+    code_region: Optional[int] = Query(None, description="Code région (nation si absent)"),
+    code_cip: Optional[str] = Query(None, description="Code CIP d'un médicament"),
+    annee_debut: Optional[int] = Query(None, description="Première année"),
+    annee_fin: Optional[int] = Query(None, description="Dernière année"),
+    fenetre: int = Query(3, ge=1, le=10, description="Fenêtre des moyennes mobiles (années)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Série annuelle (boîtes, remboursements) pour la nation, une région ou un
+    médicament, avec croissance annuelle, TCAM et moyennes mobiles
+    """
+    check_timeseries_params(code_region, code_cip)
+    snapshot = _snapshot()
+    if snapshot:
+        rows = snapshot.timeseries(code_region, code_cip, annee_debut, annee_fin)
+    else:
+        rows = db.execute(timeseries_query(code_region, code_cip, annee_debut, annee_fin, _rollups_a_jour(db))).all()
+    return format_timeseries(rows, code_region, code_cip, fenetre)
+
+def check_timeseries_params(code_region: Optional[int], code_cip: Optional[str]):
+    if code_region is not None and code_cip is not None:
+        raise HTTPException(status_code=400, detail="Choisir code_region ou code_cip, pas les deux")
+
+def _timeseries():
+    # NumPy importe a la premiere serie demandee (demarrage a froid)
+    from app import timeseries
+    return timeseries
+
+def timeseries_query(code_region: Optional[int], code_cip: Optional[str],
+                     annee_debut: Optional[int], annee_fin: Optional[int], use_rollup: bool):
+    return _timeseries().timeseries_query(code_region, code_cip, annee_debut, annee_fin, use_rollup)
+
+def format_timeseries(rows, code_region: Optional[int], code_cip: Optional[str], fenetre: int):
+    serie, tcam = _timeseries().compute_timeseries(rows, fenetre)
+    return {
+        "code_region": code_region,
+        "code_cip": code_cip,
+        "fenetre": fenetre,
+        "tcam_pct": tcam,
+        **serie
     }
 
 @router.get("/overview")
@@ -78,20 +402,150 @@ def get_overview(annee: int = 2023, db: Session = Depends(get_db)):
     """
     Vue d'ensemble des statistiques nationales
     """
-    total = db.query(
+    snapshot = _snapshot()
+    if snapshot:
+        total = snapshot.overview(annee)
+        nb_medicaments = snapshot.nb_medicaments
+    else:
+        total = _get_rollup(db, annee) or db.execute(overview_live_query(annee)).first()
+        nb_medicaments = db.scalar(nb_medicaments_query())
+    return format_overview(total, nb_medicaments, annee)
+
+def overview_live_query(annee: int):
+    """Totaux nationaux de l'année agrégés sur la table consommation"""
+    # La ligne stats_annee (rollup) porte déjà total_boites, total_remb et nb_regions
+    return select(
         func.sum(models.Consommation.total_boites).label('total_boites'),
         func.sum(models.Consommation.total_remb).label('total_remb'),
         func.count(func.distinct(models.Consommation.region_id)).label('nb_regions')
-    ).filter(
+    ).where(
         models.Consommation.annee == annee
-    ).first()
-    
-    nb_medicaments = db.query(func.count(models.Medicament.id)).scalar()
-    
+    )
+
+def nb_medicaments_query():
+    return select(func.count(models.Medicament.id))
+
+def format_overview(total, nb_medicaments: int, annee: int):
     return {
         "annee": annee,
         "total_boites": int(total.total_boites or 0),
         "total_remb": float(total.total_remb or 0),
         "nb_regions": int(total.nb_regions or 0),
         "nb_medicaments": nb_medicaments
-    }
\ No newline at end of file
+    }
+
+# Rangs conservés par l'ETL dans stats_top_medicaments (TOP_MEDICAMENTS_RANG_MAX)
+TOP_MEDICAMENTS_MAX = 100
+TOP_CRITERES = {"boites": "total_boites", "remb": "total_remb"}
+
+def top_medicaments_ranking_query(annee: int, region_id: int, by: str, n: int):
+    """Classement précalculé par l'ETL (region_id = 0 : France entière)"""
+    top = models.StatsTopMedicament
+    return select(
+        models.Medicament.code_cip,
+        models.Medicament.nom_medicament,
+        top.total_boites,
+        top.total_remb
+    ).join(
+        models.Medicament, models.Medicament.id == top.medicament_id
+    ).where(
+        top.annee == annee,
+        top.region_id == region_id,
+        top.critere == by,
+        top.rang <= n
+    ).order_by(top.rang)
+
+def top_medicaments_live_query(annee: int, region_id: int, by: str, n: int):
+    """
+    Agrégation directe, n premiers seulement : ORDER BY ... LIMIT n est exécuté
+    en tri partiel (top-N heapsort de PostgreSQL, n lignes gardées en mémoire)
+    """
+    totals = select(
+        models.Consommation.medicament_id,
+        func.sum(models.Consommation.total_boites).label('total_boites'),
+        func.sum(models.Consommation.total_remb).label('total_remb')
+    ).where(
+        models.Consommation.annee == annee,
+        models.Consommation.medicament_id.isnot(None)
+    ).group_by(
+        models.Consommation.medicament_id
+    )
+    if region_id:
+        totals = totals.where(models.Consommation.region_id == region_id)
+    # Égalités départagées par id, comme le classement de l'ETL
+    totals = totals.order_by(
+        desc(TOP_CRITERES[by]), models.Consommation.medicament_id
+    ).limit(n).subquery()
+    
+    return select(
+        models.Medicament.code_cip,
+        models.Medicament.nom_medicament,
+        totals.c.total_boites,
+        totals.c.total_remb
+    ).join(
+        totals, totals.c.medicament_id == models.Medicament.id
+    ).order_by(
+        desc(totals.c[TOP_CRITERES[by]]), models.Medicament.id
+    )
+
+def region_id_query(code_region: int):
+    return select(models.Region.id).where(models.Region.code_region == code_region)
+
+def check_region_found(found: bool):
+    if not found:
+        raise HTTPException(status_code=404, detail="Région non trouvée")
+
+def format_top_medicaments(request: Request, format: Optional[str], top):
+    columnar = formats.format_response(request, format, top, schemas.MedicamentTop.model_fields)
+    if columnar:
+        return columnar
+    
+    return [
+        {
+            "code_cip": t.code_cip,
+            "nom_medicament": t.nom_medicament,
+            "total_boites": t.total_boites,
+            "total_remb": t.total_remb
+        }
+        for t in top
+    ]
+
+@router.get("/medicaments/top", response_model=List[schemas.MedicamentTop])
+def get_top_medicaments(
+    request: Request,
+    annee: int = Query(2023, description="Année"),
+    code_region: Optional[int] = Query(None, description="Code région (France entière si absent)"),
+    n: int = Query(10, ge=1, le=TOP_MEDICAMENTS_MAX, description="Nombre de médicaments"),
+    by: str = Query("remb", pattern="^(boites|remb)$", description="Classement par boîtes ou par remboursement"),
+    format: Optional[str] = Query(None, pattern=formats.FORMAT_PATTERN, description=formats.FORMAT_DESCRIPTION),
+    db: Session = Depends(get_db)
+):
+    """
+    Médicaments les plus consommés (boîtes) ou les plus remboursés d'une année,
+    pour la France entière ou une région
+    """
+    snapshot = _snapshot()
+    if snapshot:
+        check_region_found(code_region is None or code_region in snapshot.region_by_code)
+        top = snapshot.top_medicaments(annee, code_region, n, by)
+    else:
+        region_id = 0
+        if code_region is not None:
+            region_id = db.scalar(region_id_query(code_region))
+            check_region_found(region_id is not None)
+        top = _get_top_medicaments_sql(db, annee, region_id, by, n)
+    return format_top_medicaments(request, format, top)
+
+def _get_top_medicaments_sql(db: Session, annee: int, region_id: int, by: str, n: int):
+    """Classement de l'ETL si les rollups de l'année sont à jour, sinon top-N en direct"""
+    if _get_rollup(db, annee):
+        try:
+            top = db.execute(top_medicaments_ranking_query(annee, region_id, by, n)).all()
+        except SQLAlchemyError:
+            # Rollups construits avant l'ajout de stats_top_medicaments
+            db.rollback()
+            top = []
+        # Classement vide : région sans données cette année, ou table pas encore remplie
+        if top:
+            return top
+    return db.execute(top_medicaments_live_query(annee, region_id, by, n)).all()
@@ -0,0 +1,203 @@
+"""
+Routes API pour les statistiques (version asynchrone, DB_MODE=async)
+
+Requêtes et mise en forme des réponses : app.routers.stats
+"""
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app import schemas, formats
+from app.database import get_async_db
+from app.routers.stats import (
+    _snapshot, _rollup_a_jour, rollup_query,
+    regions_stats_query, format_regions_stats,
+    region_query, region_totals_query, format_region_stats, _get_region_stats_memory,
+    region_stats_enrichies_query, format_region_stats_enrichies,
+    BATCH_METRICS, stats_batch_query, format_columns, check_metrics,
+    check_timeseries_params, timeseries_query, format_timeseries,
+    overview_live_query, nb_medicaments_query, format_overview,
+    TOP_MEDICAMENTS_MAX, top_medicaments_ranking_query, top_medicaments_live_query,
+    region_id_query, check_region_found, format_top_medicaments
+)
+
+router = APIRouter(
+    prefix="/stats",
+    tags=["Statistiques"]
+)
+
+async def _get_rollup(db: AsyncSession, annee: int):
+    """
+    Retourne la ligne stats_annee si le rollup de l'année existe et est à jour.
+    Renvoie None sinon : les routes retombent alors sur l'agrégation directe.
+    """
+    try:
+        rollup = await db.scalar(rollup_query(annee))
+    except SQLAlchemyError:
+        # Tables de rollup absentes (ETL jamais relancé)
+        await db.rollback()
+        return None
+
+    if not rollup or not await run_in_threadpool(_rollup_a_jour, rollup):
+        return None
+
+    return rollup
+
+async def _rollups_a_jour(db: AsyncSession):
+    """True si les rollups (toutes années) correspondent à la version courante des données"""
+    try:
+        rollup = await db.scalar(rollup_query())
+    except SQLAlchemyError:
+        await db.rollback()
+        return False
+    return rollup is not None and await run_in_threadpool(_rollup_a_jour, rollup)
+
+@router.get("/regions", response_model=List[schemas.RegionStats])
+async def get_regions_stats(
+    request: Request,
+    annee: int = Query(2023, description="Année"),
+    format: Optional[str] = Query(None, pattern=formats.FORMAT_PATTERN, description=formats.FORMAT_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Statistiques par région pour une année donnée
+    """
+    # Lecture de la version des données (et premier import du moteur) hors de la boucle
+    snapshot = await run_in_threadpool(_snapshot)
+    if snapshot:
+        stats = snapshot.regions_stats(annee)
+    else:
+        use_rollup = await _get_rollup(db, annee) is not None
+        stats = (await db.execute(regions_stats_query(annee, use_rollup))).all()
+    return format_regions_stats(request, format, stats)
+
+@router.get("/region/{code_region}")
+async def get_region_stats(
+    code_region: int,
+    annee: int = 2023,
+    enrichi: bool = Query(False, description="Ajouter rang, moyenne et total nationaux, part et écart"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Statistiques détaillées d'une région
+    """
+    snapshot = await run_in_threadpool(_snapshot)
+    if snapshot:
+        return _get_region_stats_memory(snapshot, code_region, annee, enrichi)
+
+    if enrichi:
+        use_rollup = await _get_rollup(db, annee) is not None
+        row = (await db.execute(region_stats_enrichies_query(code_region, annee, use_rollup))).first()
+        if row:
+            return format_region_stats_enrichies(row, annee)
+        # Région inconnue ou sans données cette année : réponse simple
+
+    region = await db.scalar(region_query(code_region))
+    if not region:
+        return {"error": "Région non trouvée"}
+
+    use_rollup = await _get_rollup(db, annee) is not None
+    stats = (await db.execute(region_totals_query(region.id, annee, use_rollup))).first()
+    return format_region_stats(region, stats, annee)
+
+@router.get("/batch")
+async def get_stats_batch(
+    code_region: List[int] = Query([], description="Codes région (toutes si vide)"),
+    annee: List[int] = Query([2023], description="Années"),
+    metrics: List[str] = Query(BATCH_METRICS, description="total_boites, total_remb"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Statistiques de plusieurs régions et années en une seule requête,
+    au format colonnes : {"code_region": [...], "annee": [...], "total_remb": [...]}
+    """
+    check_metrics(metrics)
+    snapshot = await run_in_threadpool(_snapshot)
+    if snapshot:
+        return format_columns(snapshot.stats_batch(code_region, annee), metrics)
+    use_rollup = True
+    for a in set(annee):
+        if await _get_rollup(db, a) is None:
+            use_rollup = False
+            break
+    rows = (await db.execute(stats_batch_query(code_region, annee, use_rollup))).all()
+    return format_columns(rows, metrics)
+
+@router.get("/timeseries")
+async def get_timeseries(
+    code_region: Optional[int] = Query(None, description="Code région (nation si absent)"),
+    code_cip: Optional[str] = Query(None, description="Code CIP d'un médicament"),
+    annee_debut: Optional[int] = Query(None, description="Première année"),
+    annee_fin: Optional[int] = Query(None, description="Dernière année"),
+    fenetre: int = Query(3, ge=1, le=10, description="Fenêtre des moyennes mobiles (années)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Série annuelle (boîtes, remboursements) pour la nation, une région ou un
+    médicament, avec croissance annuelle, TCAM et moyennes mobiles
+    """
+    check_timeseries_params(code_region, code_cip)
+    snapshot = await run_in_threadpool(_snapshot)
+    if snapshot:
+        rows = snapshot.timeseries(code_region, code_cip, annee_debut, annee_fin)
+    else:
+        use_rollup = await _rollups_a_jour(db)
+        rows = (await db.execute(timeseries_query(code_region, code_cip, annee_debut, annee_fin, use_rollup))).all()
+    return format_timeseries(rows, code_region, code_cip, fenetre)
+
+@router.get("/overview")
+async def get_overview(annee: int = 2023, db: AsyncSession = Depends(get_async_db)):
+    """
+    Vue d'ensemble des statistiques nationales
+    """
+    snapshot = await run_in_threadpool(_snapshot)
+    if snapshot:
+        total = snapshot.overview(annee)
+        nb_medicaments = snapshot.nb_medicaments
+    else:
+        total = await _get_rollup(db, annee) or (await db.execute(overview_live_query(annee))).first()
+        nb_medicaments = await db.scalar(nb_medicaments_query())
+    return format_overview(total, nb_medicaments, annee)
+
+@router.get("/medicaments/top", response_model=List[schemas.MedicamentTop])
+async def get_top_medicaments(
+    request: Request,
+    annee: int = Query(2023, description="Année"),
+    code_region: Optional[int] = Query(None, description="Code région (France entière si absent)"),
+    n: int = Query(10, ge=1, le=TOP_MEDICAMENTS_MAX, description="Nombre de médicaments"),
+    by: str = Query("remb", pattern="^(boites|remb)$", description="Classement par boîtes ou par remboursement"),
+    format: Optional[str] = Query(None, pattern=formats.FORMAT_PATTERN, description=formats.FORMAT_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Médicaments les plus consommés (boîtes) ou les plus remboursés d'une année,
+    pour la France entière ou une région
+    """
+    snapshot = await run_in_threadpool(_snapshot)
+    if snapshot:
+        check_region_found(code_region is None or code_region in snapshot.region_by_code)
+        # Somme par médicament sur les lignes de la région : hors de la boucle
+        top = await run_in_threadpool(snapshot.top_medicaments, annee, code_region, n, by)
+    else:
+        region_id = 0
+        if code_region is not None:
+            region_id = await db.scalar(region_id_query(code_region))
+            check_region_found(region_id is not None)
+        top = await _get_top_medicaments_sql(db, annee, region_id, by, n)
+    return format_top_medicaments(request, format, top)
+
+async def _get_top_medicaments_sql(db: AsyncSession, annee: int, region_id: int, by: str, n: int):
+    """Classement de l'ETL si les rollups de l'année sont à jour, sinon top-N en direct"""
+    if await _get_rollup(db, annee):
+        try:
+            top = (await db.execute(top_medicaments_ranking_query(annee, region_id, by, n))).all()
+        except SQLAlchemyError:
+            # Rollups construits avant l'ajout de stats_top_medicaments
+            await db.rollback()
+            top = []
+        # Classement vide : région sans données cette année, ou table pas encore remplie
+        if top:
+            return top
+    return (await db.execute(top_medicaments_live_query(annee, region_id, by, n))).all()
@@ -0,0 +1,146 @@
+"""
+Index de recherche par trigrammes pour les noms de medicaments
+
+Construit en memoire au demarrage de l'API a partir de la table medicaments.
+Remplace le filtre ILIKE '%q%' (qui ne peut pas utiliser d'index B-tree)
+par une liste inversee trigramme -> medicaments.
+
+Le complement approche ne parcourt pas les listes des trigrammes les plus
+frequents (filtrage par prefixe) et examine au plus APPROX_MAX_CANDIDATES
+noms : sa latence ne depend pas de la taille du catalogue.
+"""
+
+import heapq
+import math
+import unicodedata
+
+from sqlalchemy.orm import Session
+
+from app import models
+
+# Seuil de similarite pour les resultats approches (meme valeur que pg_trgm)
+SIMILARITY_THRESHOLD = 0.3
+
+# Noms examines au plus par le complement approche
+APPROX_MAX_CANDIDATES = 2000
+
+
+def normalize(texte: str) -> str:
+    """Minuscules et suppression des accents"""
+    texte = unicodedata.normalize("NFKD", texte.lower())
+    return "".join(c for c in texte if not unicodedata.combining(c))
+
+
+def trigrams(texte: str) -> set:
+    """Ensemble des trigrammes d'une chaine deja normalisee"""
+    return {texte[i:i + 3] for i in range(len(texte) - 2)}
+
+
+class MedicamentIndex:
+    """Liste inversee trigramme -> positions des medicaments"""
+
+    def __init__(self, rows):
+        self.ids = []
+        self.codes_cip = []
+        self.noms = []
+        self._noms_norm = []
+        self._nb_trigrams = []
+        self._postings = {}
+
+        for position, (medicament_id, code_cip, nom) in enumerate(rows):
+            nom_norm = normalize(nom)
+            grams = trigrams(nom_norm)
+            self.ids.append(medicament_id)
+            self.codes_cip.append(code_cip)
+            self.noms.append(nom)
+            self._noms_norm.append(nom_norm)
+            self._nb_trigrams.append(max(len(grams), 1))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(position)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _row(self, position):
+        return {
+            "code_cip": self.codes_cip[position],
+            "nom_medicament": self.noms[position],
+            "id": self.ids[position],
+        }
+
+    def search(self, q: str, limit: int = 20):
+        """
+        Recherche classee par pertinence :
+        1. noms commencant par q
+        2. noms contenant q, par similarite decroissante
+        3. noms approches (trigrammes communs >= SIMILARITY_THRESHOLD)
+        """
+        q_norm = normalize(q.strip())
+        grams = trigrams(q_norm)
+        if not grams:
+            return []
+
+        postings = [self._postings.get(gram) for gram in grams]
+        nb_grams = len(grams)
+
+        # Correspondances exactes : tous les trigrammes de q sont presents,
+        # on part de la liste la plus courte puis on verifie la sous-chaine
+        matches = []
+        if all(postings):
+            candidats = min(postings, key=len)
+            matches = [p for p in candidats if q_norm in self._noms_norm[p]]
+
+        ranked = heapq.nsmallest(
+            limit,
+            matches,
+            key=lambda p: (
+                not self._noms_norm[p].startswith(q_norm),
+                -nb_grams / self._nb_trigrams[p],
+                self._noms_norm[p],
+            ),
+        )
+
+        if len(ranked) < limit:
+            # Complement par similarite trigramme (fautes de frappe).
+            # Un nom de similarite >= seuil partage au moins `minimum` trigrammes
+            # avec q : il figure dans l'une des nb_grams - minimum + 1 listes les
+            # plus courtes, les plus longues (trigrammes frequents) sont ignorees.
+            minimum = max(1, math.ceil(SIMILARITY_THRESHOLD * nb_grams))
+            listes = sorted((posting or [] for posting in postings), key=len)
+            deja_vus = set(matches)
+            candidats = set()
+            for posting in listes[:nb_grams - minimum + 1]:
+                candidats.update(posting[:APPROX_MAX_CANDIDATES - len(candidats)])
+                if len(candidats) >= APPROX_MAX_CANDIDATES:
+                    break
+            approches = []
+            for p in candidats - deja_vus:
+                nom = self._noms_norm[p]
+                nb_communs = sum(gram in nom for gram in grams)
+                similarite = nb_communs / (nb_grams + self._nb_trigrams[p] - nb_communs)
+                if similarite >= SIMILARITY_THRESHOLD:
+                    approches.append((-similarite, nom, p))
+            ranked += [p for _, _, p in heapq.nsmallest(limit - len(ranked), approches)]
+
+        return [self._row(p) for p in ranked]
+
+
+# Index partage par l'application (None tant qu'il n'est pas construit)
+medicament_index = None
+
+
+def build_index(db: Session) -> MedicamentIndex:
+    """Construit (ou reconstruit) l'index a partir de la table medicaments"""
+    global medicament_index
+    rows = db.query(
+        models.Medicament.id,
+        models.Medicament.code_cip,
+        models.Medicament.nom_medicament
+    ).order_by(models.Medicament.id).all()
+    medicament_index = MedicamentIndex(rows)
+    return medicament_index
+
+
+def get_index():
+    """Retourne l'index courant (None si non construit)"""
+    return medicament_index
@@ -0,0 +1,36 @@
+"""
+Serialisation rapide des listes (FAST_SERIALIZATION=true)
+
+Par defaut, les routes renvoient des objets ORM que FastAPI valide puis
+serialise ligne par ligne avec Pydantic (from_attributes). En mode rapide,
+la route selectionne seulement les colonnes du schema avec select() (pas
+d'identity map) et renvoie directement une reponse orjson. Le JSON produit
+et le schema OpenAPI (response_model) sont identiques.
+"""
+
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+
+def _default(value):
+    # Pydantic serialise les Decimal en chaine : meme rendu ici
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type non serialisable : {type(value).__name__}")
+
+
+class FastJSONResponse(ORJSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_default)
+
+
+def schema_columns(schema, model):
+    """Colonnes du modele correspondant aux champs du schema, dans le meme ordre"""
+    return [getattr(model, field) for field in schema.model_fields]
+
+
+def rows_response(rows, headers=None):
+    """Lignes Core (Row) -> reponse JSON, sans passer par Pydantic"""
+    return FastJSONResponse([row._asdict() for row in rows], headers=headers)
@@ -0,0 +1,170 @@
+"""
+Journal des requetes SQL lentes, avec plan d'execution
+
+Toute requete plus longue que SLOW_QUERY_MS est enregistree (SQL, parametres,
+duree, route appelante) dans un journal tournant (SLOW_QUERY_LOG, une ligne
+JSON par requete) et dans une memoire des dernieres requetes lentes, lue par
+GET /admin/slow-queries.
+
+Pour une fraction SLOW_QUERY_EXPLAIN_RATE des requetes lentes, le plan est
+capture en arriere-plan sur une autre connexion :
+EXPLAIN (ANALYZE, BUFFERS) sur PostgreSQL, EXPLAIN QUERY PLAN sur SQLite.
+Les parcours sequentiels (Seq Scan / SCAN sans index) sont releves a part.
+"""
+
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import config
+from app.metrics import current_route
+
+# Un meme SQL n'est pas re-explique avant ce delai (secondes)
+EXPLAIN_COOLDOWN = 300
+MAX_PARAMS_LENGTH = 500
+
+SEQ_SCAN_PATTERNS = [
+    re.compile(r"Seq Scan on (\w+)"),                       # PostgreSQL
+    re.compile(r"^SCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)"),   # SQLite (SCAN sans index)
+]
+
+logger = logging.getLogger("medimap.slow_queries")
+
+
+def _setup_logger():
+    if logger.handlers or not config.SLOW_QUERY_LOG:
+        return
+    path = Path(config.SLOW_QUERY_LOG)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        path, maxBytes=config.SLOW_QUERY_LOG_MAX_BYTES, backupCount=config.SLOW_QUERY_LOG_BACKUPS,
+        encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def seq_scans(plan):
+    """Tables parcourues sans index d'apres le plan"""
+    tables = []
+    for line in plan:
+        for pattern in SEQ_SCAN_PATTERNS:
+            match = pattern.search(line)
+            if match and match.group(1) not in tables:
+                tables.append(match.group(1))
+    return tables
+
+
+class SlowQueryRecorder:
+    """Requetes lentes recentes (memoire bornee) + journal + EXPLAIN echantillonne"""
+
+    def __init__(self, threshold_ms, explain_rate, keep):
+        self.threshold = threshold_ms / 1000
+        self.explain_rate = explain_rate
+        self.entries = deque(maxlen=keep)
+        self.total = 0
+        self._lock = threading.Lock()
+        self._explained_at = {}
+        self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+
+    def attach(self, engine, explain_engine=None):
+        """
+        Ecoute les requetes du moteur ; explain_engine execute les EXPLAIN
+        (None : pas de plan, ex. moteur asyncpg dont le style de parametres differe)
+        """
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after(conn, cursor, statement, parameters, context, executemany):
+            duration = time.perf_counter() - conn.info["slow_query_start"].pop()
+            if (duration >= self.threshold and not executemany
+                    and not conn.get_execution_options().get("skip_slow_query_log")):
+                self.record(statement, parameters, duration, explain_engine)
+
+        return engine
+
+    def record(self, statement, parameters, duration, explain_engine=None):
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "route": current_route(),
+            "duration_ms": round(duration * 1000, 3),
+            "sql": statement,
+            "params": repr(parameters)[:MAX_PARAMS_LENGTH],
+            "plan": None,
+            "seq_scans": None,
+        }
+        with self._lock:
+            self.total += 1
+            self.entries.append(entry)
+
+        if explain_engine is not None and self._should_explain(statement):
+            self._explainer.submit(self._explain, explain_engine, statement, parameters, entry)
+        else:
+            logger.info(json.dumps(entry, ensure_ascii=False))
+
+    def _should_explain(self, statement):
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return False
+        if random.random() >= self.explain_rate:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if now - self._explained_at.get(statement, -EXPLAIN_COOLDOWN) < EXPLAIN_COOLDOWN:
+                return False
+            self._explained_at[statement] = now
+        return True
+
+    def _explain(self, engine, statement, parameters, entry):
+        if engine.dialect.name == "postgresql":
+            prefix = "EXPLAIN (ANALYZE, BUFFERS) "
+        else:
+            prefix = "EXPLAIN QUERY PLAN "
+        try:
+            # L'EXPLAIN lui-meme n'est pas journalise
+            with engine.connect().execution_options(skip_slow_query_log=True) as conn:
+                rows = conn.exec_driver_sql(prefix + statement, parameters).all()
+            # PostgreSQL : une ligne de texte par noeud ; SQLite : (id, parent, notused, detail)
+            entry["plan"] = [row[-1] for row in rows]
+            entry["seq_scans"] = seq_scans(entry["plan"])
+        except SQLAlchemyError as e:
+            entry["plan"] = [f"EXPLAIN impossible : {e.__class__.__name__}"]
+        logger.info(json.dumps(entry, ensure_ascii=False))
+
+    def snapshot(self, limit=None):
+        with self._lock:
+            entries = list(self.entries)[::-1]
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "explain_rate": self.explain_rate,
+            "total": self.total,
+            "entries": entries[:limit] if limit else entries,
+        }
+
+
+recorder = SlowQueryRecorder(
+    config.SLOW_QUERY_MS, config.SLOW_QUERY_EXPLAIN_RATE, config.SLOW_QUERY_KEEP
+)
+
+
+def record_slow_queries(engine, explain_engine=None):
+    """Active le journal des requetes lentes sur le moteur"""
+    if config.SLOW_QUERY_MS <= 0:
+        return engine
+    _setup_logger()
+    return recorder.attach(engine, explain_engine)
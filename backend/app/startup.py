@@ -0,0 +1,194 @@
+"""
+Demarrage a froid de l'API : delais des phases du demarrage (imports,
+hooks, premier octet servi) et prechauffage en tache de fond, exposes par
+GET /health/startup et /metrics.
+
+Ce module est importe en premier par app.main : il ne doit rien importer de lourd.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+# Marque les requetes internes du prechauffage dans le scope ASGI
+WARMUP_SCOPE_KEY = "medimap.warmup"
+
+# Modules importes a la premiere utilisation (pas par app.main) ; pandas n'est
+# utilise que par l'ETL et le frontend : il ne doit jamais apparaitre charge
+LAZY_MODULES = ["numpy", "pyarrow", "pandas"]
+
+
+def _process_start():
+    """Instant (epoch) du lancement du processus : /proc sous Linux, sinon import de ce module"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Champ 22 : starttime en ticks depuis le boot (le nom du programme peut contenir des espaces)
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.time()
+
+
+class StartupTimings:
+    """Phases du demarrage et etapes du prechauffage, en secondes depuis le lancement du processus"""
+
+    def __init__(self, process_start):
+        self.process_start = process_start
+        self.phases = {}
+        self.first_request = None
+        self.warmup = []
+        self._lock = threading.Lock()
+
+    def elapsed(self):
+        return round(time.time() - self.process_start, 4)
+
+    def mark(self, phase):
+        """Fin d'une phase (la premiere occurrence seulement)"""
+        with self._lock:
+            if phase in self.phases:
+                return False
+            self.phases[phase] = self.elapsed()
+            return True
+
+    def record_first_byte(self, method, path):
+        if self.mark("first_byte"):
+            self.first_request = f"{method} {path}"
+            logger.info("Premier octet servi %.2fs apres le lancement du processus (%s)",
+                        self.phases["first_byte"], self.first_request)
+
+    def record_step(self, step, seconds, status):
+        with self._lock:
+            self.warmup.append({"step": step, "seconds": round(seconds, 4), "status": status})
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "process_start": datetime.fromtimestamp(self.process_start, timezone.utc).isoformat(
+                    timespec="milliseconds"
+                ),
+                **{f"{phase}_s": seconds for phase, seconds in self.phases.items()},
+                "first_request": self.first_request,
+                "warmup": list(self.warmup),
+                "lazy_modules": {name: name in sys.modules for name in LAZY_MODULES},
+            }
+
+
+timings = StartupTimings(_process_start())
+
+
+class FirstByteMiddleware:
+    """Middleware ASGI : note le premier octet servi a un client, puis ne fait plus rien"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if ("first_byte" in timings.phases or scope["type"] != "http"
+                or scope.get(WARMUP_SCOPE_KEY)):
+            return await self.app(scope, receive, send)
+
+        async def send_first_byte(message):
+            if message["type"] == "http.response.start":
+                timings.record_first_byte(scope["method"], scope["path"])
+            await send(message)
+
+        await self.app(scope, receive, send_first_byte)
+
+
+# ============================================================
+# PRECHAUFFAGE
+# ============================================================
+
+def _open_connections(count):
+    """Ouvre `count` connexions simultanement puis les rend au pool (cree le moteur)"""
+    from app.database import get_engine
+
+    engine = get_engine()
+    with contextlib.ExitStack() as stack:
+        for _ in range(count):
+            stack.enter_context(engine.connect())
+
+
+async def _open_async_connections(count):
+    from app.database import get_async_engine
+
+    engine = get_async_engine()
+    async with contextlib.AsyncExitStack() as stack:
+        for _ in range(count):
+            await stack.enter_async_context(engine.connect())
+
+
+async def internal_get(app, path):
+    """Requete GET traitee par l'application (middlewares compris) sans passer par le reseau"""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": [(b"host", b"warmup")],
+        "client": None, "server": None, WARMUP_SCOPE_KEY: True,
+    }
+    status = None
+    request_sent = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Pas de deconnexion avant la fin de la reponse
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _step(name, awaitable):
+    start = time.perf_counter()
+    try:
+        result = await awaitable
+        status = result if result is not None else "ok"
+    except Exception as e:  # le prechauffage ne doit jamais arreter l'API
+        status = f"erreur : {e.__class__.__name__}"
+    timings.record_step(name, time.perf_counter() - start, status)
+
+
+async def warm_up(app, build_search_index):
+    """Prechauffage en tache de fond (lance par le hook de demarrage de app.main)"""
+    from fastapi.concurrency import run_in_threadpool
+
+    if config.WARMUP_ENABLED and config.WARMUP_CONNECTIONS > 0:
+        await _step("connexions", run_in_threadpool(_open_connections, config.WARMUP_CONNECTIONS))
+        if config.DB_MODE == "async":
+            await _step("connexions_async", _open_async_connections(config.WARMUP_CONNECTIONS))
+
+    # Hors prechauffage aussi : /medicaments/search utilise ILIKE en attendant l'index
+    await _step("index_recherche", run_in_threadpool(build_search_index))
+
+    if config.STATS_ENGINE == "memory":
+        from app import analytics
+        await _step("moteur_stats", run_in_threadpool(lambda: "ok" if analytics.engine.reload() else "echec"))
+
+    if config.WARMUP_ENABLED:
+        for path in config.WARMUP_PATHS:
+            await _step(f"GET {path}", internal_get(app, path))
+    timings.mark("warmup")
@@ -0,0 +1,94 @@
+"""
+Series temporelles multi-annees pour /stats/timeseries
+
+La requete groupe par annee (nation, region ou code CIP) ; les indicateurs
+derives (croissance annuelle, TCAM, moyennes mobiles) sont calcules en
+vectoriel avec NumPy sur le resultat groupe.
+"""
+
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select, func
+
+from app import models
+
+METRICS = ["total_boites", "total_remb"]
+
+
+def timeseries_query(code_region: Optional[int], code_cip: Optional[str],
+                     annee_debut: Optional[int], annee_fin: Optional[int], use_rollup: bool):
+    """Totaux par annee pour la nation, une region ou un medicament"""
+    if code_region is not None:
+        source = models.StatsRegionAnnee if use_rollup else models.Consommation
+        query = select(source.annee).join(
+            models.Region, models.Region.id == source.region_id
+        ).where(models.Region.code_region == code_region)
+    elif code_cip is not None:
+        source = models.StatsMedicamentAnnee if use_rollup else models.Consommation
+        query = select(source.annee).join(
+            models.Medicament, models.Medicament.id == source.medicament_id
+        ).where(models.Medicament.code_cip == code_cip)
+    else:
+        source = models.StatsAnnee if use_rollup else models.Consommation
+        query = select(source.annee)
+
+    query = query.add_columns(
+        func.sum(source.total_boites).label("total_boites"),
+        func.sum(source.total_remb).label("total_remb")
+    ).group_by(source.annee).order_by(source.annee)
+
+    if annee_debut is not None:
+        query = query.where(source.annee >= annee_debut)
+    if annee_fin is not None:
+        query = query.where(source.annee <= annee_fin)
+    return query
+
+
+def _to_list(values, decimals=2):
+    """Tableau NumPy -> liste JSON (NaN -> None)"""
+    rounded = np.round(values.astype(float), decimals)
+    return [None if np.isnan(v) else float(v) for v in rounded]
+
+
+def growth_pct(annees, values):
+    """Croissance par rapport a l'annee precedente (None si annee manquante ou base nulle)"""
+    growth = np.full(len(values), np.nan)
+    if len(values) > 1:
+        previous = values[:-1]
+        consecutive = (np.diff(annees) == 1) & (previous != 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth[1:] = np.where(consecutive, (values[1:] / previous - 1) * 100, np.nan)
+    return growth
+
+
+def rolling_mean(values, window):
+    """Moyenne mobile sur `window` valeurs (NaN tant que la fenetre est incomplete)"""
+    means = np.full(len(values), np.nan)
+    if window >= 1 and len(values) >= window:
+        cumsum = np.cumsum(np.insert(values, 0, 0.0))
+        means[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window
+    return means
+
+
+def cagr_pct(annees, values):
+    """Taux de croissance annuel moyen entre la premiere et la derniere annee"""
+    if len(values) < 2 or values[0] <= 0 or annees[-1] == annees[0]:
+        return None
+    return round(float(((values[-1] / values[0]) ** (1 / (annees[-1] - annees[0])) - 1) * 100), 2)
+
+
+def compute_timeseries(rows, fenetre: int):
+    """Serie groupee -> colonnes + indicateurs derives"""
+    annees = np.array([row.annee for row in rows], dtype=np.int64)
+    result = {"annee": annees.tolist()}
+    tcam = {}
+
+    for metric in METRICS:
+        values = np.array([float(getattr(row, metric) or 0) for row in rows], dtype=np.float64)
+        result[metric] = [int(v) for v in values] if metric == "total_boites" else _to_list(values)
+        result[f"croissance_{metric}_pct"] = _to_list(growth_pct(annees, values))
+        result[f"moyenne_mobile_{metric}"] = _to_list(rolling_mean(values, fenetre))
+        tcam[metric] = cagr_pct(annees, values)
+
+    return result, tcam
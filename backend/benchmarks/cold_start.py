@@ -0,0 +1,93 @@
+"""
+Demarrage a froid de l'API : temps jusqu'a la premiere reponse
+
+Lance --runs fois un processus uvicorn neuf et interroge --path en boucle
+des le lancement : temps jusqu'a la premiere reponse 200 cote client, puis
+phases mesurees par l'API (GET /health/startup : fin des imports du
+framework puis de l'application, fin du demarrage, premier octet, fin du
+prechauffage). Affiche la mediane des runs.
+
+Usage (depuis backend/) :
+    DATABASE_URL=sqlite:///bench.db python benchmarks/cold_start.py --runs 5
+    DATABASE_URL=sqlite:///bench.db python benchmarks/cold_start.py --runs 5 --no-warmup
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = ["import_framework_s", "import_s", "startup_s", "first_byte_s", "warmup_s"]
+
+
+def cold_start(args, env):
+    """Un lancement : (delai de la premiere reponse cote client, phases de /health/startup)"""
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        first_response = None
+        while time.perf_counter() - start < args.timeout:
+            try:
+                if httpx.get(base_url + args.path).status_code == 200:
+                    first_response = time.perf_counter() - start
+                    break
+            except httpx.HTTPError:
+                time.sleep(0.01)
+        if first_response is None:
+            raise RuntimeError("L'API n'a pas demarre")
+
+        # Attendre la fin du prechauffage pour avoir toutes les phases
+        phases = {}
+        while time.perf_counter() - start < args.timeout:
+            phases = httpx.get(base_url + "/health/startup").json()
+            if "warmup_s" in phases:
+                break
+            time.sleep(0.1)
+        return first_response, phases
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Demarrage a froid de l'API")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/stats/overview", help="Premiere requete envoyee")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--no-warmup", action="store_true", help="WARMUP_ENABLED=false")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL non definie")
+    env = {**os.environ, "WARMUP_ENABLED": "false" if args.no_warmup else "true"}
+
+    firsts, phases = [], {phase: [] for phase in PHASES}
+    for run in range(1, args.runs + 1):
+        first, timings = cold_start(args, env)
+        firsts.append(first)
+        for phase in PHASES:
+            if phase in timings:
+                phases[phase].append(timings[phase])
+        print(f"run {run} : premiere reponse {first:.2f}s, "
+              + ", ".join(f"{phase} {timings[phase]:.2f}s" for phase in PHASES if phase in timings))
+
+    print(f"\nMediane sur {args.runs} runs ({'sans' if args.no_warmup else 'avec'} prechauffage) :")
+    print(f"  {'premiere reponse (client)':<28} {statistics.median(firsts):>7.2f}s")
+    for phase, values in phases.items():
+        if values:
+            print(f"  {phase:<28} {statistics.median(values):>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
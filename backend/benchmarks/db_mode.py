@@ -0,0 +1,130 @@
+"""
+Benchmark DB_MODE=sync vs DB_MODE=async
+
+Lance l'API (uvicorn) dans chaque mode, envoie les requetes de 200 clients
+concurrents sur les routes /stats, /regions et /medicaments, puis affiche
+le debit et les latences p50/p99. Le cache de reponses est desactive.
+
+Usage (depuis backend/) :
+    python benchmarks/db_mode.py --requests 5000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROUTES = {
+    "stats_overview": "/stats/overview?annee=2023",
+    "stats_regions": "/stats/regions?annee=2023",
+    "stats_region": "/stats/region/11?annee=2023",
+    "regions": "/regions/",
+    "medicaments": "/medicaments/?limit=100",
+    "medicament": "/medicaments/1",
+}
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+
+def summarize(latencies, errors, elapsed):
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": round(count / elapsed, 1) if elapsed else None,
+        "mean_ms": round(sum(latencies) / count * 1000, 2) if count else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if count else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2) if count else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if count else None,
+    }
+
+
+async def run_load(base_url, routes, nb_requests, concurrency):
+    """Requetes reparties uniformement sur les routes, `concurrency` clients simultanes
+
+    routes : nom de la route -> URL, ou fonction sans argument qui genere l'URL
+    """
+    names = list(routes)
+    queue = asyncio.Queue()
+    for i in range(nb_requests):
+        name = names[i % len(names)]
+        url = routes[name]
+        queue.put_nowait((name, url() if callable(url) else url))
+
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+
+        async def worker():
+            while not queue.empty():
+                name, url = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    if response.status_code != 200:
+                        errors[name] += 1
+                except httpx.HTTPError:
+                    errors[name] += 1
+                latencies[name].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    all_latencies = [l for values in latencies.values() for l in values]
+    return {
+        "total": summarize(all_latencies, sum(errors.values()), elapsed),
+        # Debit par route : part de la duree totale
+        "endpoints": {name: summarize(latencies[name], errors[name], elapsed) for name in names},
+    }
+
+
+def wait_ready(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("L'API n'a pas demarre")
+
+
+def bench_mode(mode, args):
+    env = {**os.environ, "DB_MODE": mode, "CACHE_ENABLED": "false"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_ready(base_url)
+        # Echauffement (connexions du pool, index de recherche)
+        asyncio.run(run_load(base_url, ROUTES, len(ROUTES) * 10, 10))
+        return asyncio.run(run_load(base_url, ROUTES, args.requests, args.concurrency))["total"]
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'mode':6s} {'req/s':>8s} {'p50 (ms)':>9s} {'p99 (ms)':>9s} {'erreurs':>8s}")
+    for mode in ("sync", "async"):
+        r = bench_mode(mode, args)
+        print(f"{mode:6s} {r['rps']:8.1f} {r['p50_ms']:9.2f} {r['p99_ms']:9.2f} {r['errors']:8d}")
@@ -0,0 +1,166 @@
+"""
+Test de charge de toutes les routes de l'API
+
+Lance l'API (uvicorn) sur la base DATABASE_URL (remplie par
+benchmarks/seed.py), envoie --requests requetes reparties sur toutes les
+routes avec --concurrency clients simultanes, puis ecrit debit et latences
+p50/p95/p99 (globaux et par route) dans un fichier JSON. --compare affiche
+l'ecart avec un resultat precedent (ex: commit de reference).
+
+Usage (depuis backend/) :
+    DATABASE_URL=sqlite:///bench.db python benchmarks/load_test.py --requests 5000 --concurrency 50
+    DATABASE_URL=sqlite:///bench.db python benchmarks/load_test.py --compare benchmarks/results/<ref>.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, text
+
+from db_mode import run_load, wait_ready
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+SEARCH_TERMS = ["PARA", "IBUPRO", "DOLI", "METFOR", "VASTA", "OMEPRAZO", "SERTRA", "LEVOTHY"]
+
+
+def dataset_context(database_url):
+    """Valeurs presentes en base pour construire des requetes realistes"""
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        context = {
+            "annees": [r[0] for r in conn.execute(text("SELECT DISTINCT annee FROM consommation ORDER BY annee"))],
+            "regions": conn.execute(text("SELECT id, code_region FROM regions")).all(),
+            "max_medicament_id": conn.execute(text("SELECT max(id) FROM medicaments")).scalar() or 1,
+            "codes_cip": [r[0] for r in conn.execute(text("SELECT code_cip FROM medicaments ORDER BY id LIMIT 1000"))],
+        }
+    engine.dispose()
+    if not context["annees"]:
+        raise SystemExit("Base vide : lancer d'abord benchmarks/seed.py")
+    return context
+
+
+def endpoints(ctx):
+    """Nom de la route -> generateur d'URL"""
+    annee = lambda: random.choice(ctx["annees"])
+    region = lambda: random.choice(ctx["regions"])
+    return {
+        "stats_overview": lambda: f"/stats/overview?annee={annee()}",
+        "stats_regions": lambda: f"/stats/regions?annee={annee()}",
+        "stats_region": lambda: f"/stats/region/{region().code_region}?annee={annee()}",
+        "stats_region_enrichi": lambda: f"/stats/region/{region().code_region}?annee={annee()}&enrichi=true",
+        "stats_batch": lambda: "/stats/batch?" + "&".join(
+            [f"code_region={region().code_region}" for _ in range(3)] + [f"annee={a}" for a in ctx["annees"]]
+        ),
+        "stats_timeseries": lambda: f"/stats/timeseries?code_region={region().code_region}",
+        "stats_timeseries_cip": lambda: f"/stats/timeseries?code_cip={random.choice(ctx['codes_cip'])}",
+        "regions": lambda: "/regions/",
+        "region": lambda: f"/regions/{region().id}",
+        "region_code": lambda: f"/regions/code/{region().code_region}",
+        "medicaments": lambda: f"/medicaments/?limit=100&skip={random.randint(0, 1000)}",
+        "medicaments_nom": lambda: "/medicaments/?limit=100&order=nom",
+        "medicaments_search": lambda: f"/medicaments/search?q={random.choice(SEARCH_TERMS)}",
+        "medicament": lambda: f"/medicaments/{random.randint(1, ctx['max_medicament_id'])}",
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    def delta(name, key, value):
+        if baseline is None or value is None:
+            return ""
+        ref = (baseline["total"] if name == "TOTAL" else baseline["endpoints"].get(name, {})).get(key)
+        return f" ({(value / ref - 1) * 100:+.0f}%)" if ref else ""
+
+    print(f"{'route':<22} {'req/s':>16} {'p50 (ms)':>18} {'p95 (ms)':>18} {'p99 (ms)':>18} {'err':>5}")
+    rows = [("TOTAL", results["total"])] + list(results["endpoints"].items())
+    for name, r in rows:
+        print(f"{name:<22} "
+              f"{str(r['rps']) + delta(name, 'rps', r['rps']):>16} "
+              f"{str(r['p50_ms']) + delta(name, 'p50_ms', r['p50_ms']):>18} "
+              f"{str(r['p95_ms']) + delta(name, 'p95_ms', r['p95_ms']):>18} "
+              f"{str(r['p99_ms']) + delta(name, 'p99_ms', r['p99_ms']):>18} "
+              f"{r['errors']:>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge de l'API")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--mode", choices=["sync", "async"], default=os.getenv("DB_MODE", "sync"))
+    parser.add_argument("--cache", action="store_true", help="Garder le cache de reponses actif")
+    parser.add_argument("--workers", type=int, default=1, help="Processus uvicorn")
+    parser.add_argument("--output", help="Fichier JSON (defaut : benchmarks/results/<date>-<commit>.json)")
+    parser.add_argument("--compare", help="Resultat JSON de reference")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise SystemExit("DATABASE_URL non definie")
+    random.seed(args.seed)
+    routes = endpoints(dataset_context(database_url))
+
+    env = {**os.environ, "DB_MODE": args.mode, "CACHE_ENABLED": "true" if args.cache else "false"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_ready(base_url)
+        # Echauffement (connexions du pool, index de recherche, caches du SGBD)
+        asyncio.run(run_load(base_url, routes, len(routes) * 5, min(args.concurrency, 10)))
+        results = asyncio.run(run_load(base_url, routes, args.requests, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+
+    results["meta"] = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "dialect": database_url.split(":", 1)[0],
+        "mode": args.mode,
+        "cache": args.cache,
+        "workers": args.workers,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{results['meta']['commit'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResultats : {output}")
+
+
+if __name__ == "__main__":
+    main()
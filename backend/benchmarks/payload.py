@@ -0,0 +1,64 @@
+"""
+Taille des reponses de GET /medicaments/ selon le format et la compression
+
+Remplit une base SQLite temporaire avec --rows medicaments puis affiche la
+taille transferee pour json / columns / arrow, sans compression, en GZip et
+en Brotli.
+
+Usage (depuis backend/) :
+    python benchmarks/payload.py --rows 10000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FORMATS = ["json", "columns", "arrow"]
+ENCODINGS = ["identity", "gzip", "br"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmpdir}/payload.db"
+    os.environ["CACHE_ENABLED"] = "false"
+
+    from fastapi.testclient import TestClient
+    from app import models
+    from app.database import get_engine
+    from app.main import app
+
+    engine = get_engine()
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(models.Medicament.__table__.insert(), [
+            {"code_cip": f"34009{i:08d}", "nom_medicament": f"MEDICAMENT {i} 500MG CPR B/30"}
+            for i in range(args.rows)
+        ])
+
+    client = TestClient(app)
+    route = f"/medicaments/?limit={args.rows}"
+    reference = None
+
+    print(f"GET {route}")
+    print(f"  {'format':<10}" + "".join(f"{encoding:>14}" for encoding in ENCODINGS))
+    for fmt in FORMATS:
+        sizes = []
+        for encoding in ENCODINGS:
+            response = client.get(f"{route}&format={fmt}", headers={"Accept-Encoding": encoding})
+            # Octets effectivement transferes (avant decompression par le client)
+            sizes.append(response.num_bytes_downloaded)
+        reference = reference or sizes[0]
+        print(f"  {fmt:<10}" + "".join(
+            f"{size / 1024:9.0f} Ko{'':3}" for size in sizes
+        ) + f"  (-{(1 - min(sizes) / reference) * 100:.0f}% au mieux)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Latence de l'index de recherche par trigrammes (app.search)
+
+Construit l'index sur la table medicaments de DATABASE_URL (remplie par
+benchmarks/seed.py : noms faits de quelques syllabes, donc des trigrammes
+tres frequents) puis mesure la mediane et le p99 de MedicamentIndex.search
+par requete : prefixes, sous-chaines, fautes de frappe et requetes sans
+correspondance exacte (seul le passage approche travaille).
+
+Usage (depuis backend/) :
+    DATABASE_URL=sqlite:///bench.db python benchmarks/search.py --repetitions 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUERIES = [
+    "para",             # prefixe tres frequent
+    "paracetamol",      # exact
+    "paracetamole",     # faute de frappe : complement approche
+    "cetamol",          # sous-chaine
+    "mol 500mg",        # trigrammes presents dans la plupart des noms
+    "levothyrox",
+    "levotyrox",        # faute de frappe
+    "ibuprofene",
+    "sertralina",       # faute de frappe
+    "xyzzy",            # aucun resultat
+]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence de l'index de recherche")
+    parser.add_argument("--repetitions", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL non definie")
+
+    from app import search
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        index = search.build_index(db)
+        print(f"Index : {len(index)} medicaments en {time.perf_counter() - start:.2f}s")
+    finally:
+        db.close()
+
+    print(f"\n{'requete':<16} {'resultats':>9} {'mediane (ms)':>13} {'p99 (ms)':>9}")
+    medianes = []
+    for q in QUERIES:
+        timings = []
+        for _ in range(args.repetitions):
+            t = time.perf_counter()
+            results = index.search(q, args.limit)
+            timings.append((time.perf_counter() - t) * 1000)
+        medianes.append(statistics.median(timings))
+        print(f"{q:<16} {len(results):>9} {medianes[-1]:>13.2f} {percentile(timings, 0.99):>9.2f}")
+    print(f"\nPire mediane : {max(medianes):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Jeu de donnees synthetique a l'echelle d'OpenMedic pour les benchmarks
+
+Genere avec NumPy (sans boucle par ligne) :
+- les 14 regions d'OpenMedic (13 metropolitaines + l'outre-mer regroupe sous
+  le code 5, comme dans l'ETL), avec leur poids de population
+- --medicaments codes CIP13 (100 000 par defaut), popularite log-normale
+- des classes ATC (niveau 2)
+- la consommation region x medicament pour --annees annees : chaque
+  medicament est present dans une fraction --densite des regions, nombre de
+  boites de Poisson autour de popularite x population x croissance annuelle
+
+Puis charge le tout (etl/bulk_load : COPY sur PostgreSQL), reconstruit les
+rollups et incremente la version des donnees, comme l'ETL.
+
+La base cible est vide et recreee : ne jamais la pointer sur la production.
+
+Usage (depuis backend/) :
+    DATABASE_URL=sqlite:///bench.db python benchmarks/seed.py --medicaments 100000 --annees 2020 2021 2022 2023
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(BACKEND_DIR), "etl"))
+
+# Code region OpenMedic -> (nom, population en millions) ; noms de etl/aggregate_raw.py
+REGIONS = {
+    5: ("Outre-mer", 2.20),  # Guadeloupe, Martinique, Guyane, La Reunion, Mayotte
+    11: ("Ile-de-France", 12.3),
+    24: ("Centre-Val de Loire", 2.6),
+    27: ("Bourgogne-Franche-Comte", 2.8),
+    28: ("Normandie", 3.3),
+    32: ("Hauts-de-France", 6.0),
+    44: ("Grand Est", 5.6),
+    52: ("Pays de la Loire", 3.8),
+    53: ("Bretagne", 3.4),
+    75: ("Nouvelle-Aquitaine", 6.0),
+    76: ("Occitanie", 6.0),
+    84: ("Auvergne-Rhone-Alpes", 8.1),
+    93: ("Provence-Alpes-Cote d'Azur", 5.1),
+    94: ("Corse", 0.35),
+}
+
+SYLLABES = np.array([
+    "PARA", "CETA", "MOL", "IBU", "PRO", "FENE", "AMO", "XICI", "LINE", "DOLI",
+    "PRANE", "LEVO", "THY", "ROX", "METFOR", "MINE", "ATOR", "VASTA", "TINE", "OME",
+    "PRAZO", "LE", "SPASFON", "KARDE", "GIC", "ZOL", "PIDEM", "SERTRA", "LINA", "VENLA",
+])
+DOSAGES = np.array(["5MG", "10MG", "20MG", "40MG", "100MG", "250MG", "500MG", "1G", "2,5MG", "1000UI"])
+FORMES = np.array(["CPR B/30", "CPR B/90", "GELULE B/28", "SOL BUV FL 100ML", "SACHET B/20",
+                   "CPR PELLIC B/30", "SUPPO B/10", "INJ SER 1ML", "CREME T/30G", "COLLYRE FL 10ML"])
+ATC_GROUPES = "ABCDGHJLMNPRSV"
+
+
+def generate_regions():
+    codes = np.array(list(REGIONS))
+    return pd.DataFrame({
+        "id": np.arange(1, len(codes) + 1),
+        "code_region": codes,
+        "nom_region": [REGIONS[c][0] for c in codes],
+    })
+
+
+def generate_medicaments(rng, n):
+    """Codes CIP13 uniques et noms plausibles (syllabes + dosage + forme)"""
+    ids = np.arange(1, n + 1)
+    syllabes = rng.integers(0, len(SYLLABES), size=(n, 3))
+    noms = np.char.add(np.char.add(SYLLABES[syllabes[:, 0]], SYLLABES[syllabes[:, 1]]), SYLLABES[syllabes[:, 2]])
+    noms = np.char.add(np.char.add(noms, " "), DOSAGES[rng.integers(0, len(DOSAGES), n)])
+    noms = np.char.add(np.char.add(noms, " "), FORMES[rng.integers(0, len(FORMES), n)])
+    return pd.DataFrame({
+        "id": ids,
+        "code_cip": np.char.add("34009", np.char.zfill(ids.astype(str), 8)),
+        "nom_medicament": noms,
+    })
+
+
+def generate_classes():
+    codes = [f"{groupe}{numero:02d}" for groupe in ATC_GROUPES for numero in range(1, 8)]
+    return pd.DataFrame({
+        "id": np.arange(1, len(codes) + 1),
+        "code_atc": codes,
+        "nom_classe": [f"CLASSE THERAPEUTIQUE {code}" for code in codes],
+    })
+
+
+def generate_consommation(rng, nb_medicaments, annees, densite):
+    """Lignes region x medicament x annee, generees par blocs vectoriels"""
+    population = np.array([p for _, p in REGIONS.values()])
+    nb_regions = len(population)
+
+    # Propriete de chaque medicament : popularite, prix, taux de remboursement
+    popularite = rng.lognormal(mean=2.0, sigma=1.8, size=nb_medicaments)
+    prix = rng.lognormal(mean=2.0, sigma=1.0, size=nb_medicaments)
+    taux = rng.uniform(0.3, 1.0, size=nb_medicaments)
+
+    # Les medicaments sont presents dans les memes regions d'une annee a l'autre
+    presence = rng.random((nb_medicaments, nb_regions)) < densite
+    med_idx, reg_idx = np.nonzero(presence)
+
+    frames = []
+    for i, annee in enumerate(annees):
+        croissance = 1.03 ** i
+        boites = rng.poisson(popularite[med_idx] * population[reg_idx] * croissance) + 1
+        remb = np.round(boites * prix[med_idx] * taux[med_idx], 2)
+        frames.append(pd.DataFrame({
+            "region_id": reg_idx + 1,
+            "medicament_id": med_idx + 1,
+            "annee": annee,
+            "total_boites": boites,
+            "total_remb": remb,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def seed(engine, nb_medicaments=100_000, annees=(2020, 2021, 2022, 2023), densite=0.4, seed=42):
+    """Recree le schema et charge le jeu synthetique ; retourne le nombre de lignes par table"""
+    from app import models
+    from bulk_load import bulk_load
+    from rollups import refresh_rollups
+    from manifest import next_data_version, bump_data_version
+
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    tables = {
+        "regions": generate_regions(),
+        "medicaments": generate_medicaments(rng, nb_medicaments),
+        "classes_therapeutiques": generate_classes(),
+        "consommation": generate_consommation(rng, nb_medicaments, list(annees), densite),
+    }
+    print(f"Generation : {time.perf_counter() - start:.1f}s")
+
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        for table, df in tables.items():
+            bulk_load(df, table, conn)
+
+    nb_annees = refresh_rollups(engine, next_data_version(engine))
+    bump_data_version(engine)
+    print(f"Rollups : {nb_annees} annee(s)")
+    return {table: len(df) for table, df in tables.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jeu de donnees synthetique pour les benchmarks")
+    parser.add_argument("--medicaments", type=int, default=100_000)
+    parser.add_argument("--annees", type=int, nargs="+", default=[2020, 2021, 2022, 2023])
+    parser.add_argument("--densite", type=float, default=0.4, help="Part des regions ou chaque medicament est present")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from app.database import get_engine
+
+    counts = seed(get_engine(), args.medicaments, args.annees, args.densite, args.seed)
+    for table, count in counts.items():
+        print(f"  {table:<25} {count:>12,}".replace(",", " "))
@@ -0,0 +1,68 @@
+"""
+Micro-benchmark de la serialisation des listes (FAST_SERIALIZATION)
+
+Remplit une base SQLite temporaire avec --rows medicaments, puis mesure
+GET /medicaments/?limit=<rows> avec la serialisation Pydantic (defaut) et
+avec le mode rapide (select() + orjson). Verifie que les deux JSON sont
+identiques.
+
+Usage (depuis backend/) :
+    python benchmarks/serialization.py --rows 10000 --repeat 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmpdir}/serialization.db"
+    os.environ["CACHE_ENABLED"] = "false"
+
+    from fastapi.testclient import TestClient
+    from app import config, models
+    from app.database import get_engine
+    from app.main import app
+
+    engine = get_engine()
+    models.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(models.Medicament.__table__.insert(), [
+            {"code_cip": f"34009{i:08d}", "nom_medicament": f"MEDICAMENT {i} 500MG CPR B/30"}
+            for i in range(args.rows)
+        ])
+
+    client = TestClient(app)
+    route = f"/medicaments/?limit={args.rows}"
+    bodies = {}
+
+    print(f"GET {route} ({args.repeat} requetes)")
+    for fast in (False, True):
+        config.FAST_SERIALIZATION = fast
+        client.get(route)  # chauffe
+        durations = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get(route)
+            durations.append(time.perf_counter() - start)
+        bodies[fast] = response.json()
+        mode = "orjson + select()" if fast else "Pydantic (ORM)"
+        print(f"  {mode:<20} median {statistics.median(durations) * 1000:8.1f} ms"
+              f"  min {min(durations) * 1000:8.1f} ms  ({len(response.content) / 1024:.0f} Ko)")
+
+    print("  JSON identique :", bodies[False] == bodies[True])
+
+
+if __name__ == "__main__":
+    main()
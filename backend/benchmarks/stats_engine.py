@@ -0,0 +1,124 @@
+"""
+Moteur /stats en memoire (STATS_ENGINE=memory) contre SQL : parite et latence
+
+Sur la base DATABASE_URL (remplie par benchmarks/seed.py), dans le processus
+et sans cache de reponses : chaque URL est servie par les deux moteurs, les
+reponses doivent etre identiques, puis la latence mediane de chacun est
+mesuree.
+
+Exception : les ratios de /stats/region?enrichi=true (moyenne, part, ecart)
+sont des divisions NUMERIC arrondies a 2 decimales : un ecart au dernier
+chiffre du quotient peut changer l'arrondi d'un centime.
+
+Usage (depuis backend/) :
+    DATABASE_URL=sqlite:///bench.db python benchmarks/stats_engine.py --repetitions 50
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+# Divisions NUMERIC de region_stats_enrichies_query
+RATIOS = {"moyenne_nationale", "part_pct", "ecart", "ecart_pct"}
+
+
+def same_response(sql, memory):
+    """(statut, corps) identiques, aux ratios pres (cf. docstring)"""
+    if sql == memory:
+        return True
+    if sql[0] != memory[0]:
+        return False
+    sql_json, memory_json = json.loads(sql[1]), json.loads(memory[1])
+    if not isinstance(sql_json, dict) or sql_json.keys() != memory_json.keys():
+        return False
+    for key in sql_json:
+        if sql_json[key] == memory_json[key]:
+            continue
+        if key not in RATIOS or None in (sql_json[key], memory_json[key]):
+            return False
+        if not math.isclose(sql_json[key], memory_json[key], rel_tol=0, abs_tol=0.0100001):
+            return False
+    return True
+
+
+def urls(snapshot):
+    """Requetes couvrant toutes les routes /stats, sur des valeurs presentes en base"""
+    annees = [int(a) for a in snapshot.annees]
+    codes = [int(c) for c in snapshot.region_codes[:3]]
+    cip = snapshot.med_cip[0] if len(snapshot.med_cip) else "0"
+    return [
+        f"/stats/overview?annee={annees[-1]}",
+        "/stats/overview?annee=1900",
+        f"/stats/regions?annee={annees[-1]}",
+        f"/stats/regions?annee={annees[0]}&format=columns",
+        f"/stats/region/{codes[0]}?annee={annees[-1]}",
+        f"/stats/region/{codes[0]}?annee={annees[-1]}&enrichi=true",
+        f"/stats/region/{codes[-1]}?annee=1900&enrichi=true",
+        "/stats/region/999?annee=2023",
+        "/stats/batch?" + "&".join([f"code_region={c}" for c in codes] + [f"annee={a}" for a in annees]),
+        f"/stats/batch?annee={annees[-1]}&metrics=total_remb",
+        "/stats/timeseries",
+        f"/stats/timeseries?code_region={codes[0]}&annee_debut={annees[1] if len(annees) > 1 else annees[0]}",
+        f"/stats/timeseries?code_cip={cip}",
+        f"/stats/medicaments/top?annee={annees[-1]}",
+        f"/stats/medicaments/top?annee={annees[-1]}&code_region={codes[0]}&n=100&by=boites",
+        f"/stats/medicaments/top?annee={annees[0]}&code_region={codes[-1]}&n=5&format=columns",
+        "/stats/medicaments/top?code_region=999",
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Moteur /stats en memoire contre SQL")
+    parser.add_argument("--repetitions", type=int, default=20)
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        raise SystemExit("DATABASE_URL non definie")
+    os.environ["CACHE_ENABLED"] = "false"
+    os.environ["WARMUP_ENABLED"] = "false"
+
+    from fastapi.testclient import TestClient
+    from app import analytics, config
+    from app.main import app
+
+    start = time.perf_counter()
+    snapshot = analytics.engine.reload()
+    if snapshot is None:
+        raise SystemExit("Chargement impossible")
+    print(f"Chargement : {time.perf_counter() - start:.2f}s, {analytics.engine.status()}")
+
+    differences = 0
+    print(f"\n{'url':<72} {'sql (ms)':>10} {'memoire (ms)':>13}")
+    with TestClient(app) as client:
+        for url in urls(snapshot):
+            results = {}
+            for engine in ("sql", "memory"):
+                config.STATS_ENGINE = engine
+                response = client.get(url)
+                timings = []
+                for _ in range(args.repetitions):
+                    t = time.perf_counter()
+                    client.get(url)
+                    timings.append(time.perf_counter() - t)
+                results[engine] = (response.status_code, response.content, statistics.median(timings) * 1000)
+
+            identical = same_response(results["sql"][:2], results["memory"][:2])
+            differences += not identical
+            print(f"{url:<72} {results['sql'][2]:>10.2f} {results['memory'][2]:>13.2f}"
+                  + ("" if identical else "  DIFFERENT"))
+
+    if differences:
+        raise SystemExit(f"\n{differences} reponse(s) differente(s)")
+    print("\nReponses identiques")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Fixtures des tests de l'API
+
+Petite base SQLite remplie par le generateur des benchmarks
+(benchmarks/seed.py), publiee comme par l'ETL (rollups puis version des
+donnees). Variables d'environnement fixees avant le premier import de app.
+
+Usage (depuis backend/) :
+    python -m pytest -q
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='medimap-tests-'), 'test.db')}",
+    "DB_MODE": "sync",
+    "STATS_ENGINE": "sql",
+    "CACHE_ENABLED": "true",
+    "WARMUP_ENABLED": "false",
+    # Version des donnees relue a chaque requete
+    "DATA_VERSION_CHECK_INTERVAL": "0",
+    "SLOW_QUERY_LOG": "",
+})
+
+import seed  # noqa: E402  (benchmarks/seed.py, ajoute aussi etl/ au chemin)
+
+ANNEES = (2021, 2022, 2023)
+NB_MEDICAMENTS = 300
+
+# Annee sans autre donnee : memes totaux pour ces medicaments (ordre d'insertion inverse)
+ANNEE_EGALITES = 2020
+MEDICAMENTS_EGALITES = [3, 1, 2]
+
+
+def _publish(engine):
+    """Rollups puis nouvelle version des donnees, comme l'ETL"""
+    from rollups import refresh_rollups
+    from manifest import next_data_version, bump_data_version
+
+    refresh_rollups(engine, next_data_version(engine))
+    bump_data_version(engine)
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from sqlalchemy import insert
+    from app import models
+    from app.database import get_engine
+
+    engine = get_engine()
+    seed.seed(engine, nb_medicaments=NB_MEDICAMENTS, annees=ANNEES, densite=0.5)
+
+    # Region d'id 1 (premier code de seed.REGIONS)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Consommation), [
+            {"region_id": 1, "medicament_id": medicament_id, "annee": ANNEE_EGALITES,
+             "total_boites": 10, "total_remb": 100}
+            for medicament_id in MEDICAMENTS_EGALITES
+        ])
+    _publish(engine)
+    return engine
+
+
+@pytest.fixture
+def publish(engine):
+    return lambda: _publish(engine)
+
+
+@pytest.fixture(scope="session")
+def client(engine):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def no_cache(monkeypatch):
+    from app import config
+
+    monkeypatch.setattr(config, "CACHE_ENABLED", False)
@@ -0,0 +1,50 @@
+"""
+Cache des reponses : ETag, 304 sur If-None-Match, invalidation par la version des donnees
+"""
+
+import pytest
+
+from app.cache import response_cache
+
+URL = "/stats/regions?annee=2023"
+
+
+@pytest.fixture
+def empty_cache(client):
+    response_cache.clear()
+
+
+def test_etag_et_304(client, empty_cache):
+    first = client.get(URL)
+    assert first.status_code == 200
+    assert first.headers["X-Cache"] == "MISS"
+    etag = first.headers["ETag"]
+
+    second = client.get(URL)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.headers["ETag"] == etag
+    assert second.content == first.content
+
+    not_modified = client.get(URL, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+
+def test_etag_propre_a_la_requete(client, empty_cache):
+    etag = client.get(URL).headers["ETag"]
+    other = client.get("/stats/regions?annee=2022", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["ETag"] != etag
+    # Meme requete dans un autre format : autre ETag
+    assert client.get(URL + "&format=columns").headers["ETag"] != etag
+
+
+def test_nouvelle_version_des_donnees(client, empty_cache, publish):
+    etag = client.get(URL).headers["ETag"]
+    publish()
+
+    response = client.get(URL, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.headers["ETag"] != etag
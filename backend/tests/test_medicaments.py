@@ -0,0 +1,50 @@
+"""
+GET /medicaments/ : pagination par curseur (en-tete X-Next-Cursor) et skip
+"""
+
+import pytest
+
+from conftest import NB_MEDICAMENTS
+
+
+def _pages(client, order, limit):
+    """Toutes les pages en suivant X-Next-Cursor"""
+    pages = []
+    params = {"limit": limit, "order": order}
+    while True:
+        response = client.get("/medicaments/", params=params)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+        params["cursor"] = cursor
+
+
+@pytest.mark.parametrize("order", ["id", "nom"])
+def test_curseur_parcourt_tout_le_catalogue(client, no_cache, order):
+    pages = _pages(client, order, limit=70)
+    medicaments = [m for page in pages for m in page]
+
+    ids = [m["id"] for m in medicaments]
+    assert len(ids) == len(set(ids)) == NB_MEDICAMENTS
+    if order == "nom":
+        cles = [(m["nom_medicament"], m["id"]) for m in medicaments]
+    else:
+        cles = ids
+    assert cles == sorted(cles)
+    # Pages pleines sauf la derniere
+    assert all(len(page) == 70 for page in pages[:-1])
+
+
+def test_skip_reste_accepte(client, no_cache):
+    tous = [m["id"] for m in client.get("/medicaments/", params={"limit": 50}).json()]
+    page = client.get("/medicaments/", params={"limit": 5, "skip": 10})
+    assert [m["id"] for m in page.json()] == tous[10:15]
+
+
+def test_curseur_invalide(client, no_cache):
+    cursor = client.get("/medicaments/", params={"limit": 5}).headers["X-Next-Cursor"]
+    # Curseur d'un autre tri
+    assert client.get("/medicaments/", params={"order": "nom", "cursor": cursor}).status_code == 400
+    assert client.get("/medicaments/", params={"cursor": "pas-un-curseur"}).status_code == 400
@@ -0,0 +1,87 @@
+"""
+Routes /stats : memes reponses avec STATS_ENGINE=sql (rollups ou agregation
+directe) et STATS_ENGINE=memory, egalites du top-N departagees par id
+"""
+
+import pytest
+
+import stats_engine
+from conftest import ANNEE_EGALITES, MEDICAMENTS_EGALITES
+
+from app import analytics, config
+from app.routers import stats
+
+
+@pytest.fixture
+def sql_source(request, monkeypatch):
+    """Rollups a jour (defaut) ou ignores : agregation directe sur consommation"""
+    if request.param == "live":
+        monkeypatch.setattr(stats, "_rollup_a_jour", lambda rollup: False)
+    return request.param
+
+
+@pytest.fixture
+def snapshot(client, monkeypatch):
+    """Instantane du moteur en memoire, charge avant la premiere requete"""
+    monkeypatch.setattr(config, "STATS_ENGINE", "memory")
+    snapshot = analytics.engine.reload()
+    assert snapshot is not None
+    monkeypatch.setattr(config, "STATS_ENGINE", "sql")
+    return snapshot
+
+
+def _urls(snapshot):
+    return stats_engine.urls(snapshot) + [
+        f"/stats/medicaments/top?annee={ANNEE_EGALITES}&n=2",
+        f"/stats/regions?annee={ANNEE_EGALITES}",
+        f"/stats/region/{int(snapshot.region_codes[0])}?annee={ANNEE_EGALITES}&enrichi=true",
+        "/stats/timeseries?annee_debut=2022&annee_fin=2023&fenetre=2",
+        "/stats/batch?metrics=inconnue",
+    ]
+
+
+@pytest.mark.parametrize("sql_source", ["rollups", "live"], indirect=True)
+def test_sql_et_memoire_identiques(client, snapshot, sql_source, no_cache, monkeypatch):
+    differences = []
+    for url in _urls(snapshot):
+        responses = {}
+        for engine in ("sql", "memory"):
+            monkeypatch.setattr(config, "STATS_ENGINE", engine)
+            response = client.get(url)
+            responses[engine] = (response.status_code, response.content)
+        if not stats_engine.same_response(responses["sql"], responses["memory"]):
+            differences.append((url, responses["sql"], responses["memory"]))
+    assert differences == []
+
+
+def _codes_cip(client, medicament_ids):
+    return [client.get(f"/medicaments/{medicament_id}").json()["code_cip"] for medicament_id in medicament_ids]
+
+
+@pytest.mark.parametrize("source", ["rollups", "live", "memory"])
+@pytest.mark.parametrize("by", ["boites", "remb"])
+@pytest.mark.parametrize("code_region", [None, 5])
+def test_top_medicaments_egalites_par_id(client, snapshot, no_cache, monkeypatch, source, by, code_region):
+    if source == "live":
+        monkeypatch.setattr(stats, "_rollup_a_jour", lambda rollup: False)
+    elif source == "memory":
+        monkeypatch.setattr(config, "STATS_ENGINE", "memory")
+
+    url = f"/stats/medicaments/top?annee={ANNEE_EGALITES}&n=2&by={by}"
+    if code_region is not None:
+        url += f"&code_region={code_region}"
+    response = client.get(url)
+
+    assert response.status_code == 200
+    # Trois medicaments a egalite : les deux plus petits id, dans l'ordre des id
+    attendus = _codes_cip(client, sorted(MEDICAMENTS_EGALITES)[:2])
+    assert [m["code_cip"] for m in response.json()] == attendus
+
+
+def test_top_medicaments_classement_de_l_etl(client, no_cache, monkeypatch):
+    """Le classement precalcule et le top-N en direct renvoient la meme liste"""
+    url = "/stats/medicaments/top?annee=2023&n=20&by=boites"
+    classement = client.get(url).json()
+    monkeypatch.setattr(stats, "_rollup_a_jour", lambda rollup: False)
+    assert client.get(url).json() == classement
+    assert len(classement) == 20
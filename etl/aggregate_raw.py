@@ -0,0 +1,267 @@
+"""
+Agregation des fichiers bruts OpenMedic vers ../data/processed
+
+Produit, pour chaque annee, les fichiers lus par load_to_db.py
+(Parquet par defaut, CSV avec --format csv) :
+- agregation_regions_<annee>      (code_region, nom_region, total_boites, total_remb)
+- agregation_medicaments_<annee>  (code_cip, nom_medicament, total_boites, total_remb)
+- agregation_classes_<annee>      (code_atc, classe_therapeutique, total_boites, total_remb)
+
+Les fichiers bruts (plusieurs Go, separateur ';') sont lus par paquets :
+chaque paquet est agrege puis fusionne avec les agregats partiels, la memoire
+depend donc de la taille d'un paquet et du nombre de cles, pas du fichier.
+Chaque fichier est decoupe en plages d'octets traitees dans un pool de processus.
+
+Usage :
+    python aggregate_raw.py ../data/raw/OPEN_MEDIC_2023.CSV
+    python aggregate_raw.py ../data/raw/*.CSV --workers 8 --chunksize 500000
+"""
+
+import argparse
+import io
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from sources import FORMATS, write_source
+
+DATA_DIR = '../data/processed'
+
+# Lignes par paquet lu avec pandas
+CHUNK_SIZE = 500_000
+
+# Niveau ATC retenu pour les classes therapeutiques (ATC2 = sous-groupe therapeutique)
+ATC_LEVEL = 2
+
+# Noms des regions (BEN_REG), sans accents comme dans les fichiers agreges
+NOMS_REGIONS = {
+    5: "Outre-mer",
+    11: "Ile-de-France",
+    24: "Centre-Val de Loire",
+    27: "Bourgogne-Franche-Comte",
+    28: "Normandie",
+    32: "Hauts-de-France",
+    44: "Grand Est",
+    52: "Pays de la Loire",
+    53: "Bretagne",
+    75: "Nouvelle-Aquitaine",
+    76: "Occitanie",
+    84: "Auvergne-Rhone-Alpes",
+    93: "Provence-Alpes-Cote d'Azur",
+    94: "Corse",
+}
+
+# Codes region inconnus dans OpenMedic
+REGIONS_INCONNUES = {0, 9, 99}
+
+# Cle d'agregation -> (colonnes brutes, colonnes produites)
+AGREGATS = {
+    'regions': (['BEN_REG'], ['code_region']),
+    'medicaments': (['CIP13', 'L_CIP13'], ['code_cip', 'nom_medicament']),
+    'classes': ([f'ATC{ATC_LEVEL}', f'L_ATC{ATC_LEVEL}'], ['code_atc', 'classe_therapeutique']),
+}
+
+MESURES = ['BOITES', 'REM']
+
+RAW_DTYPES = {
+    'BEN_REG': 'int16',
+    'CIP13': 'string',
+    'L_CIP13': 'string',
+    f'ATC{ATC_LEVEL}': 'string',
+    f'L_ATC{ATC_LEVEL}': 'string',
+    'BOITES': 'int64',
+    'REM': 'float64',
+}
+
+# ============================================================
+# LECTURE PAR PLAGES D'OCTETS
+# ============================================================
+
+class _RangeReader(io.RawIOBase):
+    """Lecture binaire limitee a [start, end) d'un fichier"""
+
+    def __init__(self, path, start, end):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._remaining)
+        if size <= 0:
+            return 0
+        data = self._file.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def read_header(path, encoding='latin-1', sep=';'):
+    """Colonnes du fichier (en majuscules) et position de la premiere ligne de donnees"""
+    with open(path, 'rb') as f:
+        header = f.readline()
+        return [c.strip().upper() for c in header.decode(encoding).split(sep)], f.tell()
+
+
+def split_ranges(path, nb_ranges):
+    """Decoupe le fichier en plages d'octets alignees sur des fins de ligne"""
+    _, data_start = read_header(path)
+    size = os.path.getsize(path)
+    step = max((size - data_start) // max(nb_ranges, 1), 1)
+
+    bounds = [data_start]
+    with open(path, 'rb') as f:
+        for approx in range(data_start + step, size, step):
+            if approx <= bounds[-1]:
+                continue
+            f.seek(approx)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+# ============================================================
+# AGREGATION
+# ============================================================
+
+def _reduce(partials, kind):
+    """Fusionne des agregats partiels d'un meme type"""
+    keys = AGREGATS[kind][0]
+    df = pd.concat(partials, ignore_index=True)
+    code = keys[0]
+    agg = {m: 'sum' for m in MESURES}
+    # Le libelle peut varier d'une ligne a l'autre : on garde le premier
+    for label in keys[1:]:
+        agg[label] = 'first'
+    return df.groupby(code, sort=False, as_index=False).agg(agg)
+
+
+def aggregate_range(path, start, end, chunksize=CHUNK_SIZE):
+    """
+    Agrege une plage d'octets d'un fichier brut (execute dans un worker).
+    Retourne {type: DataFrame agrege}.
+    """
+    columns, _ = read_header(path)
+    wanted = set(MESURES)
+    for keys, _ in AGREGATS.values():
+        wanted.update(keys)
+    usecols = [i for i, c in enumerate(columns) if c in wanted]
+
+    reader = pd.read_csv(
+        io.TextIOWrapper(io.BufferedReader(_RangeReader(path, start, end)), encoding='latin-1'),
+        sep=';',
+        header=None,
+        names=columns,
+        usecols=usecols,
+        dtype={c: t for c, t in RAW_DTYPES.items() if c in columns},
+        decimal=',',
+        chunksize=chunksize,
+    )
+
+    partials = {kind: [] for kind in AGREGATS}
+    for chunk in reader:
+        for kind, (keys, _) in AGREGATS.items():
+            partials[kind].append(
+                chunk.groupby(keys, sort=False, as_index=False, dropna=False)[MESURES].sum()
+            )
+            # Garder les agregats partiels compacts
+            if len(partials[kind]) >= 8:
+                partials[kind] = [_reduce(partials[kind], kind)]
+
+    return {
+        kind: _reduce(dfs, kind) if dfs else None
+        for kind, dfs in partials.items()
+    }
+
+
+def _finalize(kind, df):
+    """Renomme et met en forme un agregat pour load_to_db.py"""
+    keys, names = AGREGATS[kind]
+    df = df.rename(columns=dict(zip(keys, names)))
+    df = df.rename(columns={'BOITES': 'total_boites', 'REM': 'total_remb'})
+
+    if kind == 'regions':
+        df = df[~df['code_region'].isin(REGIONS_INCONNUES)].copy()
+        df['nom_region'] = df['code_region'].map(NOMS_REGIONS).fillna('Inconnue')
+        names = ['code_region', 'nom_region']
+    else:
+        df = df.dropna(subset=[names[0]])
+
+    df['total_remb'] = df['total_remb'].round(2)
+    return df[names + ['total_boites', 'total_remb']].sort_values('total_remb', ascending=False)
+
+
+def year_of(path):
+    """Annee d'un fichier brut (ex: OPEN_MEDIC_2023.CSV)"""
+    match = re.search(r'(\d{4})', os.path.basename(path))
+    if not match:
+        raise ValueError(f"Annee introuvable dans le nom du fichier: {path}")
+    return int(match.group(1))
+
+
+def aggregate_files(paths, output_dir=DATA_DIR, workers=None, splits=None, chunksize=CHUNK_SIZE,
+                    fmt='parquet'):
+    """
+    Agrege les fichiers bruts en parallele et ecrit les fichiers agreges par annee.
+    splits : nombre de plages par fichier (par defaut le nombre de workers).
+    Retourne la liste des fichiers ecrits.
+    """
+    workers = workers or os.cpu_count()
+    splits = splits or workers
+
+    tasks = []
+    for path in paths:
+        for start, end in split_ranges(path, splits):
+            tasks.append((year_of(path), path, start, end))
+
+    print(f"   {len(paths)} fichier(s), {len(tasks)} plage(s), {workers} worker(s)")
+
+    partials = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            (annee, pool.submit(aggregate_range, path, start, end, chunksize))
+            for annee, path, start, end in tasks
+        ]
+        for annee, future in futures:
+            for kind, df in future.result().items():
+                if df is not None:
+                    partials.setdefault((annee, kind), []).append(df)
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for (annee, kind), dfs in sorted(partials.items()):
+        df = _finalize(kind, _reduce(dfs, kind))
+        path = write_source(df, output_dir, kind, annee, fmt)
+        print(f"   ✅ {path} ({len(df)} lignes)")
+        written.append(path)
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Agregation des fichiers bruts OpenMedic")
+    parser.add_argument('files', nargs='+', help="Fichiers OpenMedic bruts (separateur ';')")
+    parser.add_argument('--output', default=DATA_DIR, help="Dossier des fichiers agreges")
+    parser.add_argument('--workers', type=int, default=None, help="Nombre de processus")
+    parser.add_argument('--splits', type=int, default=None, help="Plages par fichier")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE, help="Lignes par paquet")
+    parser.add_argument('--format', choices=FORMATS, default='parquet', help="Format des fichiers agreges")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("AGREGATION DES FICHIERS OPENMEDIC")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    aggregate_files(args.files, args.output, args.workers, args.splits, args.chunksize, args.format)
+    print(f"\n✅ Agregation terminee en {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,153 @@
+"""
+Benchmark du chargement (load_to_db) sur des entrees de taille croissante
+
+Pour chaque facteur (1x, 10x, 100x de --base lignes par fichier) :
+- generation des fichiers agregation_{regions,medicaments,classes}_<annee>
+  (codes region repetes : le merge de resolution des regions travaille sur
+  toutes les lignes ; ~5 % de codes CIP en double pour le dedoublonnage)
+- base vide (SQLite temporaire par defaut, ou --database-url, videe !)
+- pipeline complet load_to_db.run, dans un processus separe : le pic de
+  memoire mesure est propre a chaque taille
+
+Affiche les lignes/s de chaque etape a chaque taille et l'efficacite
+(debit au plus grand facteur / debit a 1x) : l'etape dont l'efficacite chute
+le plus est la premiere a ne plus passer a l'echelle.
+
+Usage :
+    cd etl
+    python benchmark_load.py --base 10000 --facteurs 1 10 100 --format parquet
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from sources import write_source
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+
+ANNEE = 2023
+
+REGIONS = {
+    5: "Outre-mer", 11: "Ile-de-France", 24: "Centre-Val de Loire", 27: "Bourgogne-Franche-Comte",
+    28: "Normandie", 32: "Hauts-de-France", 44: "Grand Est", 52: "Pays de la Loire", 53: "Bretagne",
+    75: "Nouvelle-Aquitaine", 76: "Occitanie", 84: "Auvergne-Rhone-Alpes",
+    93: "Provence-Alpes-Cote d'Azur", 94: "Corse",
+}
+
+
+def generate_inputs(data_dir, nb_lignes, fmt, seed=42):
+    """Ecrit les trois fichiers d'une annee, nb_lignes lignes chacun"""
+    rng = np.random.default_rng(seed)
+    codes = np.array(list(REGIONS))
+
+    code_region = rng.choice(codes, nb_lignes)
+    regions = pd.DataFrame({
+        'code_region': code_region,
+        'nom_region': pd.Series(code_region).map(REGIONS),
+        'total_boites': rng.integers(1, 1_000_000, nb_lignes),
+        'total_remb': np.round(rng.uniform(1, 1e7, nb_lignes), 2),
+    })
+
+    # ~5 % de codes en double
+    numeros = np.arange(nb_lignes)
+    doublons = rng.random(nb_lignes) < 0.05
+    numeros[doublons] = rng.integers(0, nb_lignes, doublons.sum())
+    medicaments = pd.DataFrame({
+        'code_cip': np.char.add('34009', np.char.zfill(numeros.astype(str), 8)),
+        'nom_medicament': np.char.add('MEDICAMENT ', numeros.astype(str)),
+    })
+
+    numeros_atc = rng.integers(0, max(nb_lignes // 10, 1), nb_lignes)
+    classes = pd.DataFrame({
+        'code_atc': np.char.add('X', np.char.zfill(numeros_atc.astype(str), 6)),
+        'classe_therapeutique': np.char.add('CLASSE ', numeros_atc.astype(str)),
+    })
+
+    for kind, df in (('regions', regions), ('medicaments', medicaments), ('classes', classes)):
+        write_source(df, data_dir, kind, ANNEE, fmt)
+
+
+def run_scale(database_url, nb_lignes, fmt):
+    """Un facteur : base vide, fichiers generes, pipeline profile (processus dedie)"""
+    os.environ['DATABASE_URL'] = database_url
+    sys.path.insert(0, BACKEND_DIR)
+    from sqlalchemy import create_engine
+    from app import models
+    from load_to_db import run, resolve_sources
+    from profiling import Profiler
+
+    engine = create_engine(database_url)
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        generate_inputs(data_dir, nb_lignes, fmt)
+        profiler = Profiler()
+        # Sortie du pipeline masquee : seul le rapport final est affiche
+        with contextlib.redirect_stdout(io.StringIO()):
+            run(engine, resolve_sources([], data_dir=data_dir), force=True, profiler=profiler)
+
+    engine.dispose()
+    return profiler.as_dicts()
+
+
+def print_report(base, facteurs, results):
+    stages = list(dict.fromkeys(s['stage'] for stages in results.values() for s in stages))
+    by_stage = {f: {s['stage']: s for s in results[f]} for f in facteurs}
+
+    header = f"{'etape':<24}" + "".join(f"{f'{f}x lignes/s':>16}" for f in facteurs)
+    print(header + f"{'pic RSS':>10}{'efficacite':>12}")
+    for stage in stages:
+        rates = [by_stage[f].get(stage, {}).get('rows_per_s') for f in facteurs]
+        line = f"{stage:<24}" + "".join(f"{rate:>16,}".replace(',', ' ') if rate else f"{'-':>16}" for rate in rates)
+        rss = by_stage[facteurs[-1]].get(stage, {}).get('peak_rss_mb')
+        line += f"{rss:>7.0f} Mo" if rss is not None else f"{'-':>10}"
+        if rates[0] and rates[-1]:
+            line += f"{rates[-1] / rates[0]:>11.2f}x"
+        print(line)
+
+    print(f"\nDurees (s) : " + ", ".join(
+        f"{f}x ({base * f:,} lignes) = {sum(s['seconds'] for s in results[f]):.1f}".replace(',', ' ')
+        for f in facteurs
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du chargement par etape")
+    parser.add_argument('--base', type=int, default=10_000, help="Lignes par fichier au facteur 1")
+    parser.add_argument('--facteurs', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--format', choices=['parquet', 'csv'], default='parquet')
+    parser.add_argument('--database-url', help="Base de test (VIDEE a chaque facteur) ; SQLite temporaire par defaut")
+    parser.add_argument('--output', help="Resultats JSON")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for facteur in args.facteurs:
+            database_url = args.database_url or f"sqlite:///{os.path.join(tmp, f'bench_{facteur}.db')}"
+            nb_lignes = args.base * facteur
+            print(f"⏱️  {facteur}x : {nb_lignes:,} lignes par fichier...".replace(',', ' '))
+            # Processus neuf par facteur (spawn) : pic RSS independant
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                results[facteur] = pool.submit(run_scale, database_url, nb_lignes, args.format).result()
+
+    print()
+    print_report(args.base, args.facteurs, results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"base": args.base, "format": args.format, "resultats": results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Chargement en masse d'un DataFrame dans une table
+
+- PostgreSQL : COPY FROM STDIN par paquets dans une table de staging
+  temporaire, puis INSERT ... SELECT vers la table cible (une transaction)
+- Autres bases (SQLite) : executemany par paquets
+"""
+
+import io
+import time
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Nombre de lignes envoyees par paquet (memoire bornee cote client)
+CHUNK_SIZE = 100_000
+
+
+def _iter_chunks(df, chunk_size):
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def _copy_postgres(conn, df, table, columns, chunk_size, on_conflict):
+    """COPY vers une table de staging puis fusion dans la table cible"""
+    staging = f"_staging_{table}"
+    cols = ", ".join(columns)
+
+    conn.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+    conn.execute(text(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {cols} FROM {table} LIMIT 0"
+    ))
+
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        for chunk in _iter_chunks(df, chunk_size):
+            buffer = io.StringIO()
+            chunk.to_csv(buffer, index=False, header=False, na_rep="")
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {staging} ({cols}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+    merge = f"INSERT INTO {table} ({cols}) SELECT {cols} FROM {staging}"
+    if on_conflict:
+        merge += f" {on_conflict}"
+    conn.execute(text(merge))
+
+
+def _executemany(conn, df, table, columns, chunk_size, on_conflict):
+    """Fallback generique : INSERT parametre execute par paquets"""
+    placeholders = ", ".join(f":{c}" for c in columns)
+    insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+    if on_conflict:
+        insert += f" {on_conflict}"
+
+    for chunk in _iter_chunks(df, chunk_size):
+        # tolist() renvoie des scalaires Python (les drivers refusent numpy.int64)
+        values = {}
+        for c in columns:
+            col = chunk[c].tolist()
+            if chunk[c].hasnans:
+                col = [None if pd.isna(v) else v for v in col]
+            values[c] = col
+        records = [dict(zip(columns, row)) for row in zip(*values.values())]
+        if records:
+            conn.execute(text(insert), records)
+
+
+def bulk_load(df, table, bind, chunk_size=CHUNK_SIZE, on_conflict=None):
+    """
+    Insere toutes les lignes de df dans table et affiche le debit (lignes/s).
+
+    bind : Engine (transaction dediee) ou Connection (transaction de l'appelant,
+    pour remplacer une partition de facon atomique).
+
+    on_conflict : clause optionnelle ajoutee a l'INSERT final
+    (ex: "ON CONFLICT (code_cip) DO NOTHING").
+    Retourne le nombre de lignes envoyees.
+    """
+    columns = list(df.columns)
+    start = time.perf_counter()
+
+    load = _copy_postgres if bind.dialect.name == "postgresql" else _executemany
+
+    if isinstance(bind, Connection):
+        load(bind, df, table, columns, chunk_size, on_conflict)
+    else:
+        with bind.begin() as conn:
+            load(conn, df, table, columns, chunk_size, on_conflict)
+
+    elapsed = time.perf_counter() - start
+    debit = len(df) / elapsed if elapsed > 0 else float("inf")
+    print(f"   ⏱️  {table}: {len(df):,} lignes en {elapsed:.2f}s ({debit:,.0f} lignes/s)".replace(',', ' '))
+    return len(df)
@@ -1,164 +1,330 @@
 """
 Script pour charger les donnees agregees dans PostgreSQL (Supabase)
+
+Chargement incremental et idempotent :
+- chaque fichier source est une partition, identifiee par son empreinte
+  dans la table etl_manifest ; les partitions inchangees sont ignorees
+- regions, medicaments et classes sont inseres en upsert (ON CONFLICT)
+- la consommation d'une annee modifiee est remplacee dans une seule transaction
+
+Les fichiers agreges sont lus en Parquet si disponible, sinon en CSV.
+
+Le pipeline est importable (run) ; chaque etape (lecture, dedoublonnage,
+resolution des regions, ecriture de chaque table, rollups, verification)
+est mesuree : duree, lignes/s et pic de memoire (cf. profiling.py et
+benchmark_load.py).
+
+Usage :
+    python load_to_db.py                 # toutes les annees de ../data/processed
+    python load_to_db.py 2022 2023       # annees choisies
+    python load_to_db.py chemin/agregation_regions_2024.parquet
+    python load_to_db.py --force 2023    # recharger meme si inchange
 """
 
+import argparse
+import glob
+import re
 import pandas as pd
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 import os
+from rollups import refresh_rollups, check_rollups
+from bulk_load import bulk_load
+from manifest import create_manifest_table, file_hash, get_loaded_hash, record_partition, next_data_version, bump_data_version
+from sources import find_source, read_source
+from profiling import Profiler
 
-# Charger les variables d'environnement
-load_dotenv()
+DATA_DIR = '../data/processed'
 
-# URL de connexion PostgreSQL
-DATABASE_URL = os.getenv('DATABASE_URL')
-
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL non trouvee dans le fichier .env")
-
-print("=" * 60)
-print("CHARGEMENT DES DONNEES DANS POSTGRESQL")
-print("=" * 60)
-
-# Creer la connexion
-engine = create_engine(DATABASE_URL)
-
-# Test de connexion
-print("\n1. Test de connexion...")
-try:
-    with engine.connect() as conn:
-        result = conn.execute(text("SELECT version();"))
-        version = result.fetchone()[0]
-        print(f"   ✅ Connexion reussie !")
-        print(f"   PostgreSQL version: {version[:50]}...")
-except Exception as e:
-    print(f"   ❌ Erreur de connexion: {e}")
-    exit(1)
+# agregation_<type>_<annee>.parquet|csv
+SOURCE_PATTERN = re.compile(r"agregation_(regions|medicaments|classes)_(\d{4})\.(parquet|csv)$")
 
 # ============================================================
-# CHARGER LES REGIONS
+# CHARGEMENT D'UNE PARTITION
 # ============================================================
-print("\n2. Chargement des regions...")
 
-# Charger le CSV
-agg_region = pd.read_csv('../data/processed/agregation_regions_2023.csv')
-
-# Preparer les donnees regions (sans doublons)
-df_regions = agg_region[['code_region', 'nom_region']].drop_duplicates()
+def load_regions(conn, path, annee, profiler):
+    """Upsert des regions et remplacement de la consommation de l'annee"""
+    with profiler.stage('lecture') as stage:
+        agg_region = read_source(path, ['code_region', 'nom_region', 'total_boites', 'total_remb'])
+        stage.rows = len(agg_region)
+
+    # Preparer les donnees regions (sans doublons)
+    with profiler.stage('dedoublonnage', rows=len(agg_region)):
+        df_regions = agg_region[['code_region', 'nom_region']].drop_duplicates(subset='code_region')
+    print(f"   {len(df_regions)} regions")
+    with profiler.stage('ecriture_regions', rows=len(df_regions)):
+        bulk_load(df_regions, 'regions', conn,
+                  on_conflict="ON CONFLICT (code_region) DO UPDATE SET nom_region = EXCLUDED.nom_region")
+
+    with profiler.stage('resolution_regions', rows=len(agg_region)):
+        # Recuperer les ID des regions depuis la DB
+        regions_db = pd.read_sql(text("SELECT id, code_region FROM regions"), conn)
+
+        # Merge pour obtenir les region_id
+        consommation_data = agg_region.merge(regions_db, on='code_region')
+
+        # On utilise medicament_id = NULL pour indiquer que c'est un agrege total par region
+        df_consommation = pd.DataFrame({
+            'region_id': consommation_data['id'],
+            'medicament_id': None,  # Pas de medicament specifique (agrege total)
+            'annee': annee,
+            'total_boites': consommation_data['total_boites'],
+            'total_remb': consommation_data['total_remb']
+        })
+
+    with profiler.stage('ecriture_consommation', rows=len(df_consommation)):
+        # Remplacer les lignes de l'annee issues de cette partition
+        conn.execute(
+            text("DELETE FROM consommation WHERE annee = :annee AND medicament_id IS NULL"),
+            {"annee": annee}
+        )
+        print(f"   {len(df_consommation)} lignes de consommation")
+        bulk_load(df_consommation, 'consommation', conn)
+
+    return len(df_consommation)
+
+def load_medicaments(conn, path, annee, profiler):
+    """Upsert des medicaments"""
+    with profiler.stage('lecture') as stage:
+        df_medicaments = read_source(path, ['code_cip', 'nom_medicament'])
+        stage.rows = len(df_medicaments)
+    with profiler.stage('dedoublonnage', rows=len(df_medicaments)):
+        df_medicaments = df_medicaments.drop_duplicates(subset='code_cip')
+    print(f"   {len(df_medicaments)} medicaments")
+    with profiler.stage('ecriture_medicaments', rows=len(df_medicaments)):
+        bulk_load(df_medicaments, 'medicaments', conn,
+                  on_conflict="ON CONFLICT (code_cip) DO UPDATE SET nom_medicament = EXCLUDED.nom_medicament")
+
+        # Index pour la pagination par curseur de GET /medicaments/?order=nom
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_medicaments_nom_id ON medicaments (nom_medicament, id)"
+        ))
+
+    return len(df_medicaments)
+
+def load_classes(conn, path, annee, profiler):
+    """Upsert des classes therapeutiques"""
+    with profiler.stage('lecture') as stage:
+        df_classes = read_source(path, ['code_atc', 'classe_therapeutique'])
+        stage.rows = len(df_classes)
+    with profiler.stage('dedoublonnage', rows=len(df_classes)):
+        df_classes = df_classes.drop_duplicates(subset='code_atc')
+    df_classes.columns = ['code_atc', 'nom_classe']
+    print(f"   {len(df_classes)} classes")
+    with profiler.stage('ecriture_classes', rows=len(df_classes)):
+        bulk_load(df_classes, 'classes_therapeutiques', conn,
+                  on_conflict="ON CONFLICT (code_atc) DO UPDATE SET nom_classe = EXCLUDED.nom_classe")
+
+    return len(df_classes)
+
+# Ordre de chargement : la consommation reference les regions
+LOADERS = {
+    'regions': load_regions,
+    'medicaments': load_medicaments,
+    'classes': load_classes,
+}
+
+def resolve_sources(args, data_dir=DATA_DIR):
+    """Liste de (type, annee, chemin) a partir des annees et/ou fichiers demandes"""
+    if not args:
+        args = sorted(glob.glob(os.path.join(data_dir, 'agregation_regions_*')))
+        args = sorted({SOURCE_PATTERN.search(path).group(2) for path in args if SOURCE_PATTERN.search(path)})
+
+    sources = []
+    for arg in args:
+        if arg.isdigit():
+            for kind in LOADERS:
+                path = find_source(data_dir, kind, arg)
+                if path:
+                    sources.append((kind, int(arg), path))
+        else:
+            match = SOURCE_PATTERN.search(os.path.basename(arg))
+            if not match:
+                raise ValueError(f"Nom de fichier non reconnu: {arg}")
+            sources.append((match.group(1), int(match.group(2)), arg))
+
+    # Regions avant le reste, puis par annee
+    kinds = list(LOADERS)
+    return sorted(set(sources), key=lambda s: (s[1], kinds.index(s[0])))
+
+def load_partition(engine, kind, annee, path, force=False, profiler=None):
+    """
+    Charge une partition si son empreinte a change.
+    Tout (donnees + manifeste) est ecrit dans une seule transaction.
+    Retourne True si la partition a ete chargee.
+    """
+    profiler = profiler or Profiler()
+    partition = os.path.basename(path)
+    with profiler.stage('empreinte'):
+        hash_ = file_hash(path)
 
-print(f"   {len(df_regions)} regions a charger")
+    with engine.begin() as conn:
+        if not force and get_loaded_hash(conn, partition) == hash_:
+            print(f"   ⏭️  {partition} inchangee")
+            return False
 
-# Charger dans PostgreSQL
-df_regions.to_sql('regions', engine, if_exists='append', index=False)
+        print(f"   📥 {partition}")
+        nb_lignes = LOADERS[kind](conn, path, annee, profiler)
+        record_partition(conn, partition, annee, hash_, nb_lignes)
 
-print("   ✅ Regions chargees")
+    return True
 
 # ============================================================
-# CHARGER LES MEDICAMENTS
+# PIPELINE
 # ============================================================
-print("\n3. Chargement des medicaments...")
-
-# Charger le CSV
-agg_medic = pd.read_csv('../data/processed/agregation_medicaments_2023.csv')
-
-# Preparer les donnees medicaments
-df_medicaments = agg_medic[['code_cip', 'nom_medicament']].drop_duplicates()
 
-print(f"   {len(df_medicaments)} medicaments a charger")
-
-# Charger dans PostgreSQL
-df_medicaments.to_sql('medicaments', engine, if_exists='append', index=False)
+def test_connection(engine):
+    """Nom et version du serveur de base de donnees"""
+    with engine.connect() as conn:
+        if engine.dialect.name == 'postgresql':
+            version = conn.execute(text("SELECT version();")).scalar()
+        elif engine.dialect.name == 'sqlite':
+            version = "SQLite " + conn.execute(text("SELECT sqlite_version();")).scalar()
+        else:
+            version = f"{engine.dialect.name} {'.'.join(map(str, conn.dialect.server_version_info or ()))}"
+    return version
+
+def count_rows(engine):
+    """Nombre de lignes des tables principales"""
+    with engine.connect() as conn:
+        return {
+            table: conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+            for table in ('regions', 'medicaments', 'classes_therapeutiques', 'consommation')
+        }
 
-print("   ✅ Medicaments charges")
+def run(engine, sources, force=False, profiler=None):
+    """
+    Charge les partitions modifiees, reconstruit les rollups, verifie et publie
+    la nouvelle version des donnees. Retourne un resume du chargement.
+    Leve RuntimeError si les rollups sont incoherents avec la consommation.
+    """
+    profiler = profiler or Profiler()
+
+    print("\n2. Chargement des partitions...")
+    create_manifest_table(engine)
+
+    nb_chargees = 0
+    for kind, annee, path in sources:
+        if load_partition(engine, kind, annee, path, force=force, profiler=profiler):
+            nb_chargees += 1
+
+    print(f"   ✅ {nb_chargees} partition(s) chargee(s), {len(sources) - nb_chargees} inchangee(s)")
+
+    print("\n3. Reconstruction des agregats (rollups)...")
+    if nb_chargees:
+        with profiler.stage('rollups'):
+            nb_annees = refresh_rollups(engine, next_data_version(engine))
+        print(f"   ✅ Rollups reconstruits ({nb_annees} annee(s))")
+    else:
+        print("   ⏭️  Aucune donnee modifiee, rollups conserves")
+
+    print("\n4. Verification des donnees chargees...")
+    with profiler.stage('verification') as stage:
+        counts = count_rows(engine)
+        stage.rows = counts['consommation']
+        ecarts = check_rollups(engine)
+
+    print(f"\n   📊 Regions: {counts['regions']}")
+    print(f"   📊 Medicaments: {counts['medicaments']}")
+    print(f"   📊 Classes therapeutiques: {counts['classes_therapeutiques']}")
+    print(f"   📊 Consommation: {counts['consommation']}")
+
+    # Coherence rollups / table brute
+    if ecarts:
+        print("\n   ❌ Rollups incoherents avec la table consommation :")
+        for table, annee, colonne, source, rollup in ecarts:
+            print(f"      {table} {annee} {colonne}: source={source} rollup={rollup}")
+        raise RuntimeError("Rollups incoherents avec la table consommation")
+    print("   ✅ Rollups coherents avec la table consommation")
+
+    # Publier la nouvelle version : l'API invalide son cache
+    version = None
+    if nb_chargees:
+        version = bump_data_version(engine)
+        print(f"   ✅ Version des donnees publiee: {version}")
+
+    return {"partitions_chargees": nb_chargees, "lignes": counts, "version": version}
+
+def print_top_regions(engine, annee):
+    """Requete de test : top 3 des regions par montant rembourse"""
+    with engine.connect() as conn:
+        query = text("""
+        SELECT r.nom_region, c.total_boites, c.total_remb
+        FROM consommation c
+        JOIN regions r ON c.region_id = r.id
+        WHERE c.annee = :annee
+        ORDER BY c.total_remb DESC
+        LIMIT 3
+        """)
+
+        result = pd.read_sql(query, conn, params={"annee": annee})
+        print(f"\n   🏆 TOP 3 REGIONS ({annee}) :")
+        for idx, row in result.iterrows():
+            print(f"      {row['nom_region']:30s} {int(row['total_boites']):15,} boites  {float(row['total_remb']):15,.2f} EUR".replace(',', ' '))
 
 # ============================================================
-# CHARGER LES CLASSES THERAPEUTIQUES
+# SCRIPT
 # ============================================================
-print("\n4. Chargement des classes therapeutiques...")
 
-# Charger le CSV
-agg_atc = pd.read_csv('../data/processed/agregation_classes_2023.csv')
+def main():
+    parser = argparse.ArgumentParser(description="Chargement incremental des agregats OpenMedic")
+    parser.add_argument('sources', nargs='*', help="Annees (ex: 2023) ou fichiers agregation_*_<annee>.parquet|csv")
+    parser.add_argument('--force', action='store_true', help="Recharger meme les partitions inchangees")
+    args = parser.parse_args()
 
-# Preparer les donnees
-df_classes = agg_atc[['code_atc', 'classe_therapeutique']].drop_duplicates()
-df_classes.columns = ['code_atc', 'nom_classe']
+    # Charger les variables d'environnement
+    load_dotenv()
 
-print(f"   {len(df_classes)} classes a charger")
+    # URL de connexion PostgreSQL
+    database_url = os.getenv('DATABASE_URL')
 
-# Charger dans PostgreSQL
-df_classes.to_sql('classes_therapeutiques', engine, if_exists='append', index=False)
+    if not database_url:
+        raise ValueError("DATABASE_URL non trouvee dans le fichier .env")
 
-print("   ✅ Classes therapeutiques chargees")
+    print("=" * 60)
+    print("CHARGEMENT DES DONNEES DANS POSTGRESQL")
+    print("=" * 60)
 
-# ============================================================
-# CHARGER LA CONSOMMATION PAR REGION
-# ============================================================
-print("\n5. Chargement de la consommation par region...")
+    # Creer la connexion
+    engine = create_engine(database_url)
 
-# Recuperer les ID des regions depuis la DB
-with engine.connect() as conn:
-    regions_db = pd.read_sql("SELECT id, code_region FROM regions", conn)
+    # Test de connexion
+    print("\n1. Test de connexion...")
+    try:
+        version = test_connection(engine)
+        print(f"   ✅ Connexion reussie !")
+        print(f"   Version: {version[:50]}...")
+    except Exception as e:
+        print(f"   ❌ Erreur de connexion: {e}")
+        exit(1)
 
-# Merge pour obtenir les region_id
-consommation_data = agg_region.merge(regions_db, on='code_region')
+    sources = resolve_sources(args.sources)
+    if not sources:
+        print(f"   ❌ Aucun fichier a charger dans {DATA_DIR}")
+        exit(1)
 
-# Preparer le DataFrame pour la table consommation
-# On utilise medicament_id = NULL pour indiquer que c'est un agrege total par region
-df_consommation = pd.DataFrame({
-    'region_id': consommation_data['id'],
-    'medicament_id': None,  # Pas de medicament specifique (agrege total)
-    'annee': 2023,
-    'total_boites': consommation_data['total_boites'],
-    'total_remb': consommation_data['total_remb']
-})
+    profiler = Profiler()
+    try:
+        run(engine, sources, force=args.force, profiler=profiler)
+    except RuntimeError:
+        exit(1)
 
-print(f"   {len(df_consommation)} lignes de consommation a charger")
+    print("\n   ⏱️  Duree par etape :")
+    profiler.report()
 
-# Charger dans PostgreSQL
-df_consommation.to_sql('consommation', engine, if_exists='append', index=False)
+    print("\n" + "=" * 60)
+    print("✅ CHARGEMENT TERMINE AVEC SUCCES !")
+    print("=" * 60)
 
-print("   ✅ Consommation chargee")
+    # ============================================================
+    # REQUETES DE TEST
+    # ============================================================
+    print("\n5. Test de quelques requetes...")
 
-# ============================================================
-# VERIFICATION
-# ============================================================
-print("\n6. Verification des donnees chargees...")
-
-with engine.connect() as conn:
-    # Compter les lignes
-    count_regions = conn.execute(text("SELECT COUNT(*) FROM regions")).fetchone()[0]
-    count_medic = conn.execute(text("SELECT COUNT(*) FROM medicaments")).fetchone()[0]
-    count_classes = conn.execute(text("SELECT COUNT(*) FROM classes_therapeutiques")).fetchone()[0]
-    count_conso = conn.execute(text("SELECT COUNT(*) FROM consommation")).fetchone()[0]
-    
-    print(f"\n   📊 Regions: {count_regions}")
-    print(f"   📊 Medicaments: {count_medic}")
-    print(f"   📊 Classes therapeutiques: {count_classes}")
-    print(f"   📊 Consommation: {count_conso}")
-
-print("\n" + "=" * 60)
-print("✅ CHARGEMENT TERMINE AVEC SUCCES !")
-print("=" * 60)
+    print_top_regions(engine, max(annee for _, annee, _ in sources))
 
-# ============================================================
-# REQUETES DE TEST
-# ============================================================
-print("\n7. Test de quelques requetes...")
-
-with engine.connect() as conn:
-    # Top 3 regions par montant rembourse
-    query = """
-    SELECT r.nom_region, c.total_boites, c.total_remb
-    FROM consommation c
-    JOIN regions r ON c.region_id = r.id
-    WHERE c.annee = 2023
-    ORDER BY c.total_remb DESC
-    LIMIT 3
-    """
-    
-    result = pd.read_sql(query, conn)
-    print("\n   🏆 TOP 3 REGIONS (2023) :")
-    for idx, row in result.iterrows():
-        print(f"      {row['nom_region']:30s} {int(row['total_boites']):15,} boites  {float(row['total_remb']):15,.2f} EUR".replace(',', ' '))
+    print("\n✅ Tout fonctionne correctement !")
 
-print("\n✅ Tout fonctionne correctement !")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Manifeste de chargement : empreinte de chaque partition deja chargee
+
+Une partition est un fichier source (ex: agregation_regions_2023.csv).
+Si son empreinte n'a pas change depuis le dernier chargement, elle est ignoree.
+"""
+
+import hashlib
+
+from sqlalchemy import text
+
+DDL_MANIFEST = """
+    CREATE TABLE IF NOT EXISTS etl_manifest (
+        partition VARCHAR(200) PRIMARY KEY,
+        annee INTEGER,
+        hash VARCHAR(64) NOT NULL,
+        nb_lignes INTEGER NOT NULL,
+        loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+DDL_DATA_VERSION = """
+    CREATE TABLE IF NOT EXISTS data_version (
+        id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def create_manifest_table(engine):
+    """Cree les tables etl_manifest et data_version si elles n'existent pas"""
+    with engine.begin() as conn:
+        conn.execute(text(DDL_MANIFEST))
+        conn.execute(text(DDL_DATA_VERSION))
+
+
+def file_hash(path, block_size=1 << 20):
+    """Empreinte SHA-256 d'un fichier, lu par blocs"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_loaded_hash(conn, partition):
+    """Empreinte enregistree pour la partition (None si jamais chargee)"""
+    return conn.execute(
+        text("SELECT hash FROM etl_manifest WHERE partition = :partition"),
+        {"partition": partition}
+    ).scalar()
+
+
+def record_partition(conn, partition, annee, hash_, nb_lignes):
+    """Enregistre (ou met a jour) la partition dans le manifeste"""
+    conn.execute(text("""
+        INSERT INTO etl_manifest (partition, annee, hash, nb_lignes, loaded_at)
+        VALUES (:partition, :annee, :hash, :nb_lignes, CURRENT_TIMESTAMP)
+        ON CONFLICT (partition) DO UPDATE SET
+            annee = EXCLUDED.annee,
+            hash = EXCLUDED.hash,
+            nb_lignes = EXCLUDED.nb_lignes,
+            loaded_at = EXCLUDED.loaded_at
+    """), {"partition": partition, "annee": annee, "hash": hash_, "nb_lignes": nb_lignes})
+
+
+def next_data_version(engine):
+    """Version que publiera le prochain bump_data_version (marqueur des rollups)"""
+    with engine.connect() as conn:
+        version = conn.execute(text("SELECT version FROM data_version WHERE id = 1")).scalar()
+    return (version or 0) + 1
+
+
+def bump_data_version(engine):
+    """
+    Incremente la version des donnees : l'API vide alors son cache
+    et change ses ETag. Retourne la nouvelle version.
+    """
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO data_version (id, version, updated_at)
+            VALUES (1, 1, CURRENT_TIMESTAMP)
+            ON CONFLICT (id) DO UPDATE SET
+                version = data_version.version + 1,
+                updated_at = CURRENT_TIMESTAMP
+        """))
+        return conn.execute(text("SELECT version FROM data_version WHERE id = 1")).scalar()
@@ -0,0 +1,91 @@
+"""
+Mesure des etapes du pipeline ETL : duree, debit et memoire
+
+    profiler = Profiler()
+    with profiler.stage("lecture") as stage:
+        df = read_source(path)
+        stage.rows = len(df)
+    profiler.report()
+
+Pour chaque etape : temps ecoule, lignes/s et pic de memoire (RSS) du
+processus a la fin de l'etape, avec l'augmentation due a l'etape.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Pic de memoire residente du processus (Mo), None si indisponible"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Ko sous Linux, octets sous macOS
+    return round(peak / 1024 / (1024 if sys.platform == "darwin" else 1), 1)
+
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.seconds = 0.0
+        self.peak_rss_mb = None
+        self.rss_growth_mb = None
+
+    @property
+    def rows_per_s(self):
+        if not self.rows or not self.seconds:
+            return None
+        return round(self.rows / self.seconds)
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "rows": self.rows,
+            "seconds": round(self.seconds, 4),
+            "rows_per_s": self.rows_per_s,
+            "peak_rss_mb": self.peak_rss_mb,
+            "rss_growth_mb": self.rss_growth_mb,
+        }
+
+
+class Profiler:
+    """Etapes mesurees, dans l'ordre d'execution (une etape repetee est cumulee)"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        stage = self.stages.get(name) or Stage(name)
+        self.stages[name] = stage
+        current = Stage(name)
+        current.rows = rows
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield current
+        finally:
+            stage.seconds += time.perf_counter() - start
+            if current.rows is not None:
+                stage.rows = (stage.rows or 0) + current.rows
+            stage.peak_rss_mb = peak_rss_mb()
+            if rss_before is not None:
+                stage.rss_growth_mb = round((stage.rss_growth_mb or 0) + stage.peak_rss_mb - rss_before, 1)
+
+    def as_dicts(self):
+        return [stage.as_dict() for stage in self.stages.values()]
+
+    def report(self):
+        print(f"\n   {'etape':<28} {'lignes':>12} {'duree':>10} {'lignes/s':>12} {'pic RSS':>10}")
+        for stage in self.stages.values():
+            rows = f"{stage.rows:,}".replace(',', ' ') if stage.rows is not None else "-"
+            rate = f"{stage.rows_per_s:,}".replace(',', ' ') if stage.rows_per_s else "-"
+            rss = f"{stage.peak_rss_mb:.0f} Mo" if stage.peak_rss_mb is not None else "-"
+            print(f"   {stage.name:<28} {rows:>12} {stage.seconds:>9.2f}s {rate:>12} {rss:>10}")
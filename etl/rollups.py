@@ -0,0 +1,228 @@
+"""
+Tables d'agregats pre-calcules (rollups) pour les endpoints /stats
+
+Reconstruites a la fin de chaque chargement par load_to_db.py :
+- stats_annee             : totaux nationaux par annee
+- stats_region_annee      : totaux par (annee, region)
+- stats_medicament_annee  : totaux par (annee, medicament)
+- stats_top_medicaments   : classement des TOP_MEDICAMENTS_RANG_MAX premiers
+                            medicaments par (annee, region) et par critere
+                            (boites, remb) ; region_id = 0 : France entiere
+
+stats_annee.data_version porte la version des donnees sous laquelle les
+rollups seront publies (manifest.bump_data_version) : l'API ne les lit que si
+elle correspond a la version courante, sinon elle agrege la table brute.
+"""
+
+import math
+
+from sqlalchemy import inspect, text
+
+# Rangs conserves dans stats_top_medicaments (n maximal de /stats/medicaments/top)
+TOP_MEDICAMENTS_RANG_MAX = 100
+
+# ============================================================
+# DDL (compatible PostgreSQL et SQLite)
+# ============================================================
+
+DDL_ROLLUPS = [
+    """
+    CREATE TABLE IF NOT EXISTS stats_annee (
+        annee INTEGER PRIMARY KEY,
+        total_boites BIGINT NOT NULL,
+        total_remb NUMERIC(15, 2) NOT NULL,
+        nb_regions INTEGER NOT NULL,
+        nb_lignes INTEGER NOT NULL,
+        data_version INTEGER,
+        refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stats_region_annee (
+        annee INTEGER NOT NULL,
+        region_id INTEGER NOT NULL REFERENCES regions(id),
+        total_boites BIGINT NOT NULL,
+        total_remb NUMERIC(15, 2) NOT NULL,
+        PRIMARY KEY (annee, region_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stats_medicament_annee (
+        annee INTEGER NOT NULL,
+        medicament_id INTEGER NOT NULL REFERENCES medicaments(id),
+        total_boites BIGINT NOT NULL,
+        total_remb NUMERIC(15, 2) NOT NULL,
+        PRIMARY KEY (annee, medicament_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS stats_top_medicaments (
+        annee INTEGER NOT NULL,
+        region_id INTEGER NOT NULL,
+        critere VARCHAR(6) NOT NULL,
+        rang INTEGER NOT NULL,
+        medicament_id INTEGER NOT NULL REFERENCES medicaments(id),
+        total_boites BIGINT NOT NULL,
+        total_remb NUMERIC(15, 2) NOT NULL,
+        PRIMARY KEY (annee, region_id, critere, rang)
+    )
+    """,
+]
+
+# ============================================================
+# RECONSTRUCTION
+# ============================================================
+
+def _insert_top_medicaments(critere, colonne):
+    """
+    Classement par (annee, region) selon `colonne`, plus la France entiere
+    (region_id = 0, depuis stats_medicament_annee) ; egalites departagees par id
+    """
+    return f"""
+    INSERT INTO stats_top_medicaments
+        (annee, region_id, critere, rang, medicament_id, total_boites, total_remb)
+    SELECT annee, region_id, '{critere}', rang, medicament_id, total_boites, total_remb
+    FROM (
+        SELECT annee, region_id, medicament_id, total_boites, total_remb,
+               ROW_NUMBER() OVER (
+                   PARTITION BY annee, region_id ORDER BY {colonne} DESC, medicament_id
+               ) AS rang
+        FROM (
+            SELECT annee, region_id, medicament_id,
+                   SUM(total_boites) AS total_boites, SUM(total_remb) AS total_remb
+            FROM consommation
+            WHERE region_id IS NOT NULL AND medicament_id IS NOT NULL
+            GROUP BY annee, region_id, medicament_id
+            UNION ALL
+            SELECT annee, 0, medicament_id, total_boites, total_remb
+            FROM stats_medicament_annee
+        ) totaux
+    ) classement
+    WHERE rang <= {TOP_MEDICAMENTS_RANG_MAX}
+    """
+
+
+REFRESH_ROLLUPS = [
+    "DELETE FROM stats_top_medicaments",
+    "DELETE FROM stats_medicament_annee",
+    "DELETE FROM stats_region_annee",
+    "DELETE FROM stats_annee",
+    """
+    INSERT INTO stats_annee
+        (annee, total_boites, total_remb, nb_regions, nb_lignes, data_version)
+    SELECT
+        annee,
+        SUM(total_boites),
+        SUM(total_remb),
+        COUNT(DISTINCT region_id),
+        COUNT(*),
+        :data_version
+    FROM consommation
+    GROUP BY annee
+    """,
+    """
+    INSERT INTO stats_region_annee (annee, region_id, total_boites, total_remb)
+    SELECT annee, region_id, SUM(total_boites), SUM(total_remb)
+    FROM consommation
+    WHERE region_id IS NOT NULL
+    GROUP BY annee, region_id
+    """,
+    """
+    INSERT INTO stats_medicament_annee (annee, medicament_id, total_boites, total_remb)
+    SELECT annee, medicament_id, SUM(total_boites), SUM(total_remb)
+    FROM consommation
+    WHERE medicament_id IS NOT NULL
+    GROUP BY annee, medicament_id
+    """,
+    _insert_top_medicaments("boites", "total_boites"),
+    _insert_top_medicaments("remb", "total_remb"),
+]
+
+
+def create_rollup_tables(engine):
+    """Cree les tables de rollup si elles n'existent pas"""
+    with engine.begin() as conn:
+        for ddl in DDL_ROLLUPS:
+            conn.execute(text(ddl))
+        # Tables creees avant le marqueur de version (ancienne colonne max_consommation_id)
+        colonnes = {c["name"] for c in inspect(conn).get_columns("stats_annee")}
+        if "data_version" not in colonnes:
+            conn.execute(text("ALTER TABLE stats_annee ADD COLUMN data_version INTEGER"))
+
+
+def refresh_rollups(engine, data_version):
+    """
+    Reconstruit toutes les tables de rollup dans une seule transaction :
+    les lecteurs voient soit les anciens agregats, soit les nouveaux.
+    data_version : version qui sera publiee apres ce chargement
+    (manifest.next_data_version), enregistree comme marqueur de fraicheur.
+    """
+    create_rollup_tables(engine)
+    with engine.begin() as conn:
+        for statement in REFRESH_ROLLUPS:
+            conn.execute(text(statement), {"data_version": data_version})
+        return conn.execute(text("SELECT COUNT(*) FROM stats_annee")).scalar()
+
+
+# ============================================================
+# VERIFICATION DE COHERENCE
+# ============================================================
+
+CHECKS_ROLLUPS = {
+    "stats_annee": """
+        SELECT c.annee,
+               SUM(c.total_boites) AS boites_source,
+               SUM(c.total_remb) AS remb_source,
+               MAX(s.total_boites) AS boites_rollup,
+               MAX(s.total_remb) AS remb_rollup
+        FROM consommation c
+        LEFT JOIN stats_annee s ON s.annee = c.annee
+        GROUP BY c.annee
+    """,
+    "stats_region_annee": """
+        SELECT c.annee,
+               SUM(c.total_boites) AS boites_source,
+               SUM(c.total_remb) AS remb_source,
+               (SELECT SUM(r.total_boites) FROM stats_region_annee r
+                WHERE r.annee = c.annee) AS boites_rollup,
+               (SELECT SUM(r.total_remb) FROM stats_region_annee r
+                WHERE r.annee = c.annee) AS remb_rollup
+        FROM consommation c
+        WHERE c.region_id IS NOT NULL
+        GROUP BY c.annee
+    """,
+    "stats_medicament_annee": """
+        SELECT c.annee,
+               SUM(c.total_boites) AS boites_source,
+               SUM(c.total_remb) AS remb_source,
+               (SELECT SUM(m.total_boites) FROM stats_medicament_annee m
+                WHERE m.annee = c.annee) AS boites_rollup,
+               (SELECT SUM(m.total_remb) FROM stats_medicament_annee m
+                WHERE m.annee = c.annee) AS remb_rollup
+        FROM consommation c
+        WHERE c.medicament_id IS NOT NULL
+        GROUP BY c.annee
+    """,
+}
+
+
+def check_rollups(engine):
+    """
+    Compare les totaux des rollups avec la table consommation brute.
+
+    Retourne la liste des ecarts (table, annee, colonne, source, rollup) ;
+    une liste vide signifie que les rollups sont coherents.
+    """
+    ecarts = []
+    with engine.connect() as conn:
+        for table, query in CHECKS_ROLLUPS.items():
+            for row in conn.execute(text(query)):
+                if int(row.boites_source or 0) != int(row.boites_rollup or 0):
+                    ecarts.append((table, row.annee, "total_boites",
+                                   row.boites_source, row.boites_rollup))
+                # Tolerance relative : SQLite somme des flottants (ordre d'addition different)
+                if not math.isclose(float(row.remb_source or 0), float(row.remb_rollup or 0),
+                                    rel_tol=1e-12, abs_tol=0.005):
+                    ecarts.append((table, row.annee, "total_remb",
+                                   row.remb_source, row.remb_rollup))
+    return ecarts
@@ -0,0 +1,76 @@
+"""
+Lecture et ecriture des fichiers agreges (../data/processed)
+
+Format principal : Parquet (types explicites, noms de regions en categorie,
+compression zstd), un fichier par annee : agregation_<type>_<annee>.parquet.
+Le CSV reste accepte en entree, lu avec les memes types explicites.
+"""
+
+import os
+import time
+
+import pandas as pd
+
+# Types explicites par colonne (plus d'inference : code_cip reste une chaine)
+DTYPES = {
+    'code_region': 'int16',
+    'nom_region': 'category',
+    'code_cip': 'string',
+    'nom_medicament': 'string',
+    'code_atc': 'string',
+    'classe_therapeutique': 'category',
+    'total_boites': 'int64',
+    'total_remb': 'float64',
+}
+
+FORMATS = ('parquet', 'csv')
+
+PARQUET_COMPRESSION = 'zstd'
+
+
+def source_path(data_dir, kind, annee, fmt):
+    return os.path.join(data_dir, f'agregation_{kind}_{annee}.{fmt}')
+
+
+def find_source(data_dir, kind, annee):
+    """Chemin du fichier d'une partition, Parquet de preference"""
+    for fmt in FORMATS:
+        path = source_path(data_dir, kind, annee, fmt)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def read_source(path, columns=None):
+    """
+    Lit un fichier agrege (Parquet ou CSV), uniquement les colonnes demandees,
+    avec les types de DTYPES. Affiche le temps de lecture.
+    """
+    start = time.perf_counter()
+
+    if path.endswith('.parquet'):
+        df = pd.read_parquet(path, columns=columns)
+        fmt = 'parquet'
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        dtype = {c: t for c, t in DTYPES.items() if c in header}
+        df = pd.read_csv(path, usecols=columns, dtype=dtype)
+        fmt = 'csv'
+
+    # Types identiques quel que soit le format d'origine
+    df = df.astype({c: t for c, t in DTYPES.items() if c in df.columns})
+
+    elapsed = time.perf_counter() - start
+    print(f"   ⏱️  lecture {fmt} {os.path.basename(path)}: {len(df):,} lignes en {elapsed * 1000:.0f} ms".replace(',', ' '))
+    return df
+
+
+def write_source(df, data_dir, kind, annee, fmt='parquet'):
+    """Ecrit un agregat au format demande et retourne son chemin"""
+    path = source_path(data_dir, kind, annee, fmt)
+    df = df.astype({c: t for c, t in DTYPES.items() if c in df.columns})
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False, compression=PARQUET_COMPRESSION)
+    else:
+        df.to_csv(path, index=False)
+    return path
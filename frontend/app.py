@@ -4,7 +4,7 @@ Analyse territoriale de la consommation de médicaments en France
 """
 
 import streamlit as st
-from utils.api_client import get_overview, get_regions_stats
+from utils.api_client import get_overview, get_regions_stats, run_concurrently
 from utils.charts import format_number, format_currency, create_bar_chart
 import pandas as pd
 
@@ -24,8 +24,12 @@ st.markdown("---")
 # Vérifier la connexion API
 try:
     # Charger les données avec spinner
+    # Vue d'ensemble et stats régionales chargées en parallèle
     with st.spinner("⏳ Chargement des données (l'API peut prendre 30s à se réveiller)..."):
-        overview = get_overview(2023)
+        overview, regions_stats = run_concurrently(
+            lambda: get_overview(2023),
+            lambda: get_regions_stats(2023)
+        )
     
     if overview:
         # KPIs en haut
@@ -60,10 +64,6 @@ try:
         # Graphique Top Régions
         st.subheader("🏆 Top Régions par Montant Remboursé (2023)")
         
-        # Charger stats régions avec spinner
-        with st.spinner("⏳ Chargement des statistiques régionales..."):
-            regions_stats = get_regions_stats(2023)
-        
         if regions_stats:
             df = pd.DataFrame(regions_stats)
             
@@ -3,82 +3,144 @@ Page Carte de France interactive avec Folium
 """
 
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
+import numpy as np
 import folium
-from streamlit_folium import st_folium
+from branca.colormap import LinearColormap
 from utils.api_client import get_regions_stats
 from utils.charts import format_number, format_currency
+from utils.geo import load_regions_geojson, REGION_CENTRES
 
 st.set_page_config(page_title="Carte - MediMap", page_icon="🗺️", layout="wide")
 
+# Indicateur -> (libellé, formatage)
+METRIQUES = {
+    "total_remb": ("Montant Remboursé", format_currency),
+    "total_boites": ("Total Boîtes", format_number),
+}
+
+# Échelle de couleur : blanc -> rouge foncé
+COULEURS = np.array([[255, 245, 240], [103, 0, 13]], dtype=np.float64)
+
+def color_scale(values):
+    """Couleur hexadécimale de chaque valeur (interpolation linéaire vectorisée)"""
+    values = np.asarray(values, dtype=np.float64)
+    span = values.max() - values.min()
+    intensity = (values - values.min()) / span if span else np.zeros(len(values))
+    rgb = np.rint(COULEURS[0] + intensity[:, None] * (COULEURS[1] - COULEURS[0])).astype(int)
+    return [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in rgb]
+
+def add_circles(m, df, libelle):
+    """Repli sans contours : un cercle par région, taille et couleur selon la valeur"""
+    span = df['valeur'].max() - df['valeur'].min()
+    intensity = (df['valeur'] - df['valeur'].min()) / span if span else df['valeur'] * 0
+    for region, rayon in zip(df.itertuples(), 10 + intensity * 30):
+        centre = REGION_CENTRES.get(region.code_region)
+        if centre is None:
+            continue
+        folium.CircleMarker(
+            location=centre, radius=float(rayon),
+            tooltip=f"{region.nom_region} — {libelle} : {region.libelle}",
+            color=region.couleur, fill=True, fillColor=region.couleur,
+            fillOpacity=0.7, weight=2,
+        ).add_to(m)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def render_map(annee, metrique):
+    """
+    HTML de la carte pour (année, indicateur), mémorisé : un rerun qui ne
+    change ni l'une ni l'autre ne reconstruit pas la carte.
+    Choroplèthe si data/regions.geojson est présent, cercles sinon.
+    """
+    geojson = load_regions_geojson()
+    regions_stats = get_regions_stats(annee)
+    if not regions_stats:
+        return None
+
+    libelle, formater = METRIQUES[metrique]
+    df = pd.DataFrame(regions_stats)
+    df['valeur'] = df[metrique].astype(float)
+    df['couleur'] = color_scale(df['valeur'])
+    df['libelle'] = df['valeur'].map(formater)
+
+    m = folium.Map(location=[46.3, 0.5], zoom_start=6, tiles='OpenStreetMap')
+    LinearColormap(
+        ['#%02x%02x%02x' % tuple(int(c) for c in couleur) for couleur in COULEURS],
+        vmin=df['valeur'].min(),
+        vmax=df['valeur'].max(),
+        caption=libelle,
+    ).add_to(m)
+
+    if geojson is None:
+        add_circles(m, df, libelle)
+        return m.get_root().render()
+
+    par_region = df.set_index('code_region')[['couleur', 'libelle']].to_dict('index')
+
+    # Propriétés d'affichage ajoutées à une copie des features (la géométrie est partagée)
+    features = []
+    for feature in geojson['features']:
+        region = par_region.get(feature['properties']['code_region'])
+        features.append({
+            **feature,
+            "properties": {
+                **feature['properties'],
+                "couleur": region['couleur'] if region else "#d9d9d9",
+                "valeur": region['libelle'] if region else "—",
+            },
+        })
+
+    folium.GeoJson(
+        {"type": "FeatureCollection", "features": features},
+        style_function=lambda feature: {
+            "fillColor": feature['properties']['couleur'],
+            "color": "#555555",
+            "weight": 1,
+            "fillOpacity": 0.8,
+        },
+        highlight_function=lambda feature: {"weight": 3, "color": "#000000"},
+        tooltip=folium.GeoJsonTooltip(
+            fields=['nom', 'valeur'],
+            aliases=['Région', libelle],
+        ),
+    ).add_to(m)
+
+    return m.get_root().render()
+
 st.title("🗺️ Carte de France - Consommation par Région")
 st.markdown("---")
 
-annee = st.selectbox("Année", [2023], index=0)
+col1, col2 = st.columns(2)
+with col1:
+    annee = st.selectbox("Année", [2023], index=0)
+with col2:
+    metrique = st.selectbox("Indicateur", list(METRIQUES), format_func=lambda m: METRIQUES[m][0])
 
 regions_stats = get_regions_stats(annee)
 
 if regions_stats:
-    df = pd.DataFrame(regions_stats)
-    df['total_remb_float'] = df['total_remb'].astype(float)
-    
-    coords_regions = {
-        "Ile-de-France": [48.8566, 2.3522],
-        "Auvergne-Rhone-Alpes": [45.7640, 4.8357],
-        "Nouvelle-Aquitaine": [44.8378, -0.5792],
-        "Occitanie": [43.6047, 1.4442],
-        "Hauts-de-France": [50.6292, 3.0573],
-        "Provence-Alpes-Cote d'Azur": [43.2965, 5.3698],
-        "Grand Est": [48.5734, 7.7521],
-        "Pays de la Loire": [47.2184, -1.5536],
-        "Normandie": [49.4432, 1.0993],
-        "Bretagne": [48.1173, -1.6778],
-        "Bourgogne-Franche-Comte": [47.2805, 5.0417],
-        "Centre-Val de Loire": [47.9029, 1.9093]
-    }
-    
-    m = folium.Map(location=[46.603354, 1.888334], zoom_start=6, tiles='OpenStreetMap')
-    
-    max_remb = df['total_remb_float'].max()
-    min_remb = df['total_remb_float'].min()
-    
-    for idx, row in df.iterrows():
-        if row['nom_region'] in coords_regions:
-            coords = coords_regions[row['nom_region']]
-            intensity = (row['total_remb_float'] - min_remb) / (max_remb - min_remb)
-            red = int(255)
-            green_blue = int(255 * (1 - intensity))
-            color = f'#{red:02x}{green_blue:02x}{green_blue:02x}'
-            radius = 10 + (intensity * 30)
-            
-            popup_html = f"""
-            <div style="font-family: Arial; min-width: 200px;">
-                <h4>{row['nom_region']}</h4>
-                <p><b>Boîtes:</b> {format_number(row['total_boites'])}</p>
-                <p><b>Remboursé:</b> {format_currency(row['total_remb_float'])}</p>
-            </div>
-            """
-            
-            folium.CircleMarker(
-                location=coords, radius=radius, 
-                popup=folium.Popup(popup_html, max_width=300),
-                color=color, fill=True, fillColor=color, 
-                fillOpacity=0.7, weight=2
-            ).add_to(m)
-    
-    st_folium(m, width=None, height=600)
+    if load_regions_geojson() is None:
+        st.info("Contours des régions introuvables (frontend/data/regions.geojson) : "
+                "carte simplifiée en cercles, voir utils/geo.py")
+    html = render_map(annee, metrique)
+    if html:
+        components.html(html, height=600)
     
     st.markdown("---")
     st.markdown("### 🎨 Légende")
     st.markdown("""
-    - **Taille des cercles** : Proportionnelle au montant
-    - **Rouge foncé** : Montant élevé
-    - **Cliquez** sur un cercle pour voir les détails
+    - **Rouge foncé** : valeur élevée de l'indicateur
+    - **Gris** : pas de données pour la région
+    - **Outre-mer** : regroupé dans OpenMedic, affiché en encarts à l'ouest
+    - **Survolez** une région pour voir les détails
     """)
     
     st.markdown("---")
     st.markdown("### 📊 Classement")
     
+    df = pd.DataFrame(regions_stats)
+    df['total_remb_float'] = df['total_remb'].astype(float)
     df_display = df.sort_values('total_remb_float', ascending=False).copy()
     df_display['total_boites'] = df_display['total_boites'].apply(format_number)
     df_display['total_remb_float'] = df_display['total_remb_float'].apply(format_currency)
@@ -88,4 +150,4 @@ if regions_stats:
     st.dataframe(df_display, use_container_width=True, hide_index=True)
 
 else:
-    st.error("Impossible de charger les données")
\ No newline at end of file
+    st.error("Impossible de charger les données")
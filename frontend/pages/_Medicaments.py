@@ -32,16 +32,31 @@ elif query and len(query) < 3:
     st.info("Entrez au moins 3 caractères pour lancer la recherche")
 
 else:
-    # Afficher quelques médicaments par défaut
-    st.markdown("### 📋 Liste des médicaments (100 premiers)")
+    # Liste paginée par curseur : curseurs des pages déjà vues, pour revenir en arrière
+    if "medicaments_cursors" not in st.session_state:
+        st.session_state.medicaments_cursors = [None]
+    cursors = st.session_state.medicaments_cursors
+    page = len(cursors)
+    
+    st.markdown(f"### 📋 Liste des médicaments (page {page})")
     
     # AVEC SPINNER - BIEN INDENTÉ
     with st.spinner("⏳ Chargement des médicaments (l'API peut prendre 30s à se réveiller)..."):
-        medicaments = get_medicaments(skip=0, limit=100)
+        medicaments, next_cursor = get_medicaments(cursor=cursors[-1], limit=100)
     
     if medicaments:
         df = pd.DataFrame(medicaments)
         df = df[['code_cip', 'nom_medicament']]
         df.columns = ['Code CIP', 'Nom du médicament']
         st.dataframe(df, use_container_width=True, hide_index=True)
-        st.info(f"💡 {len(medicaments)} médicaments affichés. Utilisez la recherche ci-dessus pour trouver un médicament spécifique.")
\ No newline at end of file
+        st.info(f"💡 {len(medicaments)} médicaments affichés. Utilisez la recherche ci-dessus pour trouver un médicament spécifique.")
+    
+    col_prev, col_next = st.columns(2)
+    with col_prev:
+        if st.button("⬅️ Page précédente", disabled=page == 1):
+            cursors.pop()
+            st.rerun()
+    with col_next:
+        if st.button("Page suivante ➡️", disabled=not next_cursor):
+            cursors.append(next_cursor)
+            st.rerun()
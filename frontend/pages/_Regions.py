@@ -3,7 +3,6 @@ Page Analyse par Région
 """
 
 import streamlit as st
-import pandas as pd
 from utils.api_client import get_all_regions, get_region_stats
 from utils.charts import format_number, format_currency
 
@@ -30,8 +29,8 @@ if regions:
     # Sélecteur d'année
     annee = st.selectbox("Année", [2023], index=0)
     
-    # Récupérer les stats
-    stats = get_region_stats(code_region, annee)
+    # Récupérer les stats (rang et comparaison nationale calculés par l'API)
+    stats = get_region_stats(code_region, annee, enrichi=True)
     
     if stats and 'error' not in stats:
         st.markdown(f"## {stats['nom_region']}")
@@ -58,17 +57,12 @@ if regions:
         # Comparaison avec la moyenne nationale
         st.markdown("### 📈 Comparaison nationale")
         
-        # Récupérer toutes les régions pour calculer la moyenne
-        from utils.api_client import get_regions_stats
-        all_stats = get_regions_stats(annee)
-        
-        if all_stats:
-            df_all = pd.DataFrame(all_stats)
-            moyenne_nationale = df_all['total_remb'].astype(float).mean()
+        if 'rang' in stats:
+            moyenne_nationale = stats['moyenne_nationale']
             remb_region = float(stats['total_remb'])
             
-            diff = remb_region - moyenne_nationale
-            pct_diff = (diff / moyenne_nationale) * 100
+            diff = stats['ecart']
+            pct_diff = stats['ecart_pct']
             
             col1, col2, col3 = st.columns(3)
             
@@ -87,17 +81,15 @@ if regions:
             with col3:
                 st.metric(
                     "Écart",
-                    f"{pct_diff:+.1f}%",
+                    # None : moyenne nationale nulle, écart relatif non défini
+                    f"{pct_diff:+.1f}%" if pct_diff is not None else "—",
                     delta=format_currency(diff)
                 )
             
             # Classement
-            df_sorted = df_all.sort_values('total_remb', ascending=False).reset_index(drop=True)
-            df_sorted.index = df_sorted.index + 1
-            
-            position = df_sorted[df_sorted['code_region'] == code_region].index[0]
-            
-            st.markdown(f"**Classement :** {position}ème région sur {len(df_sorted)}")
+            st.markdown(f"**Classement :** {stats['rang']}ème région sur {stats['nb_regions']}")
+            if stats['part_pct'] is not None:
+                st.markdown(f"**Part du total national :** {stats['part_pct']:.1f}%")
     
     else:
         st.warning("Aucune donnée disponible pour cette région")
@@ -3,9 +3,10 @@ Page Statistiques avancées
 """
 
 import streamlit as st
-import pandas as pd
-from utils.api_client import get_overview, get_regions_stats
-from utils.charts import create_pie_chart, format_number, format_currency
+from utils.api_client import (
+    get_overview, get_regions_stats_df, get_all_regions, get_top_medicaments_df, run_concurrently
+)
+from utils.charts import create_bar_chart, create_pie_chart, format_number, format_currency
 
 st.set_page_config(page_title="Stats - MediMap", page_icon="📈", layout="wide")
 
@@ -15,7 +16,11 @@ st.markdown("---")
 # Vue d'ensemble
 st.subheader("🌍 Vue d'ensemble nationale")
 
-overview = get_overview(2023)
+overview, df, regions = run_concurrently(
+    lambda: get_overview(2023),
+    lambda: get_regions_stats_df(2023),
+    get_all_regions
+)
 
 if overview:
     col1, col2, col3, col4 = st.columns(4)
@@ -37,10 +42,7 @@ st.markdown("---")
 # Répartition par région
 st.subheader("🥧 Répartition des remboursements par région")
 
-regions_stats = get_regions_stats(2023)
-
-if regions_stats:
-    df = pd.DataFrame(regions_stats)
+if not df.empty:
     df['total_remb_float'] = df['total_remb'].astype(float)
     
     # Camembert
@@ -66,4 +68,37 @@ if regions_stats:
     
     df_display.columns = ['Région', 'Total Boîtes', 'Montant Remboursé', '% du Total']
     
-    st.dataframe(df_display, use_container_width=True, hide_index=True)
\ No newline at end of file
+    st.dataframe(df_display, use_container_width=True, hide_index=True)
+
+st.markdown("---")
+
+# Top médicaments
+st.subheader("💊 Top médicaments")
+
+CRITERES = {"Montant remboursé": "remb", "Nombre de boîtes": "boites"}
+perimetres = {"France entière": None}
+perimetres.update({r['nom_region']: r['code_region'] for r in sorted(regions, key=lambda r: r['nom_region'])})
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    perimetre = st.selectbox("Périmètre", list(perimetres))
+with col2:
+    critere = st.radio("Classement", list(CRITERES), horizontal=True)
+with col3:
+    n = st.slider("Nombre de médicaments", min_value=5, max_value=50, value=15, step=5)
+
+df_top = get_top_medicaments_df(2023, perimetres[perimetre], n, CRITERES[critere])
+
+if not df_top.empty:
+    colonne = 'total_remb' if CRITERES[critere] == "remb" else 'total_boites'
+    # Barres horizontales : le premier du classement en haut
+    fig = create_bar_chart(
+        df_top.iloc[::-1],
+        x=colonne,
+        y='nom_medicament',
+        title=f"{critere} - {perimetre} (2023)",
+        color=colonne
+    )
+    st.plotly_chart(fig, use_container_width=True)
+else:
+    st.info("Aucune donnée de consommation par médicament pour ce périmètre")
@@ -2,17 +2,82 @@
 Client pour interroger l'API FastAPI
 """
 
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import pandas as pd
 
 # URL de base de l'API
-API_BASE_URL = "https://medimap-api.onrender.com"
+API_BASE_URL = os.getenv("API_BASE_URL", "https://medimap-api.onrender.com")
+
+# Timeouts (connexion, lecture) en secondes
+API_TIMEOUT = (
+    float(os.getenv("API_CONNECT_TIMEOUT", "5")),
+    float(os.getenv("API_READ_TIMEOUT", "30")),
+)
+
+# Réessais pendant le réveil de l'API : connexion refusée ou 502/503/504.
+# Attente urllib3 avant le n-ième réessai : 0 pour le premier, puis
+# API_BACKOFF_FACTOR × 2^(n-1), soit 0 s, 1 s, 2 s par défaut (3 s au total).
+# Pas de réessai après un timeout de lecture : la requête a été reçue, la
+# relancer multiplierait l'attente (jusqu'à API_READ_TIMEOUT par essai).
+API_RETRIES = int(os.getenv("API_RETRIES", "3"))
+API_BACKOFF_FACTOR = float(os.getenv("API_BACKOFF_FACTOR", "0.5"))
+
+@st.cache_resource
+def get_session():
+    """
+    Session HTTP partagée : connexions keep-alive réutilisées (pas de nouvelle
+    poignée de main TCP+TLS par appel) et réessais avec backoff exponentiel
+    """
+    retry = Retry(
+        total=API_RETRIES,
+        connect=API_RETRIES,
+        read=0,
+        status=API_RETRIES,
+        backoff_factor=API_BACKOFF_FACTOR,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=("GET",),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=16)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def _get(url, **kwargs):
+    """GET via la session partagée, avec timeout"""
+    return get_session().get(url, timeout=API_TIMEOUT, **kwargs)
+
+def run_concurrently(*calls, max_workers=8):
+    """
+    Exécute des appels indépendants en parallèle (pool de threads) et renvoie
+    leurs résultats dans l'ordre. Ex :
+        overview, regions = run_concurrently(lambda: get_overview(2023),
+                                             lambda: get_regions_stats(2023))
+    """
+    # Les threads héritent du contexte Streamlit (st.error, cache)
+    ctx = get_script_run_ctx()
+    
+    def attach_ctx():
+        add_script_run_ctx(threading.current_thread(), ctx)
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls)) or 1, initializer=attach_ctx) as pool:
+        futures = [pool.submit(call) for call in calls]
+        return [future.result() for future in futures]
 
 @st.cache_data(ttl=300)  # Cache pendant 5 minutes
 def get_overview(annee=2023):
     """Récupère la vue d'ensemble"""
     try:
-        response = requests.get(f"{API_BASE_URL}/stats/overview?annee={annee}")
+        response = _get(f"{API_BASE_URL}/stats/overview?annee={annee}")
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -23,7 +88,7 @@ def get_overview(annee=2023):
 def get_all_regions():
     """Récupère toutes les régions"""
     try:
-        response = requests.get(f"{API_BASE_URL}/regions")
+        response = _get(f"{API_BASE_URL}/regions")
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -34,29 +99,106 @@ def get_all_regions():
 def get_regions_stats(annee=2023):
     """Récupère les stats de toutes les régions"""
     try:
-        response = requests.get(f"{API_BASE_URL}/stats/regions?annee={annee}")
+        response = _get(f"{API_BASE_URL}/stats/regions?annee={annee}")
         response.raise_for_status()
         return response.json()
     except Exception as e:
         st.error(f"Erreur API: {e}")
         return []
 
+def columns_to_dataframe(payload):
+    """Réponse ?format=columns ({"columns": [...], "data": [[...]]}) -> DataFrame"""
+    return pd.DataFrame(payload["data"], columns=payload["columns"])
+
+@st.cache_data(ttl=300)
+def get_regions_stats_df(annee=2023):
+    """Stats de toutes les régions, en DataFrame (format colonnes, total_remb numérique)"""
+    try:
+        response = _get(f"{API_BASE_URL}/stats/regions", params={"annee": annee, "format": "columns"})
+        response.raise_for_status()
+        return columns_to_dataframe(response.json())
+    except Exception as e:
+        st.error(f"Erreur API: {e}")
+        return pd.DataFrame()
+
+@st.cache_data(ttl=300)
+def get_top_medicaments_df(annee=2023, code_region=None, n=10, by="remb"):
+    """
+    Médicaments les plus remboursés (by="remb") ou les plus consommés (by="boites"),
+    France entière ou une région, en DataFrame
+    """
+    params = {"annee": annee, "n": n, "by": by, "format": "columns"}
+    if code_region is not None:
+        params["code_region"] = code_region
+    try:
+        response = _get(f"{API_BASE_URL}/stats/medicaments/top", params=params)
+        response.raise_for_status()
+        return columns_to_dataframe(response.json())
+    except Exception as e:
+        st.error(f"Erreur API: {e}")
+        return pd.DataFrame()
+
 @st.cache_data(ttl=300)
-def get_region_stats(code_region, annee=2023):
-    """Récupère les stats d'une région spécifique"""
+def get_region_stats(code_region, annee=2023, enrichi=False):
+    """
+    Récupère les stats d'une région spécifique
+    enrichi=True : ajoute rang, moyenne et total nationaux, part et écart
+    """
     try:
-        response = requests.get(f"{API_BASE_URL}/stats/region/{code_region}?annee={annee}")
+        response = _get(
+            f"{API_BASE_URL}/stats/region/{code_region}",
+            params={"annee": annee, "enrichi": str(enrichi).lower()}
+        )
         response.raise_for_status()
         return response.json()
     except Exception as e:
         st.error(f"Erreur API: {e}")
         return None
 
+@st.cache_data(ttl=300)
+def get_stats_batch(codes_region=(), annees=(2023,), metrics=("total_boites", "total_remb")):
+    """
+    Récupère les stats de plusieurs régions et années en un seul appel
+    Retourne un DataFrame (code_region, nom_region, annee, métriques...)
+    """
+    try:
+        params = [("code_region", c) for c in codes_region]
+        params += [("annee", a) for a in annees]
+        params += [("metrics", m) for m in metrics]
+        response = _get(f"{API_BASE_URL}/stats/batch", params=params)
+        response.raise_for_status()
+        # Réponse en colonnes : DataFrame direct
+        return pd.DataFrame(response.json())
+    except Exception as e:
+        st.error(f"Erreur API: {e}")
+        return pd.DataFrame()
+
+@st.cache_data(ttl=300)
+def get_timeseries(code_region=None, code_cip=None, annee_debut=None, annee_fin=None, fenetre=3):
+    """
+    Série annuelle (nation, région ou médicament) avec croissance et moyennes mobiles
+    Retourne (DataFrame par année, TCAM par métrique)
+    """
+    try:
+        params = {"fenetre": fenetre}
+        for key, value in [("code_region", code_region), ("code_cip", code_cip),
+                           ("annee_debut", annee_debut), ("annee_fin", annee_fin)]:
+            if value is not None:
+                params[key] = value
+        response = _get(f"{API_BASE_URL}/stats/timeseries", params=params)
+        response.raise_for_status()
+        data = response.json()
+        colonnes = ["annee"] + [k for k, v in data.items() if isinstance(v, list) and k != "annee"]
+        return pd.DataFrame({k: data[k] for k in colonnes}), data["tcam_pct"]
+    except Exception as e:
+        st.error(f"Erreur API: {e}")
+        return pd.DataFrame(), {}
+
 @st.cache_data(ttl=300)
 def search_medicaments(query):
     """Recherche de médicaments"""
     try:
-        response = requests.get(f"{API_BASE_URL}/medicaments/search?q={query}")
+        response = _get(f"{API_BASE_URL}/medicaments/search?q={query}")
         response.raise_for_status()
         return response.json()
     except Exception as e:
@@ -64,12 +206,51 @@ def search_medicaments(query):
         return []
 
 @st.cache_data(ttl=300)
-def get_medicaments(skip=0, limit=100):
-    """Récupère la liste des médicaments"""
+def _get_medicaments_page(cursor, limit, order):
+    """Une page de médicaments par curseur ; lève l'erreur HTTP/réseau (non mise en cache)"""
+    params = {"limit": limit, "order": order}
+    if cursor:
+        params["cursor"] = cursor
+    response = _get(f"{API_BASE_URL}/medicaments/", params=params)
+    response.raise_for_status()
+    return response.json(), response.headers.get("X-Next-Cursor")
+
+def get_medicaments(cursor=None, limit=100, order="id"):
+    """
+    Récupère une page de médicaments par curseur (coût constant par page)
+    Retourne (medicaments, next_cursor) ; next_cursor vaut None en fin de liste
+    """
     try:
-        response = requests.get(f"{API_BASE_URL}/medicaments?skip={skip}&limit={limit}")
+        return _get_medicaments_page(cursor, limit, order)
+    except Exception as e:
+        st.error(f"Erreur API: {e}")
+        return [], None
+
+@st.cache_data(ttl=300)
+def get_medicaments_df(cursor=None, limit=1000, order="id"):
+    """
+    Page de médicaments en DataFrame (format colonnes)
+    Retourne (DataFrame, next_cursor)
+    """
+    try:
+        params = {"limit": limit, "order": order, "format": "columns"}
+        if cursor:
+            params["cursor"] = cursor
+        response = _get(f"{API_BASE_URL}/medicaments/", params=params)
         response.raise_for_status()
-        return response.json()
+        return columns_to_dataframe(response.json()), response.headers.get("X-Next-Cursor")
     except Exception as e:
         st.error(f"Erreur API: {e}")
-        return []
\ No newline at end of file
+        return pd.DataFrame(), None
+
+def iter_medicaments(limit=1000, order="id"):
+    """
+    Parcourt toute la liste des médicaments, page par page
+    Lève requests.RequestException si une page échoue : jamais de liste tronquée
+    """
+    cursor = None
+    while True:
+        medicaments, cursor = _get_medicaments_page(cursor, limit, order)
+        yield from medicaments
+        if not cursor:
+            break
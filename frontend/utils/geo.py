@@ -0,0 +1,232 @@
+"""
+Géométrie des régions pour la carte choroplèthe
+
+Le fichier data/regions.geojson est une version simplifiée des contours
+régionaux, générée une fois avec :
+
+    cd frontend
+    python -m utils.geo chemin/vers/France.js
+
+Source : carte France.js (régions 2016) du paquet PyPI echarts-countries-pypkg
+(licence MIT), coordonnées encodées au format ECharts. Un GeoJSON au format
+france-geojson (regions-avec-outre-mer.geojson, propriétés code/nom) est
+aussi accepté.
+
+Les régions d'outre-mer sont regroupées dans OpenMedic (code 5) : leurs
+contours sont rapprochés de la métropole (encarts) et portent tous ce code.
+
+Sans ce fichier, la page Carte retombe sur des cercles placés au centre de
+chaque région (REGION_CENTRES).
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import streamlit as st
+
+GEOJSON_PATH = Path(__file__).resolve().parent.parent / "data" / "regions.geojson"
+
+# Code INSEE de la région -> code OpenMedic (outre-mer regroupé)
+CODE_OUTRE_MER = 5
+CODES_INSEE_OUTRE_MER = {"01", "02", "03", "04", "06"}
+
+# Encarts outre-mer : centre (lon, lat) dans le golfe de Gascogne et échelle
+ENCARTS = {
+    "01": ((-5.6, 45.8), 1.6),   # Guadeloupe
+    "02": ((-5.6, 44.8), 1.6),   # Martinique
+    "03": ((-5.6, 43.7), 0.35),  # Guyane
+    "04": ((-4.2, 43.3), 1.2),   # La Réunion
+    "06": ((-4.2, 44.3), 1.6),   # Mayotte
+}
+
+# Nom de la région dans la carte ECharts -> (code INSEE, nom)
+REGIONS_ECHARTS = {
+    "Guadeloupe": ("01", "Guadeloupe"),
+    "Martinique": ("02", "Martinique"),
+    "French Guiana": ("03", "Guyane"),
+    "Réunion": ("04", "La Réunion"),
+    "Mayotte": ("06", "Mayotte"),
+    "Ile-de-France": ("11", "Île-de-France"),
+    "Centre-Val de Loire": ("24", "Centre-Val de Loire"),
+    "Bourgogne-Franche-Comté": ("27", "Bourgogne-Franche-Comté"),
+    "Normandy": ("28", "Normandie"),
+    "Nord-Pas-de-Calais and Picardy": ("32", "Hauts-de-France"),
+    "Alsace–Champagne-Ardenne–Lorraine": ("44", "Grand Est"),
+    "Pays de la Loire": ("52", "Pays de la Loire"),
+    "Brittany": ("53", "Bretagne"),
+    "Aquitaine-Limousin-Poitou-Charentes": ("75", "Nouvelle-Aquitaine"),
+    "Languedoc-Roussillon-Midi-Pyrénées": ("76", "Occitanie"),
+    "Auvergne-Rhône-Alpes": ("84", "Auvergne-Rhône-Alpes"),
+    "Provence-Alpes-Côte d'Azur": ("93", "Provence-Alpes-Côte d'Azur"),
+    "Corsica": ("94", "Corse"),
+}
+
+# Repli sans contours : centre (lat, lon) de chaque région, par code OpenMedic
+REGION_CENTRES = {
+    5: (44.3, -4.8),  # outre-mer, à l'emplacement des encarts
+    11: (48.8566, 2.3522),
+    24: (47.9029, 1.9093),
+    27: (47.2805, 5.0417),
+    28: (49.4432, 1.0993),
+    32: (50.6292, 3.0573),
+    44: (48.5734, 7.7521),
+    52: (47.2184, -1.5536),
+    53: (48.1173, -1.6778),
+    75: (44.8378, -0.5792),
+    76: (43.6047, 1.4442),
+    84: (45.7640, 4.8357),
+    93: (43.2965, 5.3698),
+    94: (42.0396, 9.0129),
+}
+
+# Tolérance de simplification (degrés, ~1 km) et précision des coordonnées
+TOLERANCE = 0.01
+DECIMALS = 4
+
+
+def simplify_ring(points, tolerance=TOLERANCE):
+    """Douglas-Peucker itératif sur un anneau (tableau N x 2)"""
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) <= 4:
+        return points
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        inner = points[start + 1:end] - points[start]
+        norm = np.hypot(*segment)
+        if norm == 0:
+            distances = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            distances = np.abs(segment[0] * inner[:, 1] - segment[1] * inner[:, 0]) / norm
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = start + 1 + index
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+
+    ring = points[keep]
+    # Un anneau trop réduit (îlot) est abandonné
+    return ring if len(ring) >= 4 else None
+
+
+def _polygons(geometry):
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    return geometry["coordinates"]
+
+
+def _move_to_inset(polygons, center, scale):
+    """Translation + mise à l'échelle des polygones autour de leur centre"""
+    rings = [np.asarray(ring, dtype=np.float64) for polygon in polygons for ring in polygon]
+    all_points = np.concatenate(rings)
+    origin = (all_points.min(axis=0) + all_points.max(axis=0)) / 2
+    return [
+        [(np.asarray(ring) - origin) * scale + center for ring in polygon]
+        for polygon in polygons
+    ]
+
+
+def _decode_ring(encoded, offset, scale=1024):
+    """Anneau ECharts (UTF8Encoding) : deltas zigzag décalés de 64, par paire de caractères"""
+    x, y = offset
+    ring = []
+    for i in range(0, len(encoded), 2):
+        dx, dy = ord(encoded[i]) - 64, ord(encoded[i + 1]) - 64
+        x += (dx >> 1) ^ -(dx & 1)
+        y += (dy >> 1) ^ -(dy & 1)
+        ring.append((x / scale, y / scale))
+    return ring
+
+
+def read_echarts_map(source):
+    """Carte ECharts (echarts.registerMap) -> FeatureCollection au format france-geojson"""
+    with open(source, encoding="utf-8") as f:
+        script = f.read()
+    start = script.index("{", script.index("registerMap("))
+    collection, _ = json.JSONDecoder().raw_decode(script, start)
+
+    features = []
+    for feature in collection["features"]:
+        geometry = feature["geometry"]
+        polygons, offsets = geometry["coordinates"], geometry["encodeOffsets"]
+        if geometry["type"] == "Polygon":
+            polygons, offsets = [polygons], [offsets]
+        code, nom = REGIONS_ECHARTS[feature["properties"]["name"]]
+        features.append({
+            "type": "Feature",
+            "properties": {"code": code, "nom": nom},
+            "geometry": {"type": "MultiPolygon", "coordinates": [
+                [_decode_ring(ring, offset) for ring, offset in zip(polygon, polygon_offsets)]
+                for polygon, polygon_offsets in zip(polygons, offsets)
+            ]},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def build_regions_geojson(source, output=GEOJSON_PATH, tolerance=TOLERANCE):
+    """Simplifie la carte source (GeoJSON ou France.js ECharts) et l'écrit dans data/regions.geojson"""
+    if str(source).endswith(".js"):
+        collection = read_echarts_map(source)
+    else:
+        with open(source, encoding="utf-8") as f:
+            collection = json.load(f)
+
+    features = []
+    for feature in collection["features"]:
+        code = feature["properties"]["code"]
+        polygons = _polygons(feature["geometry"])
+
+        if code in ENCARTS:
+            center, scale = ENCARTS[code]
+            polygons = _move_to_inset(polygons, center, scale)
+
+        simplified = []
+        for polygon in polygons:
+            rings = [simplify_ring(ring, tolerance) for ring in polygon]
+            if rings[0] is None:
+                continue
+            simplified.append([
+                np.round(ring, DECIMALS).tolist() for ring in rings if ring is not None
+            ])
+
+        features.append({
+            "type": "Feature",
+            "properties": {
+                "code_region": CODE_OUTRE_MER if code in CODES_INSEE_OUTRE_MER else int(code),
+                "nom": feature["properties"]["nom"],
+            },
+            "geometry": {"type": "MultiPolygon", "coordinates": simplified},
+        })
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f,
+                  ensure_ascii=False, separators=(",", ":"))
+    return output
+
+
+@st.cache_resource
+def load_regions_geojson():
+    """Contours des régions, lus une seule fois par processus (None si absents)"""
+    if not GEOJSON_PATH.exists():
+        return None
+    with open(GEOJSON_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage : python -m utils.geo France.js|regions-avec-outre-mer.geojson")
+    path = build_regions_geojson(sys.argv[1])
+    print(f"✅ {path} ({path.stat().st_size / 1024:.0f} Ko)")